@@ -1,3 +1,7 @@
+#SYSTEM
+import threading
+
+#LIBRARIES
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
 from django.utils.importlib import import_module
@@ -33,8 +37,134 @@ class ContentiousInterface(object):
             returns:
                 tag_spec - butchered in whatever way you see fit.
         """
+        return tag_spec
+
+    def pre_render_batch(self, items):
+        """ Optional method.  The batched version of pre_render, for the tags
+            inside a {% pre_render_batch %} tag or rendered during a request
+            with the PreRenderBatchMiddleware, so that you can do one lookup
+            for all of them.  Tags outside of a batch are passed on their own,
+            unless you also define pre_render.
+            args:
+                items - a list of (tag_spec, meta) tuples.  The content of a
+                    tag_spec may contain placeholders for nested editables.
+            returns:
+                a list of tag_specs in the same order.
+        """
+        return [self.pre_render(tag_spec, meta) for tag_spec, meta in items]
+
+    def get_content_namespace(self, template_context):
+        """ Optional method.  Return the namespace (e.g. language) of the
+            content for the given template context.  Used to make the URLs of
+            ESI fragments vary by it.
+        """
         pass
 
+    def prefetch_content_data(self, keys, template_context):
+        """ Optional method.  Called by {% prefetch_editables %} with the keys
+            which the key manifest says the page is going to use, so that you
+            can fetch them in one go rather than in each get_content_data call.
+        """
+        pass
+
+    def start_content_prefetch(self, template_context, namespaces):
+        """ Optional method.  Called by the ContentPrefetchMiddleware before the
+            view, to start loading the content for the given namespaces (None
+            means the template context's own) in the background, e.g. with
+            contentious.prefetch.run_in_background.  get_content_data should
+            then wait for it rather than loading it again.
+        """
+        pass
+
+    def publish_drafts(self, template_context, keys=None):
+        """ Optional method.  For APIs which keep editors' saves as drafts
+            until they're published: publish the editor's drafts (or only
+            those for the given keys) and return the list of published keys.
+            Used by the publish_drafts view.
+        """
+        pass
+
+    def discard_drafts(self, template_context, keys=None):
+        """ Optional method.  Throw away the editor's drafts (or only those
+            for the given keys) and return the list of their keys.  Used by
+            the discard_drafts view.
+        """
+        pass
+
+    def get_content_namespaces(self):
+        """ Optional method.  Return a list of the namespaces (e.g. languages)
+            which content is cached in.  Used by the contentious_warm command.
+        """
+        pass
+
+    def load_content_dict(self, namespace):
+        """ Optional method.  Return a dict of dicts of all of the content for
+            the given namespace, fresh from your storage (i.e. not from a cache).
+        """
+        pass
+
+    def warm_cache(self, namespace):
+        """ Optional method.  Load the content for the given namespace into
+            your cache and return it.  Used by the contentious_warm command.
+        """
+        pass
+
+    def replace_content(self, find, replacement, fields=None, namespaces=None, key_prefix=None,
+                        regex=False, dry_run=False):
+        """ Optional method.  Find and replace text in the stored content, e.g.
+            when a domain changes, and return a list of dicts describing the
+            changes.  Used by the contentious_replace command.
+        """
+        pass
+
+    def get_content_version(self, template_context):
+        """ Optional method.  Return a string which changes whenever the content
+            for the given template context (e.g. its language) changes.  Used
+            to generate ETags, see contentious.conditional.
+        """
+        pass
+
+    def get_stored_keys(self):
+        """ Optional method.  Return an iterable of all of the keys which have
+            content stored for them.  Used by the contentious_scan command.
+        """
+        pass
+
+    def delete_content(self, keys):
+        """ Optional method.  Delete all stored content for the given keys.
+            Used by the contentious_scan command.
+        """
+        pass
+
+
+def get_optional_method(content_api, name):
+    """ Return the API's optional method of the given name, or None if it
+        doesn't have one or only has the stub which it inherits from
+        ContentiousInterface.
+    """
+    method = getattr(content_api, name, None)
+    stub = getattr(ContentiousInterface, name)
+    if getattr(method, '__func__', method) is getattr(stub, '__func__', stub):
+        return None
+    return method
+
+
+def import_by_path(dotted_path):
+    """ Given a string such as 'myapp.api.ContentAPI', import and return the
+        object which it refers to.
+    """
+    module, name = dotted_path.rsplit(".", 1)
+    module = import_module(module)
+    return getattr(module, name)
+
+
+def load_api(api_class_string, options=None):
+    """ Import the API class at the given dotted path and return an instance of
+        it, passing any `options` to its constructor as kwargs.
+    """
+    api_class = import_by_path(api_class_string)
+    return api_class(**(options or {}))
+
 
 def get_api():
     """ Get the current site's API implementation, as defined in settings.py.
@@ -45,9 +175,134 @@ def get_api():
         raise ImproperlyConfigured(
             "You must define CONTENTIOUS_API in settings.py"
         )
-    module, class_name = api_class_string.rsplit(".", 1)
-    module = import_module(module)
-    api_class = getattr(module, class_name)
-    return api_class()
+    return load_api(api_class_string)
+
+
+def get_router():
+    """ Get the API router defined by settings.CONTENTIOUS_API_ROUTER, or None
+        if there isn't one.
+    """
+    router_class_string = getattr(settings, "CONTENTIOUS_API_ROUTER", None)
+    if not router_class_string:
+        return None
+    return import_by_path(router_class_string)()
+
+
+class LazyAPI(object):
+    """ Stands in for the site's API implementation so that nothing is imported
+        (and settings are not touched) until the API is actually used.
+        If settings.CONTENTIOUS_API_ROUTER is defined then each call is passed
+        on to whichever API instance the router picks for the template context,
+        otherwise all calls go to the single instance from get_api().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """ Forget the resolved API and router, e.g. after changing settings. """
+        self._resolved = False
+        self._api = None
+        self._router = None
+
+    def _setup(self):
+        #Double-checked so that concurrent first requests only build one API
+        with self._lock:
+            if self._resolved:
+                return
+            router = get_router()
+            self._api = None if router else get_api()
+            self._router = router
+            self._resolved = True
+
+    def get_api_for_context(self, template_context=None):
+        """ Return the concrete API instance to use for the given context. """
+        if not self._resolved:
+            self._setup()
+        if self._router is not None:
+            return self._router.get_api(template_context)
+        return self._api
+
+    def get_apis(self, alias=None):
+        """ Return a list of (alias, API instance) of all of the router's
+            APIs, or just the one with the given alias, e.g. for management
+            commands which should work on every site.  Without a router there
+            is just the one API, with an alias of None.
+        """
+        if not self._resolved:
+            self._setup()
+        if self._router is None:
+            if alias is not None:
+                raise ImproperlyConfigured("APIs can only be chosen by alias with CONTENTIOUS_API_ROUTER")
+            return [(None, self._api)]
+        aliases = [alias] if alias is not None else sorted(self._router.get_aliases())
+        return [(alias, self._router.get_api_for_alias(alias)) for alias in aliases]
+
+    def in_edit_mode(self, template_context):
+        return self.get_api_for_context(template_context).in_edit_mode(template_context)
+
+    def get_content_data(self, key, template_context):
+        api = self.get_api_for_context(template_context)
+        return api.get_content_data(key, template_context)
+
+    def save_content_data(self, key, data, template_context):
+        api = self.get_api_for_context(template_context)
+        return api.save_content_data(key, data, template_context)
+
+    def pre_render(self, tag_spec, meta):
+        api = self.get_api_for_context(meta.get("context"))
+        pre_render = get_optional_method(api, "pre_render")
+        if pre_render is not None:
+            return pre_render(tag_spec, meta)
+        pre_render_batch = get_optional_method(api, "pre_render_batch")
+        if pre_render_batch is None:
+            return tag_spec
+        return pre_render_batch([(tag_spec, meta)])[0]
+
+    def pre_render_batch(self, items):
+        if not items:
+            return []
+        #All of the tags in a batch come from the same request, so route on the first
+        api = self.get_api_for_context(items[0][1].get("context"))
+        pre_render_batch = get_optional_method(api, "pre_render_batch")
+        if pre_render_batch is None:
+            return [self.pre_render(tag_spec, meta) for tag_spec, meta in items]
+        return pre_render_batch(items)
+
+    #The optional methods which take a template context are routed on it too.
+    #They raise AttributeError if the routed API doesn't have the method.
+
+    def get_content_namespace(self, template_context):
+        api = self.get_api_for_context(template_context)
+        return api.get_content_namespace(template_context)
+
+    def get_content_version(self, template_context):
+        api = self.get_api_for_context(template_context)
+        return api.get_content_version(template_context)
+
+    def prefetch_content_data(self, keys, template_context):
+        api = self.get_api_for_context(template_context)
+        return api.prefetch_content_data(keys, template_context)
+
+    def start_content_prefetch(self, template_context, namespaces):
+        api = self.get_api_for_context(template_context)
+        return api.start_content_prefetch(template_context, namespaces)
+
+    def publish_drafts(self, template_context, keys=None):
+        api = self.get_api_for_context(template_context)
+        return api.publish_drafts(template_context, keys)
+
+    def discard_drafts(self, template_context, keys=None):
+        api = self.get_api_for_context(template_context)
+        return api.discard_drafts(template_context, keys)
+
+    def __getattr__(self, name):
+        #Any other (optional) methods don't take a context, so are taken from the
+        #default API.  Use get_apis() to call them on all of the router's APIs.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.get_api_for_context(), name)
+
 
-api = get_api()
+api = LazyAPI()
@@ -0,0 +1,314 @@
+#SYSTEM
+import codecs
+import os
+import re
+import threading
+
+#LIBRARIES
+from django.conf import settings
+from django.template import (
+    Context,
+    RequestContext,
+    Template,
+    TemplateDoesNotExist,
+    TemplateSyntaxError,
+)
+from django.template.base import BLOCK_TAG_START, TOKEN_BLOCK, TextNode, Token, Variable, tag_re
+from django.template.loader import BaseLoader
+from django.utils import translation
+from django.utils._os import safe_join
+
+#CONTENTIOUS
+from contentious.api import api
+from contentious.constants import SELF_CLOSING_HTML_TAGS
+
+_state = threading.local()
+
+#Things which the template engine would treat as syntax, and the {% templatetag %}s for them
+TEMPLATE_SYNTAX_REGEX = re.compile(r'\{%|%\}|\{\{|\}\}|\{#|#\}')
+TEMPLATETAG_NAMES = {
+    '{%': 'openblock',
+    '%}': 'closeblock',
+    '{{': 'openvariable',
+    '}}': 'closevariable',
+    '{#': 'opencomment',
+    '#}': 'closecomment',
+}
+
+
+class SnapshotAPI(object):
+    """ Implementation of the ContentiousInterface which returns the content
+        from a dict of dicts and is never in edit mode.  pre_render() is passed
+        on to the site's API.
+    """
+
+    def __init__(self, content_dict, api=api):
+        self.content_dict = content_dict
+        self.api = api
+
+    def in_edit_mode(self, context):
+        return False
+
+    def get_content_data(self, key, context):
+        return self.content_dict.get(key, {})
+
+    def save_content_data(self, key, data, context):
+        raise NotImplementedError("Snapshots are read only")
+
+    def pre_render(self, tag_spec, meta):
+        try:
+            pre_render = self.api.pre_render
+        except AttributeError:
+            return tag_spec
+        return pre_render(tag_spec, meta)
+
+
+def is_literal(filter_expression):
+    """ Is the given FilterExpression a constant, i.e. can it be resolved
+        without a context?
+    """
+    if filter_expression is None:
+        return True
+    if filter_expression.filters:
+        return False
+    var = filter_expression.var
+    return not isinstance(var, Variable) or var.literal is not None
+
+
+def escape_template_syntax(html):
+    """ Make the given HTML safe to put in a template by replacing anything
+        which looks like template syntax with {% templatetag %}s.
+    """
+    return TEMPLATE_SYNTAX_REGEX.sub(
+        lambda match: "{%% templatetag %s %%}" % TEMPLATETAG_NAMES[match.group(0)], html
+    )
+
+
+def _get_block_bits(tag_string):
+    if not tag_string.startswith(BLOCK_TAG_START):
+        return None
+    return Token(TOKEN_BLOCK, tag_string[2:-2].strip()).split_contents()
+
+
+def _is_opening_editable(bits):
+    return bits and bits[0] == 'editable'
+
+
+def _is_self_closing_editable(bits):
+    return _is_opening_editable(bits) and len(bits) > 1 and bits[1] in SELF_CLOSING_HTML_TAGS
+
+
+def find_editables(source):
+    """ Find the outermost {% editable %} tags in the given template source.
+        Yields tuples of (start, end, inner_start, inner_end) of the positions
+        of the whole tag and of its contents (None for self-closing tags).
+    """
+    matches = list(tag_re.finditer(source))
+    i = 0
+    while i < len(matches):
+        bits = _get_block_bits(matches[i].group(0))
+        if not _is_opening_editable(bits):
+            i += 1
+            continue
+        start = matches[i]
+        if _is_self_closing_editable(bits):
+            yield start.start(), start.end(), None, None
+            i += 1
+            continue
+        depth = 1
+        j = i + 1
+        while j < len(matches):
+            inner_bits = _get_block_bits(matches[j].group(0))
+            if _is_opening_editable(inner_bits) and not _is_self_closing_editable(inner_bits):
+                depth += 1
+            elif inner_bits and inner_bits[0] == 'endeditable':
+                depth -= 1
+                if not depth:
+                    break
+            j += 1
+        if depth:
+            raise TemplateSyntaxError("Unclosed tag 'editable'")
+        end = matches[j]
+        yield start.start(), end.end(), start.end(), end.start()
+        i = j + 1
+
+
+def bake_editable(tag_source, snapshot_api):
+    """ Render the given {% editable %} tag source as it would be rendered
+        outside of edit mode with the content from the snapshot API.
+        Returns None if the tag can't be baked, because its arguments aren't
+        all constants or it needs its (non-constant) default contents.
+    """
+    #Imported here because the template library imports the API, which may import us
+    from contentious.templatetags.contentious import EditableTag, render_editable
+    try:
+        nodes = Template("{% load contentious %}" + tag_source).nodelist.get_nodes_by_type(EditableTag)
+    except TemplateSyntaxError:
+        return None
+    node = nodes[0]
+    if len(nodes) > 1:
+        return None
+    arguments = [node.key, node.editables, node.optionals, node.extra] + node.attrs.values()
+    if not all(is_literal(argument) for argument in arguments):
+        return None
+    context = Context()
+    key, editables, optionals, attrs, extra = node.resolve_arguments(context)
+    default_is_constant = all(isinstance(n, TextNode) for n in node.nodelist or [])
+    data = snapshot_api.get_content_data(key, context)
+    if not default_is_constant and not ('content' in data and 'content' in editables):
+        return None
+    return render_editable(
+        node.tag_name, key, editables, optionals, attrs, extra, context,
+        node.render_default_content, content_api=snapshot_api
+    )
+
+
+def bake_source(source, snapshot_api):
+    """ Replace each {% editable %} tag in the given template source which can
+        be baked with its final HTML.  Tags which can't be baked are left as
+        they are, although any editables nested inside them are still baked.
+        Returns a tuple of (baked_source, number_baked, number_left).
+    """
+    output = []
+    baked = left = 0
+    position = 0
+    for start, end, inner_start, inner_end in find_editables(source):
+        output.append(source[position:start])
+        html = bake_editable(source[start:end], snapshot_api)
+        if html is not None:
+            output.append(escape_template_syntax(html))
+            baked += 1
+        elif inner_start is None:
+            output.append(source[start:end])
+            left += 1
+        else:
+            inner, inner_baked, inner_left = bake_source(source[inner_start:inner_end], snapshot_api)
+            output.append(source[start:inner_start] + inner + source[inner_end:end])
+            baked += inner_baked
+            left += inner_left + 1
+        position = end
+    output.append(source[position:])
+    return "".join(output), baked, left
+
+
+def get_baked_templates_dir():
+    return getattr(settings, "CONTENTIOUS_BAKED_TEMPLATES_DIR", None)
+
+
+def bake_templates(template_files, language, content_dict, output_dir, remove_others=False):
+    """ Bake the given templates (a dict of names to paths) with the given
+        content into output_dir/<language>/.  Templates without any bakeable
+        editables are not written, and any old baked copy of them is removed
+        so that the loader doesn't serve it.  If `remove_others` then so is
+        every other file in the language's directory, e.g. the baked copies
+        of templates which have been deleted.  Returns a dict of the names of
+        the templates written to a tuple of (number_baked, number_left).
+    """
+    snapshot_api = SnapshotAPI(content_dict)
+    results = {}
+    for name, path in template_files.items():
+        with codecs.open(path, 'r', settings.FILE_CHARSET) as f:
+            source = f.read()
+        #Render the tags with the language active, for any pre_render hooks
+        with translation.override(language):
+            baked_source, baked, left = bake_source(source, snapshot_api)
+        output_path = safe_join(output_dir, language, name)
+        if not baked:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            continue
+        if not os.path.isdir(os.path.dirname(output_path)):
+            os.makedirs(os.path.dirname(output_path))
+        #Write to a temporary file first so that the loader never sees half a template
+        with codecs.open(output_path + ".tmp", 'w', settings.FILE_CHARSET) as f:
+            f.write(baked_source)
+        os.rename(output_path + ".tmp", output_path)
+        results[name] = (baked, left)
+    if remove_others:
+        remove_stale_baked_templates(os.path.join(output_dir, language), results)
+    return results
+
+
+def remove_stale_baked_templates(language_dir, template_names):
+    """ Remove the files in the given directory of baked templates which
+        aren't of the given template names, and any empty directories.
+    """
+    for dirpath, dirnames, filenames in os.walk(language_dir, topdown=False):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            if os.path.relpath(path, language_dir).replace(os.sep, '/') not in template_names:
+                os.remove(path)
+        if dirpath != language_dir and not os.listdir(dirpath):
+            os.rmdir(dirpath)
+
+
+def use_baked_templates():
+    return getattr(_state, 'language', None) is not None
+
+
+class BakedTemplatesMiddleware(object):
+    """ Middleware which turns on the BakedLoader for requests which aren't in
+        edit mode.  Must go after any middleware which in_edit_mode needs, and
+        after the locale middleware.
+    """
+
+    def process_request(self, request):
+        if api.in_edit_mode(RequestContext(request)):
+            _state.language = None
+        else:
+            _state.language = getattr(request, 'language', None) or translation.get_language()
+
+    def process_response(self, request, response):
+        _state.language = None
+        return response
+
+
+class BakedLoader(BaseLoader):
+    """ Template loader which loads the baked version of templates from
+        settings.CONTENTIOUS_BAKED_TEMPLATES_DIR/<language>/, when the
+        BakedTemplatesMiddleware says that we're not in edit mode.  Put it
+        first in TEMPLATE_LOADERS, but don't wrap it in the cached loader, it
+        caches the templates itself and reloads them when they're re-baked.
+    """
+    is_usable = True
+
+    def __init__(self, *args, **kwargs):
+        super(BakedLoader, self).__init__(*args, **kwargs)
+        self.template_cache = {}
+
+    def get_template_path(self, template_name):
+        baked_dir = get_baked_templates_dir()
+        if not baked_dir or not use_baked_templates():
+            return None
+        try:
+            return safe_join(baked_dir, _state.language, template_name)
+        except ValueError:
+            return None
+
+    def load_template_source(self, template_name, template_dirs=None):
+        path = self.get_template_path(template_name)
+        if path is None:
+            raise TemplateDoesNotExist(template_name)
+        try:
+            with codecs.open(path, 'r', settings.FILE_CHARSET) as f:
+                return f.read(), path
+        except IOError:
+            raise TemplateDoesNotExist(template_name)
+
+    def load_template(self, template_name, template_dirs=None):
+        path = self.get_template_path(template_name)
+        if path is None:
+            raise TemplateDoesNotExist(template_name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            raise TemplateDoesNotExist(template_name)
+        try:
+            cached_mtime, template = self.template_cache[path]
+            if cached_mtime == mtime:
+                return template, None
+        except KeyError:
+            pass
+        template, origin = super(BakedLoader, self).load_template(template_name, template_dirs)
+        self.template_cache[path] = (mtime, template)
+        return template, origin
@@ -0,0 +1,89 @@
+#SYSTEM
+import hashlib
+import re
+
+#LIBRARIES
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.template import RequestContext
+from django.utils import translation
+from django.utils.http import parse_etags, quote_etag
+from django.views.decorators.http import condition
+
+#CONTENTIOUS
+from contentious.api import api
+
+
+def get_deploy_version():
+    """ A string which should change whenever your templates change, e.g. the
+        revision of your code which is deployed.
+    """
+    return getattr(settings, "CONTENTIOUS_DEPLOY_VERSION", "")
+
+
+def content_etag(request, *args, **kwargs):
+    """ Return an ETag for the page being requested, based on the version of
+        the content, the deploy version and the active language, or None if
+        there shouldn't be one (e.g. in edit mode).
+        Only use this for pages whose output depends on nothing else!
+    """
+    return get_content_etag(RequestContext(request))
+
+
+def get_content_etag(template_context, *extra):
+    if api.in_edit_mode(template_context):
+        return None
+    try:
+        version = api.get_content_version(template_context)
+    except AttributeError:
+        return None
+    if version is None:
+        return None
+    parts = [get_deploy_version(), version, translation.get_language() or ""]
+    parts.extend(extra)
+    return hashlib.md5(u":".join(unicode(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def etag_matches(request, etag):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return etag in etags or '*' in etags
+
+
+#View decorator which returns a 304 if the page's content_etag hasn't changed
+condition_on_content = condition(etag_func=content_etag)
+
+
+class ContentETagMiddleware(object):
+    """ Middleware which answers GET requests for the paths which match any of
+        the regexes in settings.CONTENTIOUS_ETAG_PATHS with a 304 if the
+        content_etag hasn't changed, without calling the view.
+        It needs to go after any middleware which the API needs for
+        in_edit_mode/get_content_version (e.g. sessions, auth, locale).
+    """
+
+    def __init__(self):
+        self.path_regexes = [
+            re.compile(regex) for regex in getattr(settings, "CONTENTIOUS_ETAG_PATHS", [])
+        ]
+
+    def process_request(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if not any(regex.search(request.path) for regex in self.path_regexes):
+            return None
+        etag = content_etag(request)
+        request._contentious_etag = etag
+        if etag and etag_matches(request, etag):
+            response = HttpResponseNotModified()
+            response['ETag'] = quote_etag(etag)
+            return response
+        return None
+
+    def process_response(self, request, response):
+        etag = getattr(request, '_contentious_etag', None)
+        if etag and response.status_code == 200 and not response.has_header('ETag'):
+            response['ETag'] = quote_etag(etag)
+        return response
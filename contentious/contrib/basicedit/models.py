@@ -5,4 +5,8 @@ from contentious.contrib.common.models import ContentItemBase
 
 class ContentItem(ContentItemBase):
     """ Model for storing content items. """
-    pass
+
+    class Meta:
+        unique_together = (
+            ('key', 'variant', 'schedule'),
+        )
@@ -1,7 +1,8 @@
 from django.conf import settings
 
-def content_dict_cache_key():
-    prefix = getattr(settings, "CONTENT_CACHE_PREFIX", "")
+def content_dict_cache_key(prefix=None):
+    if prefix is None:
+        prefix = getattr(settings, "CONTENT_CACHE_PREFIX", "")
     return "%scontent_dict_cache" % prefix
 
 def get_cache_timeout():
@@ -1,82 +1,143 @@
+#SYSTEM
+import os
+import threading
+import time
+
 #LIBRARIES
-from django.core.cache import cache
+from django.conf import settings
+from django.utils import translation
+
+#CONTENTIOUS
+from contentious.contrib.common.api import ContentItemAPIBase
+from contentious.contrib.common.db import get_read_db
+from contentious.scope import get_render_scope
 
 #BASICTRANS
+from contentious.contrib.basictrans.catalogs import (
+    NEXT_CHANGE_HEADER,
+    compile_catalog,
+    compile_catalogs_on_save,
+    get_catalog_path,
+    messages_to_content_dict,
+    read_mo,
+)
 from contentious.contrib.basictrans.models import TranslationContent
 from contentious.contrib.basictrans.utils import (
     content_dict_cache_key,
     get_cache_timeout,
+    get_catalog_poll_interval,
 )
 
 
-class BasicTranslationAPI(object):
-    """ Implementation of the ContentiousInterface for doing simple translation. """
+class BasicTranslationAPI(ContentItemAPIBase):
+    """ Implementation of the ContentiousInterface for doing simple translation.
+        The content is namespaced by language.
+    """
 
-    def in_edit_mode(self, context):
-        """ Are we in edit mode?  At the moment we're assuming that all admin
-            users are always in edit mode.  You might want to override this method.
-        """
-        try:
-            user = context['request'].user
-            return user.is_admin
-        except (KeyError, AttributeError):
-            return False
+    model = TranslationContent
 
-    def get_content_data(self, key, template_context):
-        content_dict = self._get_content_dict_for_lang(template_context) #that's a dict of dicts
-        try:
-            return content_dict[key]
-        except KeyError:
-            return {}
-
-    def save_content_data(self, key, data, template_context):
-        language = self._get_lang(template_context)
-        obj, created = TranslationContent.objects.get_or_create(
-            key=key,
-            language=language,
-            defaults=data
+    def get_content_namespace(self, template_context):
+        return self._get_lang(template_context)
+
+    def get_content_namespaces(self):
+        """ All of the languages in settings.LANGUAGES, plus any others which
+            there is content stored for.
+        """
+        languages = set(code for code, name in settings.LANGUAGES)
+        languages.update(
+            TranslationContent.objects.using(get_read_db()).values_list('language', flat=True).distinct()
         )
-        if not created:
-            for key, value in data.items():
-                setattr(obj, key, value)
-            obj.save()
-        self._clear_caches(template_context)
+        return sorted(languages)
+
+    def compile_catalog(self, language):
+        """ Compile the language's currently published content into its gettext
+            catalog, for the GettextTranslationAPI.  Returns the number of messages.
+        """
+        content_dict, next_change = self._load_content(language)
+        if next_change is not None:
+            next_change += time.time()
+        return compile_catalog(language, content_dict, next_change)
 
     def _get_lang(self, context):
-        request = context['request']
+        scope = get_render_scope()
+        if scope is not None and scope.language is not None:
+            return scope.language
+        request = context.get('request')
+        if request is None:
+            #Rendering outside of a request, e.g. in a task
+            return translation.get_language()
         return request.language #expects the django i18n middleware to have activated it
 
-
     def _get_content_dict_for_lang(self, template_context):
-        """ An efficient way for us to fetch content data without hitting the DB
-            multiple times on the same request.  Tries to get the content by:
-            1. getting it from a temporary cache on the request object, 2. getting
-            it from memcache, 3. getting it from the database.
-            Returns a dict of dicts.
+        return self._get_content_dict(template_context)
+
+    def _get_namespace_filter(self, namespace):
+        return {'language': namespace}
+
+    def _cache_key(self, namespace):
+        return content_dict_cache_key(namespace, self.cache_prefix)
+
+    def _get_cache_timeout(self):
+        return get_cache_timeout()
+
+
+class GettextTranslationAPI(BasicTranslationAPI):
+    """ BasicTranslationAPI which reads the content from the gettext catalogs
+        compiled by the contentious_compilemessages command, rather than from
+        the cache and DB.  Each catalog is read once and then only re-read
+        when the file changes, which is checked at most every
+        CONTENTIOUS_CATALOG_POLL_INTERVAL seconds.  Languages without a
+        catalog are loaded as usual, as is the content for requests which
+        are bucketed into variants or have drafts, and for catalogs which
+        were compiled before a scheduled item started or ended (unless
+        CONTENTIOUS_COMPILE_CATALOGS_ON_SAVE, when they're recompiled).
+        Saves still go to the DB, so set CONTENTIOUS_COMPILE_CATALOGS_ON_SAVE
+        or recompile on publish.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(GettextTranslationAPI, self).__init__(*args, **kwargs)
+        self._catalogs = {} #language -> (checked_at, (mtime, size), content_dict, next_change)
+        self._catalogs_lock = threading.Lock()
+
+    def _get_content_dict(self, template_context):
+        #The catalogs only have the plain published content
+        if not (self.get_content_variants(template_context) or self.get_drafts(template_context)):
+            content_dict = self._get_catalog_content_dict(self.get_content_namespace(template_context))
+            if content_dict is not None:
+                return content_dict
+        return super(GettextTranslationAPI, self)._get_content_dict(template_context)
+
+    def _get_catalog_content_dict(self, language):
+        """ Return the content dict from the language's catalog, or None if
+            there isn't one or it's out of date.
         """
-        language = self._get_lang(template_context)
-        request = template_context['request']
-        #The first time we fetch the content on a given request we store it on the request object
+        now = time.time()
         try:
-            return request._content_cache_dict
-        except AttributeError:
-            pass
-        cache_key = content_dict_cache_key(language)
-        content_dict = cache.get(cache_key)
-        if content_dict is None:
-            content_objects = TranslationContent.objects.filter(language=language)
-            content_dict = {obj.key: obj.__dict__ for obj in content_objects}
-            cache.set(cache_key, content_dict, get_cache_timeout())
-        request._content_cache_dict = content_dict
+            checked_at, signature, content_dict, next_change = self._catalogs[language]
+        except KeyError:
+            checked_at, signature, content_dict, next_change = 0, None, None, None
+        if now - checked_at >= get_catalog_poll_interval():
+            with self._catalogs_lock:
+                path = get_catalog_path(language)
+                try:
+                    stat = os.stat(path)
+                    current_signature = (stat.st_mtime, stat.st_size)
+                except OSError:
+                    current_signature = content_dict = next_change = None
+                if current_signature is not None and current_signature != signature:
+                    messages, headers = read_mo(path, with_headers=True)
+                    content_dict = messages_to_content_dict(messages)
+                    next_change = float(headers[NEXT_CHANGE_HEADER]) if NEXT_CHANGE_HEADER in headers else None
+                self._catalogs[language] = (now, current_signature, content_dict, next_change)
+        if next_change is not None and next_change <= now:
+            #A scheduled item has started or ended since the catalog was compiled
+            if not compile_catalogs_on_save():
+                return None
+            with self._catalogs_lock:
+                #Unless another thread has just done it
+                if self._catalogs.get(language, (None,) * 4)[3] == next_change:
+                    self.compile_catalog(language)
+                    self._catalogs.pop(language)
+            return self._get_catalog_content_dict(language)
         return content_dict
-
-    def _clear_caches(self, template_context):
-        """ Clear our caches from both the request object and memcache. """
-        language = self._get_lang(template_context)
-        request = template_context['request']
-        try:
-            del request._content_cache_dict
-        except AttributeError:
-            pass
-        cache.delete(content_dict_cache_key(language))
-
@@ -0,0 +1,189 @@
+#SYSTEM
+import os
+import struct
+import tempfile
+
+#LIBRARIES
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.dispatch import receiver
+from django.utils import translation
+from django.utils._os import safe_join
+
+#CONTENTIOUS
+from contentious.signals import content_bulk_saved, content_saved
+
+#The translations are compiled into gettext catalogs in
+#settings.CONTENTIOUS_LOCALE_DIR/<locale>/LC_MESSAGES/contentious.po/.mo.  Each
+#field of each item is a message, with the key as the msgid and the field name
+#as the msgctxt.
+DOMAIN = "contentious"
+MO_MAGIC = 0x950412de
+#Separates the msgctxt from the msgid in .mo files
+CONTEXT_SEPARATOR = "\x04"
+DISPLAY_CONTEXT = "display"
+#Header of the timestamp when the next scheduled item starts or ends, after
+#which the catalog is out of date
+NEXT_CHANGE_HEADER = "X-Contentious-Next-Change"
+
+
+def get_locale_dir():
+    locale_dir = getattr(settings, "CONTENTIOUS_LOCALE_DIR", None)
+    if not locale_dir:
+        raise ImproperlyConfigured("You must define CONTENTIOUS_LOCALE_DIR in settings.py")
+    return locale_dir
+
+
+def get_catalog_path(language, extension='.mo'):
+    return safe_join(
+        get_locale_dir(), translation.to_locale(language), "LC_MESSAGES", DOMAIN + extension
+    )
+
+
+def compile_catalogs_on_save():
+    return getattr(settings, "CONTENTIOUS_COMPILE_CATALOGS_ON_SAVE", False)
+
+
+def make_messages(content_dict):
+    """ Return a sorted list of (msgctxt, msgid, msgstr) for the given dict of
+        dicts of content.  Only non-empty strings are included, plus a
+        'display' message of "0" for items which are switched off.
+    """
+    messages = []
+    for key, data in content_dict.items():
+        for field, value in data.items():
+            if field == 'display':
+                if value is False:
+                    messages.append((DISPLAY_CONTEXT, key, u"0"))
+            elif isinstance(value, basestring) and value:
+                messages.append((field, key, value))
+    return sorted(messages)
+
+
+def messages_to_content_dict(messages):
+    content_dict = {}
+    for context, key, value in messages:
+        if context == DISPLAY_CONTEXT:
+            content_dict.setdefault(key, {})['display'] = value != u"0"
+        else:
+            content_dict.setdefault(key, {})[context] = value
+    return content_dict
+
+
+def _po_string(value):
+    value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\t', '\\t')
+    return u'"%s"' % value
+
+
+def _make_header(headers):
+    """ Return the msgstr of the header entry, with the given list of
+        (name, value) headers after the Content-Type.
+    """
+    headers = [("Content-Type", "text/plain; charset=UTF-8")] + list(headers)
+    return u"".join(u"%s: %s\n" % header for header in headers)
+
+
+def write_po(path, language, messages, headers=()):
+    """ Write a .po file, for people and tools which want to read them. """
+    header = _make_header([("Language", language)] + list(headers))
+    lines = [u'msgid ""', u'msgstr ""'] + [_po_string(line) for line in header.splitlines(True)] + [u'']
+    for context, msgid, msgstr in messages:
+        lines += [
+            u'msgctxt %s' % _po_string(context),
+            u'msgid %s' % _po_string(msgid),
+            u'msgstr %s' % _po_string(msgstr),
+            u'',
+        ]
+    _write_atomically(path, u"\n".join(lines).encode('utf-8'))
+
+
+def write_mo(path, messages, headers=()):
+    """ Write a GNU .mo file of the messages, which is what gets read back.
+        `headers` is a list of (name, value) to add to the header entry.
+    """
+    catalog = {"": _make_header(headers)}
+    for context, msgid, msgstr in messages:
+        catalog[context + CONTEXT_SEPARATOR + msgid] = msgstr
+    #The msgids must be sorted, so that gettext can binary search them
+    items = sorted((k.encode('utf-8'), v.encode('utf-8')) for k, v in catalog.items())
+    ids = strs = b""
+    offsets = []
+    for msgid, msgstr in items:
+        offsets.append((len(ids), len(msgid), len(strs), len(msgstr)))
+        ids += msgid + b"\0"
+        strs += msgstr + b"\0"
+    count = len(items)
+    ids_start = 7 * 4 + 16 * count
+    strs_start = ids_start + len(ids)
+    table = []
+    for id_offset, id_length, str_offset, str_length in offsets:
+        table += [id_length, ids_start + id_offset]
+    for id_offset, id_length, str_offset, str_length in offsets:
+        table += [str_length, strs_start + str_offset]
+    header = struct.pack("<7I", MO_MAGIC, 0, count, 7 * 4, 7 * 4 + count * 8, 0, 0)
+    _write_atomically(path, header + struct.pack("<%dI" % len(table), *table) + ids + strs)
+
+
+def read_mo(path, with_headers=False):
+    """ Read a .mo file written by write_mo and return its list of
+        (msgctxt, msgid, msgstr), or if `with_headers` a tuple of that and a
+        dict of the header entry's headers.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    byte_order = "<" if struct.unpack("<I", data[:4])[0] == MO_MAGIC else ">"
+    magic, version, count, ids_table, strs_table = struct.unpack(byte_order + "5I", data[:20])
+    if magic != MO_MAGIC:
+        raise ValueError("%s is not a .mo file" % path)
+    messages = []
+    headers = {}
+    for i in range(count):
+        id_length, id_offset = struct.unpack(byte_order + "2I", data[ids_table + i * 8:ids_table + i * 8 + 8])
+        str_length, str_offset = struct.unpack(byte_order + "2I", data[strs_table + i * 8:strs_table + i * 8 + 8])
+        msgid = data[id_offset:id_offset + id_length].decode('utf-8')
+        msgstr = data[str_offset:str_offset + str_length].decode('utf-8')
+        if not msgid:
+            headers = dict(line.split(u": ", 1) for line in msgstr.splitlines() if u": " in line)
+        if CONTEXT_SEPARATOR not in msgid:
+            continue #the header, or a message without a context which isn't one of ours
+        context, msgid = msgid.split(CONTEXT_SEPARATOR, 1)
+        messages.append((context, msgid, msgstr))
+    if with_headers:
+        return messages, headers
+    return messages
+
+
+def _write_atomically(path, data):
+    if not os.path.isdir(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
+
+
+def compile_catalog(language, content_dict, next_change=None):
+    """ Write the .po and .mo files for the given language and dict of dicts
+        of content.  `next_change` is the timestamp when the next scheduled
+        item starts or ends, if there is one.  Returns the number of messages.
+    """
+    messages = make_messages(content_dict)
+    headers = [] if next_change is None else [(NEXT_CHANGE_HEADER, "%f" % next_change)]
+    write_po(get_catalog_path(language, '.po'), language, messages, headers)
+    #The .mo is written last, as it's the one which is read
+    write_mo(get_catalog_path(language, '.mo'), messages, headers)
+    return len(messages)
+
+
+@receiver(content_saved)
+@receiver(content_bulk_saved)
+def compile_catalog_on_save(sender, namespace, **kwargs):
+    #Imported here because the API imports us
+    from contentious.contrib.basictrans.api import BasicTranslationAPI
+    if compile_catalogs_on_save() and issubclass(sender, BasicTranslationAPI):
+        sender().compile_catalog(namespace)
@@ -0,0 +1,140 @@
+#LIBRARIES
+from django.conf import settings
+from django.db import connections
+
+#CONTENTIOUS
+from contentious.contrib.common.db import get_read_db
+
+#BASICTRANS
+from contentious.contrib.basictrans.models import TranslationContent
+
+#How the translation of a key compares to its source
+MISSING = "missing"
+STALE = "stale" #saved before the source was last changed
+IDENTICAL = "identical" #the same content as the source, i.e. probably not translated
+STATUSES = (MISSING, STALE, IDENTICAL)
+#Keys per query when limiting to a list of keys, to stay under the DB's limit
+#on query parameters
+KEY_BATCH_SIZE = 500
+FETCH_SIZE = 1000
+
+#Only the plain, unscheduled items are compared, as those are what the
+#translators work on
+PLAIN_ITEM_SQL = "%(alias)s.variant = '' AND %(alias)s.publish_from IS NULL"
+
+
+def get_source_language():
+    return getattr(settings, "CONTENTIOUS_SOURCE_LANGUAGE", settings.LANGUAGE_CODE)
+
+
+def _batches(keys):
+    if keys is None:
+        yield None
+        return
+    keys = sorted(keys)
+    for start in range(0, len(keys), KEY_BATCH_SIZE):
+        yield keys[start:start + KEY_BATCH_SIZE]
+
+
+def _query(sql, params):
+    cursor = connections[get_read_db()].cursor()
+    cursor.execute(sql, params)
+    return cursor
+
+
+def _sql(template, keys):
+    """ Fill in the table and column names (quoted for the DB) in the given
+        SQL, plus the restriction to the given keys.
+    """
+    quote = connections[get_read_db()].ops.quote_name
+    names = {
+        'table': quote(TranslationContent._meta.db_table),
+        'key': quote('key'),
+        's_plain': PLAIN_ITEM_SQL % {'alias': 's'},
+        't_plain': PLAIN_ITEM_SQL % {'alias': 't'},
+        'keys': "",
+    }
+    if keys:
+        names['keys'] = "AND s.%s IN (%s)" % (names['key'], ", ".join(["%s"] * len(keys)))
+    return template % names
+
+
+def get_coverage(languages=None, source_language=None, keys=None):
+    """ Return a dict of language -> dict of the number of keys of the source
+        language which are 'translated', and how many of those are 'missing',
+        'stale' and 'identical', plus the 'total' number of source keys.
+        Defaults to all of settings.LANGUAGES.  If `keys` is given (e.g. from
+        the key manifest) then only those keys are counted.  The counting is
+        done by the DB.
+    """
+    source_language = source_language or get_source_language()
+    if languages is None:
+        languages = [code for code, name in settings.LANGUAGES]
+    languages = [language for language in languages if language != source_language]
+    coverage = {
+        language: dict({status: 0 for status in STATUSES}, total=0, translated=0)
+        for language in languages
+    }
+    template = (
+        "SELECT t.language, COUNT(*), "
+        "SUM(CASE WHEN t.modified < s.modified THEN 1 ELSE 0 END), "
+        "SUM(CASE WHEN t.content = s.content AND s.content <> '' THEN 1 ELSE 0 END) "
+        "FROM %(table)s s JOIN %(table)s t ON t.%(key)s = s.%(key)s AND %(t_plain)s "
+        "AND t.language <> s.language "
+        "WHERE s.language = %%s AND %(s_plain)s %(keys)s GROUP BY t.language"
+    )
+    total_template = "SELECT COUNT(*) FROM %(table)s s WHERE s.language = %%s AND %(s_plain)s %(keys)s"
+    total = 0
+    for batch in _batches(keys):
+        params = [source_language] + (batch or [])
+        total += _query(_sql(total_template, batch), params).fetchone()[0]
+        for language, translated, stale, identical in _query(_sql(template, batch), params).fetchall():
+            if language in coverage:
+                counts = coverage[language]
+                counts['translated'] += translated
+                counts[STALE] += stale or 0
+                counts[IDENTICAL] += identical or 0
+    for counts in coverage.values():
+        counts['total'] = total
+        counts[MISSING] = total - counts['translated']
+    return coverage
+
+
+def iter_coverage_keys(languages=None, source_language=None, keys=None, statuses=STATUSES):
+    """ Generate (language, key, status) for each key of the source language
+        which is missing, stale or identical (or just the given statuses) in
+        each of the languages, in order of language then key.  The rows are
+        streamed from the DB rather than loaded all at once.  If `keys` is
+        given then only those keys are included.  A key which is both stale
+        and identical is listed as stale.
+    """
+    source_language = source_language or get_source_language()
+    if languages is None:
+        languages = [code for code, name in settings.LANGUAGES]
+    template = (
+        "SELECT s.%(key)s, t.id, t.modified < s.modified, t.content = s.content AND s.content <> '' "
+        "FROM %(table)s s LEFT JOIN %(table)s t ON t.%(key)s = s.%(key)s AND t.language = %%s "
+        "AND %(t_plain)s WHERE s.language = %%s AND %(s_plain)s ORDER BY s.%(key)s"
+    )
+    keys = set(keys) if keys is not None else None
+    for language in sorted(languages):
+        if language == source_language:
+            continue
+        cursor = _query(_sql(template, None), [language, source_language])
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            for key, translation_id, stale, identical in rows:
+                if keys is not None and key not in keys:
+                    continue
+                if translation_id is None:
+                    status = MISSING
+                elif stale:
+                    status = STALE
+                elif identical:
+                    status = IDENTICAL
+                else:
+                    continue
+                if status in statuses:
+                    yield language, key, status
@@ -9,7 +9,7 @@ class TranslationContent(ContentItemBase):
     class Meta:
         app_label = "contentious"
         unique_together = (
-            ('language', 'key'),
+            ('language', 'key', 'variant', 'schedule'),
         )
 
     language = models.CharField(max_length=7)
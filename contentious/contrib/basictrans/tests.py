@@ -1,13 +1,25 @@
 # -*- coding: utf-8 -*-
 
+#SYSTEM
+from datetime import timedelta
+import shutil
+import tempfile
+import time
+
 #LIBRARIES
 from django.core.cache import cache
 from django.http import HttpRequest
-from django.template import RequestContext
+from django.template import Context, RequestContext
 from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone
 
 #CONTENTIOUS
-from .api import BasicTranslationAPI
+from .api import BasicTranslationAPI, GettextTranslationAPI
+from .catalogs import compile_catalog, make_messages, read_mo, get_catalog_path
+from .coverage import get_coverage, iter_coverage_keys
+from .models import TranslationContent
+from .utils import content_dict_cache_key
 
 
 class APITest(TestCase):
@@ -63,7 +75,114 @@ class APITest(TestCase):
         self.assertIsSubDict(data_en, result_en)
         self.assertIsSubDict(data_es, result_es)
 
+    def test_warm_cache(self):
+        """ Test that warm_cache() puts the content for the language into the cache. """
+        api = BasicTranslationAPI()
+        request = HttpRequest()
+        request.language = "fr-FR"
+        context = RequestContext(request)
+        data = {'content': u'fromage'}
+        api.save_content_data('some_key', data, context)
+        self.assertIsNone(cache.get(content_dict_cache_key("fr-FR")))
+        result = api.warm_cache("fr-FR")
+        self.assertIsSubDict(data, result['some_key'])
+        self.assertEqual(cache.get(content_dict_cache_key("fr-FR")), result)
+        self.assertTrue("fr-FR" in api.get_content_namespaces())
+
     def assertIsSubDict(self, subdict, superdict):
         for k, v in subdict.items():
             self.assertTrue(k in superdict)
             self.assertEqual(superdict[k], v)
+
+
+class CatalogTest(TestCase):
+    """ Tests for compiling the translations into gettext catalogs and reading them. """
+
+    def setUp(self):
+        self.locale_dir = tempfile.mkdtemp()
+        self.settings = override_settings(
+            CONTENTIOUS_LOCALE_DIR=self.locale_dir, CONTENTIOUS_CATALOG_POLL_INTERVAL=0
+        )
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.locale_dir)
+
+    def test_compile_and_read(self):
+        content_dict = {
+            'greeting': {'content': u'¡Hola "mundo"!\n', 'href': u'', 'display': True},
+            'hidden': {'content': u'Oculto', 'display': False},
+        }
+        self.assertEqual(compile_catalog('es', content_dict), 3)
+        self.assertEqual(read_mo(get_catalog_path('es')), make_messages(content_dict))
+        request = HttpRequest()
+        request.language = 'es'
+        context = Context({'request': request})
+        api = GettextTranslationAPI()
+        self.assertEqual(api.get_content_data('greeting', context), {'content': u'¡Hola "mundo"!\n'})
+        self.assertEqual(api.get_content_data('hidden', context), {'content': u'Oculto', 'display': False})
+        #Recompiled catalogs are picked up
+        compile_catalog('es', {'greeting': {'content': u'Hola'}})
+        self.assertEqual(api.get_content_data('greeting', context), {'content': u'Hola'})
+        #Languages without a catalog come from the DB as usual
+        request = HttpRequest()
+        request.language = 'fr'
+        context = Context({'request': request})
+        api.save_content_data('greeting', {'content': u'Bonjour'}, context)
+        self.assertEqual(api.get_content_data('greeting', context)['content'], u'Bonjour')
+
+    def _make_context(self, language):
+        request = HttpRequest()
+        request.language = language
+        request.session = {}
+        return Context({'request': request})
+
+    def test_catalog_fallbacks(self):
+        """ The content should come from the DB when the catalog doesn't have
+            what the request should see.
+        """
+        api = GettextTranslationAPI()
+        api.save_content_data('greeting', {'content': u'Hola'}, self._make_context('es'))
+        self.assertEqual(api.compile_catalog('es'), 1)
+        #Editors see their drafts
+        with override_settings(CONTENTIOUS_DRAFTS=True):
+            context = self._make_context('es')
+            api.save_content_data('greeting', {'content': u'Borrador'}, context)
+            self.assertEqual(api.get_content_data('greeting', context)['content'], u'Borrador')
+        self.assertEqual(api.get_content_data('greeting', self._make_context('es'))['content'], u'Hola')
+        #A scheduled item has gone live since the catalog was compiled
+        compile_catalog('es', {'greeting': {'content': u'Viejo'}}, next_change=time.time() - 1)
+        self.assertEqual(api.get_content_data('greeting', self._make_context('es'))['content'], u'Hola')
+        with override_settings(CONTENTIOUS_COMPILE_CATALOGS_ON_SAVE=True):
+            self.assertEqual(api.get_content_data('greeting', self._make_context('es'))['content'], u'Hola')
+        self.assertEqual(read_mo(get_catalog_path('es'), with_headers=True), (
+            [('content', 'greeting', u'Hola')], {'Content-Type': 'text/plain; charset=UTF-8'}
+        ))
+
+
+class CoverageTest(TestCase):
+    """ Tests for the translation coverage queries. """
+
+    def test_coverage(self):
+        api = BasicTranslationAPI()
+        for language, key, content in [
+            ('en', 'same', u'OK'), ('en', 'changed', u'Hello'), ('en', 'new', u'New'),
+            ('fr', 'same', u'OK'), ('fr', 'changed', u'Bonjour'), ('fr', 'extra', u'Extra'),
+        ]:
+            request = HttpRequest()
+            request.language = language
+            api.save_content_data(key, {'content': content}, Context({'request': request}))
+        #The source changed after it was translated
+        TranslationContent.objects.filter(language='fr').update(modified=timezone.now() - timedelta(days=1))
+        expected = {'total': 3, 'translated': 2, 'missing': 1, 'stale': 2, 'identical': 1}
+        self.assertEqual(get_coverage(['en', 'fr', 'de'], 'en'), {
+            'fr': expected,
+            'de': {'total': 3, 'translated': 0, 'missing': 3, 'stale': 0, 'identical': 0},
+        })
+        self.assertEqual(list(iter_coverage_keys(['fr'], 'en')), [
+            ('fr', 'changed', 'stale'), ('fr', 'new', 'missing'), ('fr', 'same', 'stale'),
+        ])
+        #Limited to some keys
+        self.assertEqual(get_coverage(['fr'], 'en', keys=['new', 'nope'])['fr']['missing'], 1)
+        self.assertEqual(list(iter_coverage_keys(['fr'], 'en', keys=['same'], statuses=['missing'])), [])
@@ -1,8 +1,12 @@
 from django.conf import settings
 
-def content_dict_cache_key(language):
-    prefix = getattr(settings, "CONTENT_CACHE_PREFIX", "")
+def content_dict_cache_key(language, prefix=None):
+    if prefix is None:
+        prefix = getattr(settings, "CONTENT_CACHE_PREFIX", "")
     return "%scontent_dict_cache_%s" % (prefix, language)
 
 def get_cache_timeout():
     return getattr(settings, "CONTENT_CACHE_TIMEOUT", None)
+
+def get_catalog_poll_interval():
+    return getattr(settings, "CONTENTIOUS_CATALOG_POLL_INTERVAL", 2)
@@ -0,0 +1,693 @@
+#SYSTEM
+import json
+import math
+import re
+import time
+import uuid
+
+#LIBRARIES
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, connections
+from django.db.models import Q
+from django.utils import timezone
+
+#CONTENTIOUS
+from contentious.contrib.common.db import (
+    atomic,
+    get_read_db,
+    get_read_your_writes_seconds,
+    get_write_db,
+    is_pinned_to_write_db,
+    pin_to_write_db,
+)
+from contentious.contrib.common.models import get_large_content_length, use_sparse_attributes
+from contentious.prefetch import run_in_background
+from contentious.scope import get_render_scope
+from contentious.signals import (
+    content_bulk_saved,
+    content_deleted,
+    content_loaded,
+    content_saved,
+)
+from contentious.variants import (
+    get_request_variants,
+    variants_cache_key_suffix,
+)
+
+DRAFTS_SESSION_KEY = "contentious_drafts"
+#Fields of a draft which say where it's published rather than what's shown
+DRAFT_IGNORED_FIELDS = ('variant', 'publish_from')
+#In the cached dicts, items whose content is too large to be included have
+#this instead, with a token for fetching the content separately
+LARGE_CONTENT_TOKEN = '_large_content'
+
+
+class ContentItemAPIBase(object):
+    """ Base class for implementations of the ContentiousInterface which store
+        their content in a subclass of ContentItemBase and cache a dict of all
+        of the content for each 'namespace' (e.g. language).
+        Content is loaded from get_read_db() and saved to get_write_db().
+        Items saved with a `variant` (see contentious.variants) replace the
+        plain item for requests which are bucketed into that variant, and
+        a merged dict is cached for each combination of variants.
+        Items with a publish_from/publish_until are only loaded during that
+        window, and the cache expires when the next one starts or ends.
+        Inside a RenderScope the content is kept in the scope rather than on
+        the request, and no request is needed.
+        With settings.CONTENTIOUS_LARGE_CONTENT_LENGTH, content which is
+        longer than that is left out of the cached dicts, and each large body
+        is cached and fetched on its own when a page uses it.
+        With settings.CONTENTIOUS_DRAFTS, editors' saves are kept in their
+        session and shown only to them until they publish them, so that the
+        shared cache is only cleared when the content really changes.
+
+        Subclasses must set `model` and implement `get_content_namespace`,
+        `get_content_namespaces`, `_get_namespace_filter` and `_cache_key`.
+    """
+
+    model = None
+
+    def __init__(self, cache_prefix=None):
+        """ `cache_prefix` overrides settings.CONTENT_CACHE_PREFIX, so that each
+            instance (e.g. one per site) can have its own cache keys.
+        """
+        self.cache_prefix = cache_prefix
+
+    def in_edit_mode(self, context):
+        """ Are we in edit mode?  At the moment we're assuming that all admin
+            users are always in edit mode.  You might want to override this method.
+        """
+        scope = get_render_scope()
+        if scope is not None:
+            return scope.edit_mode
+        try:
+            user = context['request'].user
+            return user.is_admin
+        except (KeyError, AttributeError):
+            return False
+
+    def get_content_data(self, key, template_context):
+        content_dict = self._get_content_dict(template_context) #that's a dict of dicts
+        try:
+            data = content_dict[key]
+        except KeyError:
+            return {}
+        if LARGE_CONTENT_TOKEN in data:
+            data = dict(data)
+            token = data.pop(LARGE_CONTENT_TOKEN)
+            data['content'] = self._get_large_contents(template_context, [token]).get(token, '')
+        return data
+
+    def prefetch_content_data(self, keys, template_context):
+        """ Fetch the large bodies of content (if any) for the given keys in one go. """
+        content_dict = self._get_content_dict(template_context)
+        tokens = [content_dict.get(key, {}).get(LARGE_CONTENT_TOKEN) for key in keys]
+        self._get_large_contents(template_context, [token for token in tokens if token])
+
+    def save_content_data(self, key, data, template_context):
+        namespace = self.get_content_namespace(template_context)
+        session = self._get_draft_session(template_context)
+        if session is not None:
+            drafts = session.get(DRAFTS_SESSION_KEY, {})
+            drafts.setdefault(self._cache_key(namespace), {})[key] = dict(data)
+            session[DRAFTS_SESSION_KEY] = drafts
+            #Only this request's copy (with the drafts merged in) is out of date
+            template_context['request'].__dict__.pop('_content_cache_dict', None)
+            return
+        obj = self._store_content_data(key, data, namespace)
+        self._clear_caches(template_context)
+        self._bump_content_version(namespace)
+        self._refill_after_write(namespace)
+        pin_to_write_db(template_context)
+        content_saved.send(sender=self.__class__, key=obj.key, data=data, namespace=namespace)
+
+    def get_drafts(self, template_context):
+        """ Return a dict of the keys and data of the editor's unpublished
+            saves for the template context's namespace.
+        """
+        session = self._get_draft_session(template_context)
+        if session is None:
+            return {}
+        namespace = self.get_content_namespace(template_context)
+        return session.get(DRAFTS_SESSION_KEY, {}).get(self._cache_key(namespace), {})
+
+    def publish_drafts(self, template_context, keys=None):
+        """ Save the editor's drafts (or just those for the given keys) of the
+            template context's namespace, clearing the caches once.  Returns
+            the list of keys which were published.
+        """
+        return self._pop_drafts(template_context, keys, publish=True)
+
+    def discard_drafts(self, template_context, keys=None):
+        """ Throw away the editor's drafts (or just those for the given keys)
+            of the template context's namespace.  Returns the list of keys.
+        """
+        return self._pop_drafts(template_context, keys, publish=False)
+
+    def _pop_drafts(self, template_context, keys, publish):
+        session = self._get_draft_session(template_context)
+        if session is None:
+            return []
+        namespace = self.get_content_namespace(template_context)
+        drafts = session.get(DRAFTS_SESSION_KEY, {})
+        namespace_drafts = drafts.get(self._cache_key(namespace), {})
+        popped = [
+            (key, namespace_drafts.pop(key)) for key in sorted(namespace_drafts)
+            if keys is None or key in keys
+        ]
+        if not namespace_drafts:
+            drafts.pop(self._cache_key(namespace), None)
+        session[DRAFTS_SESSION_KEY] = drafts
+        template_context['request'].__dict__.pop('_content_cache_dict', None)
+        if publish and popped:
+            saved = [(self._store_content_data(key, data, namespace), data) for key, data in popped]
+            self._clear_caches(template_context)
+            self._bump_content_version(namespace)
+            self._refill_after_write(namespace)
+            pin_to_write_db(template_context)
+            for obj, data in saved:
+                content_saved.send(sender=self.__class__, key=obj.key, data=data, namespace=namespace)
+        return [key for key, data in popped]
+
+    def _get_draft_session(self, template_context):
+        """ Return the session which drafts are kept in, or None if drafts
+            aren't being used.
+        """
+        if not getattr(settings, "CONTENTIOUS_DRAFTS", False) or get_render_scope() is not None:
+            return None
+        try:
+            return template_context['request'].session
+        except (KeyError, AttributeError):
+            return None
+
+    def _store_content_data(self, key, data, namespace):
+        """ Save the data for the key to the DB, and return the model instance.
+            Data without a publish_from updates the item which is currently
+            published, which may be a scheduled one which has gone live.
+        """
+        data = dict(data)
+        variant = data.pop('variant', '')
+        publish_from = data.pop('publish_from', None) or None
+        lookup = dict(self._get_namespace_filter(namespace), key=key)
+        try:
+            return self._save_item(variant, lookup, publish_from, data)
+        except IntegrityError:
+            #Another request created the same item at the same time, so update theirs
+            return self._save_item(variant, lookup, publish_from, data)
+
+    def _save_item(self, variant, lookup, publish_from, data):
+        with atomic(using=get_write_db()):
+            obj = self._get_item(variant, lookup, publish_from)
+            if obj is None:
+                #Scheduled items live alongside the current one until they replace it
+                obj = self.model(variant=variant, publish_from=publish_from, **lookup)
+                if variant:
+                    #A new variant starts off as a copy of the plain item
+                    obj.set_content_data(self._get_plain_item_fields(lookup, publish_from))
+            obj.set_content_data(data)
+            obj.save(using=get_write_db())
+        return obj
+
+    def get_stored_keys(self):
+        return self.model.objects.using(get_read_db()).values_list('key', flat=True).distinct()
+
+    def delete_content(self, keys):
+        keys = list(keys)
+        namespaces = self.get_content_namespaces()
+        #Delete in batches to stay under the DB's limit on query parameters
+        for i in range(0, len(keys), 500):
+            self.model.objects.using(get_write_db()).filter(key__in=keys[i:i + 500]).delete()
+        cache.delete_many([self._cache_key(namespace) for namespace in namespaces])
+        for namespace in namespaces:
+            self._bump_content_version(namespace)
+            self._refill_after_write(namespace)
+        content_deleted.send(sender=self.__class__, keys=keys)
+
+    def replace_content(self, find, replacement, fields=None, namespaces=None, key_prefix=None,
+                        regex=False, dry_run=False):
+        """ Replace `find` with `replacement` in the given fields (defaults to
+            all of the content fields) of the stored content, optionally only
+            in the given namespaces and for keys starting with `key_prefix`.
+            If `regex` is True then `find` is a regular expression and the
+            replacement can refer to its groups.  All of the changes are made
+            in one transaction and the caches are cleared once at the end, then
+            content_bulk_saved is sent for each namespace.
+            Returns a list of dicts of the namespace, key, variant, field and
+            old and new value of each change, which are only made if not `dry_run`.
+        """
+        pattern = re.compile(find) if regex else None
+        if namespaces is None:
+            namespaces = self.get_content_namespaces()
+        changes = []
+        with atomic(using=get_write_db()):
+            for namespace in namespaces:
+                queryset = self.model.objects.using(get_write_db()).filter(
+                    **self._get_namespace_filter(namespace)
+                )
+                if key_prefix:
+                    queryset = queryset.filter(key__startswith=key_prefix)
+                for field in fields or self.model.content_fields:
+                    field_changes = self._replace_in_field(queryset, field, find, replacement, pattern, dry_run)
+                    for change in field_changes:
+                        change['namespace'] = namespace
+                    changes += field_changes
+        if changes and not dry_run:
+            changed_namespaces = set(change['namespace'] for change in changes)
+            cache.delete_many([self._cache_key(namespace) for namespace in changed_namespaces])
+            for namespace in changed_namespaces:
+                self._bump_content_version(namespace)
+                self._refill_after_write(namespace)
+            #One signal per namespace, so that e.g. catalogs are only recompiled once
+            items_by_namespace = {}
+            for change in changes:
+                items = items_by_namespace.setdefault(change['namespace'], {})
+                items.setdefault(change['key'], {})[change['field']] = change['new']
+            for namespace, items in items_by_namespace.items():
+                content_bulk_saved.send(sender=self.__class__, items=items, namespace=namespace)
+        return changes
+
+    def _replace_in_field(self, queryset, field, find, replacement, pattern, dry_run):
+        """ Do the replacing for replace_content in one field.  Literal
+            replacements are done with a REPLACE in the DB, in batches.
+        """
+        #With sparse attributes, everything but the content is in the JSON
+        in_attributes = use_sparse_attributes() and field != 'content'
+        column = 'attributes' if in_attributes else field
+        if pattern is None:
+            #Narrow it down in the DB.  The DB may match case-insensitively, so
+            #the real matches are found below.
+            queryset = queryset.filter(**{
+                column + '__contains': json.dumps(find)[1:-1] if in_attributes else find
+            })
+        changes = []
+        updates = []
+        for pk, key, variant, value in queryset.values_list('pk', 'key', 'variant', column).iterator():
+            if in_attributes:
+                attributes = json.loads(value) if value else {}
+                old = attributes.get(field, '')
+            else:
+                old = value
+            new = pattern.sub(replacement, old) if pattern else old.replace(find, replacement)
+            if new == old:
+                continue
+            changes.append({'key': key, 'variant': variant, 'field': field, 'old': old, 'new': new})
+            if in_attributes:
+                if new:
+                    attributes[field] = new
+                else:
+                    attributes.pop(field, None)
+                new = json.dumps(attributes, sort_keys=True) if attributes else ''
+            updates.append((pk, new))
+        if dry_run or not updates:
+            return changes
+        now = timezone.now()
+        if pattern is None and not in_attributes:
+            connection = connections[get_write_db()]
+            quote = connection.ops.quote_name
+            column_name = quote(self.model._meta.get_field(field).column)
+            pks = [pk for pk, new in updates]
+            #Update in batches to stay under the DB's limit on query parameters
+            for i in range(0, len(pks), 500):
+                batch = pks[i:i + 500]
+                connection.cursor().execute(
+                    "UPDATE %s SET %s = REPLACE(%s, %%s, %%s), %s = %%s WHERE %s IN (%s)" % (
+                        quote(self.model._meta.db_table), column_name, column_name, quote('modified'),
+                        quote(self.model._meta.pk.column), ", ".join(["%s"] * len(batch))
+                    ),
+                    [find, replacement, connection.ops.value_to_db_datetime(now)] + batch
+                )
+        else:
+            #Regular expressions can't be done portably in the DB
+            for pk, new in updates:
+                queryset.model.objects.using(get_write_db()).filter(pk=pk).update(**{column: new, 'modified': now})
+        return changes
+
+    def get_content_version(self, template_context):
+        """ Return a string which changes whenever the content for the given
+            template context's namespace changes.
+        """
+        return self._get_namespace_version(self.get_content_namespace(template_context))
+
+    def get_content_variants(self, template_context):
+        """ Return a sorted tuple of the variants which the template context's
+            request is bucketed into.
+        """
+        try:
+            request = template_context['request']
+        except KeyError:
+            return ()
+        return get_request_variants(request)
+
+    def _get_namespace_version(self, namespace):
+        version_key = self._version_cache_key(namespace)
+        schedule_key = self._schedule_cache_key(namespace)
+        values = cache.get_many([version_key, schedule_key])
+        version = values.get(version_key)
+        next_change = values.get(schedule_key)
+        if next_change is not None and next_change <= time.time():
+            #Scheduled content has gone live (or been taken down) since the version was set
+            cache.delete(schedule_key)
+            return self._bump_content_version(namespace)
+        if version is None:
+            #Use add() so that concurrent requests agree on the new version
+            version = uuid.uuid4().hex
+            if not cache.add(version_key, version):
+                version = cache.get(version_key) or version
+        return version
+
+    def get_content_namespace(self, template_context):
+        """ Return the namespace (e.g. language) of the content for the given
+            template context.
+        """
+        raise NotImplementedError()
+
+    def get_content_namespaces(self):
+        """ Return a list of all of the namespaces which content may be stored in. """
+        raise NotImplementedError()
+
+    def load_content_dict(self, namespace, using=None, variants=()):
+        """ Load the dict of dicts of the currently published content for the
+            given namespace from the DB, by default from get_read_db(), with
+            the items for the given variants in place of the plain ones.
+        """
+        return self._load_content(namespace, using, variants)[0]
+
+    def warm_cache(self, namespace, using=None, variants=(), replace=True):
+        """ (Re)load the content for the given namespace (and combination of
+            variants) from the DB into the cache and return it.  If not
+            `replace` then content which is already in the cache is left there.
+        """
+        content_dict, next_change = self._load_content(namespace, using, variants, defer_large=True)
+        timeout = self._get_cache_timeout()
+        if next_change is not None:
+            #Expire when the next scheduled item starts or ends, so that it happens on time
+            seconds = max(1, int(math.ceil(next_change)))
+            timeout = seconds if timeout is None else min(timeout, seconds)
+            self._record_scheduled_change(namespace, time.time() + next_change)
+        if replace:
+            cache.set(self._content_cache_key(namespace, variants), content_dict, timeout)
+        else:
+            cache.add(self._content_cache_key(namespace, variants), content_dict, timeout)
+        return content_dict
+
+    def start_content_prefetch(self, template_context, namespaces=None):
+        """ Start loading the content for the given namespaces in the background,
+            so that _get_content_dict only has to wait for it.  None in the list
+            (or no list) means the template context's namespace.
+        """
+        request = template_context['request']
+        prefetched = request.__dict__.setdefault('_contentious_prefetched', {})
+        pinned = is_pinned_to_write_db(template_context)
+        variants = self.get_content_variants(template_context)
+        for namespace in namespaces or [None]:
+            if namespace is None:
+                namespace = self.get_content_namespace(template_context)
+            if namespace not in prefetched:
+                prefetched[namespace] = run_in_background(
+                    self._fetch_content_dict, namespace, pinned, variants
+                )
+
+    def _load_content(self, namespace, using=None, variants=(), defer_large=False):
+        """ Load the content for load_content_dict.  Returns a tuple of the
+            content dict and the number of seconds until the next item starts
+            or ends its publishing window (None if there isn't one).
+            If `defer_large` then content longer than get_large_content_length()
+            is replaced by a LARGE_CONTENT_TOKEN, see _get_large_contents.
+        """
+        started = time.time()
+        now = timezone.now()
+        sparse = use_sparse_attributes()
+        #Load the values rather than model instances, which is much quicker
+        if sparse:
+            content_columns = ('content', 'attributes')
+        else:
+            content_columns = self.model.content_fields
+        queryset = self.model.objects.using(using or get_read_db()).filter(
+            Q(publish_until__isnull=True) | Q(publish_until__gt=now),
+            variant__in=('',) + tuple(variants),
+            **self._get_namespace_filter(namespace)
+        )
+        columns = ['key', 'variant', 'publish_from', 'publish_until', 'display'] + list(content_columns)
+        large_length = get_large_content_length() if defer_large else None
+        if large_length:
+            #Don't even fetch the large bodies
+            is_large = "LENGTH(content) > %d" % int(large_length)
+            queryset = queryset.extra(select={
+                'short_content': "CASE WHEN %s THEN '' ELSE content END" % is_large,
+                'is_large': "CASE WHEN %s THEN 1 ELSE 0 END" % is_large,
+            })
+            columns[columns.index('content')] = 'short_content'
+            columns += [self.model._meta.pk.name, 'modified', 'is_large']
+        rows = queryset.values_list(*columns)
+        live_rows = []
+        changes = []
+        for row in rows:
+            publish_from, publish_until = row[2], row[3]
+            if publish_from is not None and publish_from > now:
+                changes.append(publish_from)
+                continue
+            if publish_until is not None:
+                changes.append(publish_until)
+            live_rows.append(row)
+        #Later items replace earlier ones for the same key: variants replace plain
+        #items (the last variant name wins if more than one experiment has a
+        #variant of the key), and scheduled items replace unscheduled ones
+        live_rows.sort(key=lambda row: (bool(row[1]), row[1], row[2] is not None, row[2]))
+        content_dict = {}
+        for row in live_rows:
+            values = row[5:5 + len(content_columns)]
+            if sparse:
+                content, attributes = values
+                item = json.loads(attributes) if attributes else {}
+                item['content'] = content
+            else:
+                item = dict(zip(content_columns, values))
+            item['display'] = row[4]
+            if large_length and row[-1]:
+                del item['content']
+                item[LARGE_CONTENT_TOKEN] = self._make_large_content_token(*row[-3:-1])
+            content_dict[row[0]] = item
+        content_loaded.send(
+            sender=self.__class__, namespace=namespace, started=started, finished=time.time()
+        )
+        next_change = (min(changes) - now).total_seconds() if changes else None
+        return content_dict, next_change
+
+    def _make_large_content_token(self, pk, modified):
+        """ The token for fetching the large content of an item, which changes
+            when the item is saved.
+        """
+        return "%s_%s" % (pk, modified.strftime("%Y%m%d%H%M%S%f") if modified else "")
+
+    def _get_large_contents(self, template_context, tokens):
+        """ Return a dict of the given LARGE_CONTENT_TOKENs to their content,
+            from the RenderScope or request, the cache or (in one query) the DB.
+        """
+        scope = get_render_scope()
+        request = template_context.get('request')
+        if scope is not None:
+            fetched = scope.get_memo(self, 'large_contents')
+        elif request is not None:
+            fetched = request.__dict__.setdefault('_contentious_large_contents', {})
+        else:
+            fetched = {}
+        missing = [token for token in tokens if token not in fetched]
+        if missing:
+            prefix = "%s_large_" % self._cache_key(self.get_content_namespace(template_context))
+            cached = cache.get_many([prefix + token for token in missing])
+            for token in missing:
+                if prefix + token in cached:
+                    fetched[token] = cached[prefix + token]
+            to_load = [token for token in missing if token not in fetched]
+            if to_load:
+                pks = [token.split("_")[0] for token in to_load]
+                contents = dict(
+                    self.model.objects.using(get_read_db(template_context)).filter(
+                        pk__in=pks
+                    ).values_list(self.model._meta.pk.name, 'content')
+                )
+                loaded = {}
+                for token, pk in zip(to_load, pks):
+                    content = contents.get(self.model._meta.pk.to_python(pk), '')
+                    fetched[token] = loaded[prefix + token] = content
+                cache.set_many(loaded, self._get_cache_timeout())
+        return {token: fetched[token] for token in tokens}
+
+    def _get_item(self, variant, lookup, publish_from):
+        """ Return the item which a save with the given publish_from should
+            update, or None if there isn't one.  Without a publish_from that's
+            the item which is live now (the same one as _load_content picks),
+            or failing that the unscheduled item.
+        """
+        queryset = self.model.objects.using(get_write_db()).filter(variant=variant, **lookup)
+        if publish_from is None:
+            now = timezone.now()
+            live = queryset.filter(
+                Q(publish_from__isnull=True) | Q(publish_from__lte=now),
+                Q(publish_until__isnull=True) | Q(publish_until__gt=now),
+            )
+            live = sorted(live, key=lambda item: (item.publish_from is not None, item.publish_from))
+            if live:
+                return live[-1]
+        try:
+            return queryset.filter(publish_from=publish_from)[0]
+        except IndexError:
+            return None
+
+    def _get_plain_item_fields(self, lookup, publish_from):
+        obj = self._get_item('', lookup, publish_from)
+        if obj is None:
+            return {}
+        return dict(obj.content_dict, display=obj.display)
+
+    def _get_content_dict(self, template_context):
+        """ An efficient way for us to fetch content data without hitting the DB
+            multiple times on the same request.  Tries to get the content by:
+            1. getting it from a temporary cache on the request object, 2. getting
+            it from memcache, 3. getting it from the database.
+            Returns a dict of dicts.
+        """
+        scope = get_render_scope()
+        request = template_context.get('request')
+        if scope is not None or request is None:
+            return self._get_scoped_content_dict(template_context, scope)
+        #The first time we fetch the content on a given request we store it on the request object
+        try:
+            return request._content_cache_dict
+        except AttributeError:
+            pass
+        namespace = self.get_content_namespace(template_context)
+        content_dict = self._get_prefetched_content_dict(request, namespace)
+        if content_dict is None:
+            pinned = is_pinned_to_write_db(template_context)
+            variants = self.get_content_variants(template_context)
+            content_dict = self._fetch_content_dict(namespace, pinned, variants)
+        drafts = self.get_drafts(template_context)
+        if drafts:
+            #The editor sees their drafts over a copy of everyone else's content
+            content_dict = dict(content_dict)
+            for key, data in drafts.items():
+                data = {k: v for k, v in data.items() if k not in DRAFT_IGNORED_FIELDS}
+                item = dict(content_dict.get(key, {}), **data)
+                if 'content' in data:
+                    item.pop(LARGE_CONTENT_TOKEN, None)
+                content_dict[key] = item
+        request._content_cache_dict = content_dict
+        return content_dict
+
+    def _get_scoped_content_dict(self, template_context, scope):
+        """ Get the content for rendering outside of a request, from the
+            RenderScope if there is one.
+        """
+        namespace = self.get_content_namespace(template_context)
+        variants = self.get_content_variants(template_context)
+        if scope is None:
+            return self._get_cached_content_dict(namespace, variants)
+        return scope.get_content_dict(
+            self, (namespace, variants), lambda: self._get_cached_content_dict(namespace, variants)
+        )
+
+    def _fetch_content_dict(self, namespace, pinned=False, variants=()):
+        if pinned:
+            #This request has just saved, so don't trust the cache, which may have
+            #been refilled from a lagging replica.  Refill it from the write DB.
+            return self.warm_cache(namespace, using=get_write_db(), variants=variants)
+        return self._get_cached_content_dict(namespace, variants)
+
+    def _get_prefetched_content_dict(self, request, namespace):
+        """ Wait for the content which start_content_prefetch started loading,
+            if it did.  Returns None if it didn't, or if it failed.
+        """
+        try:
+            result = request._contentious_prefetched.pop(namespace)
+        except (AttributeError, KeyError):
+            return None
+        try:
+            return result.get()
+        except Exception:
+            #Load it again in this thread, so that any error is raised from here
+            return None
+
+    def _get_cached_content_dict(self, namespace, variants=()):
+        """ Get the content for the given namespace from memcache, or from the
+            database if it's not in memcache.
+        """
+        content_dict = cache.get(self._content_cache_key(namespace, variants))
+        if content_dict is None:
+            if cache.get(self._written_cache_key(namespace)):
+                #The content has just been saved, and a replica may not have it yet
+                content_dict = self.warm_cache(namespace, using=get_write_db(), variants=variants)
+            else:
+                #Don't replace what a save has put in the cache while we were loading
+                content_dict = self.warm_cache(namespace, variants=variants, replace=False)
+        return content_dict
+
+    def _clear_caches(self, template_context):
+        """ Clear our caches from both the request object and memcache. """
+        namespace = self.get_content_namespace(template_context)
+        request = template_context['request']
+        try:
+            del request._content_cache_dict
+        except AttributeError:
+            pass
+        #Anything being prefetched is now out of date
+        request.__dict__.pop('_contentious_prefetched', None)
+        cache.delete(self._cache_key(namespace))
+
+    def _refill_after_write(self, namespace):
+        """ With a read replica, refill the cache for the namespace from the
+            write DB after saving, and load any that's missing from the write
+            DB for a few seconds, so that other requests don't cache what a
+            lagging replica still has.
+        """
+        if not getattr(settings, "CONTENTIOUS_READ_DB", None):
+            return
+        cache.set(self._written_cache_key(namespace), True, get_read_your_writes_seconds())
+        self.warm_cache(namespace, using=get_write_db())
+
+    def _bump_content_version(self, namespace):
+        version = uuid.uuid4().hex
+        cache.set(self._version_cache_key(namespace), version)
+        return version
+
+    def _record_scheduled_change(self, namespace, when):
+        """ Remember the time (a timestamp) of the next scheduled change, so
+            that the content version can be bumped when it happens.
+        """
+        #Bump the version first if the change which we previously recorded has passed
+        self._get_namespace_version(namespace)
+        schedule_key = self._schedule_cache_key(namespace)
+        current = cache.get(schedule_key)
+        if current is None or when < current:
+            #Keep it for a while after the change, in case nothing asks for the version at the time
+            cache.set(schedule_key, when, int(when - time.time()) + 3600)
+
+    def _content_cache_key(self, namespace, variants=()):
+        key = self._cache_key(namespace)
+        if variants:
+            #The combinations can't all be deleted when content is saved, so
+            #they're keyed on the version instead, and the old ones expire
+            key = "%s_%s_%s" % (
+                key, self._get_namespace_version(namespace), variants_cache_key_suffix(variants)
+            )
+        return key
+
+    def _version_cache_key(self, namespace):
+        return "%s_version" % self._cache_key(namespace)
+
+    def _schedule_cache_key(self, namespace):
+        return "%s_next_change" % self._cache_key(namespace)
+
+    def _written_cache_key(self, namespace):
+        return "%s_written" % self._cache_key(namespace)
+
+    def _get_namespace_filter(self, namespace):
+        """ Return a dict of the DB filter kwargs for the given namespace. """
+        raise NotImplementedError()
+
+    def _cache_key(self, namespace):
+        raise NotImplementedError()
+
+    def _get_cache_timeout(self):
+        raise NotImplementedError()
@@ -0,0 +1,61 @@
+#SYSTEM
+import time
+
+#LIBRARIES
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+PINNED_SESSION_KEY = "contentious_pinned_until"
+
+#transaction.atomic on Django >= 1.6, commit_on_success before that
+atomic = getattr(transaction, 'atomic', None) or transaction.commit_on_success
+
+
+def get_write_db():
+    """ The alias of the database which content is saved to. """
+    return getattr(settings, "CONTENTIOUS_WRITE_DB", DEFAULT_DB_ALIAS)
+
+
+def get_read_db(template_context=None):
+    """ The alias of the database which content should be loaded from.  This is
+        settings.CONTENTIOUS_READ_DB if it's set, unless the request has
+        recently saved some content, in which case it's the write database so
+        that the editor sees their own changes even if the replica is lagging.
+    """
+    read_db = getattr(settings, "CONTENTIOUS_READ_DB", None)
+    if not read_db or is_pinned_to_write_db(template_context):
+        return get_write_db()
+    return read_db
+
+
+def get_read_your_writes_seconds():
+    return getattr(settings, "CONTENTIOUS_READ_YOUR_WRITES_SECONDS", 5)
+
+
+def pin_to_write_db(template_context):
+    """ Make reads for the request (and the rest of its session, for a few
+        seconds) come from the write database.  Call this after saving.
+    """
+    try:
+        request = template_context['request']
+    except (KeyError, TypeError):
+        return
+    until = time.time() + get_read_your_writes_seconds()
+    request._contentious_pinned_until = until
+    session = getattr(request, 'session', None)
+    if session is not None:
+        session[PINNED_SESSION_KEY] = until
+
+
+def is_pinned_to_write_db(template_context):
+    if template_context is None or not getattr(settings, "CONTENTIOUS_READ_DB", None):
+        return False
+    try:
+        request = template_context['request']
+    except (KeyError, TypeError):
+        return False
+    until = getattr(request, '_contentious_pinned_until', None)
+    if until is None:
+        session = getattr(request, 'session', None)
+        until = session.get(PINNED_SESSION_KEY) if session is not None else None
+    return until is not None and until > time.time()
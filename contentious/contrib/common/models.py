@@ -1,5 +1,7 @@
+import json
 import urlparse
 
+from django.conf import settings
 from django.db import models
 
 
@@ -7,6 +9,21 @@ from django.db import models
 #make sure that href/src are valid URLs
 
 
+def use_sparse_attributes():
+    """ Should the HTML attributes be stored in the `attributes` JSON rather
+        than in their own columns?  See the contentious_migrate_attributes command.
+    """
+    return getattr(settings, "CONTENTIOUS_SPARSE_ATTRIBUTES", False)
+
+
+def get_large_content_length():
+    """ Content longer than this many characters is left out of the cached
+        dicts of content and cached on its own, see ContentItemAPIBase.
+        None (the default) means that nothing is left out.
+    """
+    return getattr(settings, "CONTENTIOUS_LARGE_CONTENT_LENGTH", None)
+
+
 class ContentItemBase(models.Model):
     """ Abstract base class for storing edited content data.
         Essentially one of these objects stores the data for a single piece
@@ -30,20 +47,65 @@ class ContentItemBase(models.Model):
     )
 
     key = models.CharField(max_length=100)
+    #The experiment variant which this item is for (see contentious.variants), or blank
+    variant = models.CharField(max_length=100, blank=True, default='', db_index=True)
     content = models.TextField(blank=True)
     display = models.NullBooleanField(default=True)
+    #The window during which this item is published, either end can be left open
+    publish_from = models.DateTimeField(null=True, blank=True)
+    publish_until = models.DateTimeField(null=True, blank=True)
+    #publish_from as a string, or blank, for unique_together, because NULLs are
+    #never equal to each other so unscheduled items wouldn't be unique
+    schedule = models.CharField(max_length=32, blank=True, default='', editable=False)
+    #When the item was last saved, e.g. for finding translations which are
+    #older than their source (see basictrans.coverage)
+    modified = models.DateTimeField(auto_now=True, null=True)
 
-    #This list of attributs could be extended, or could be stored as JSON :-/
+    #The columns for the HTML attributes, which are only used if
+    #CONTENTIOUS_SPARSE_ATTRIBUTES is off
     href = models.CharField(max_length=500, blank=True)
     src = models.CharField(max_length=500, blank=True)
     title = models.CharField(max_length=500, blank=True)
     target = models.CharField(max_length=20, blank=True)
+    #JSON of only the non-empty HTML attributes (any of them), used if
+    #CONTENTIOUS_SPARSE_ATTRIBUTES is on
+    attributes = models.TextField(blank=True, default='')
+
+    @property
+    def attributes_dict(self):
+        return json.loads(self.attributes) if self.attributes else {}
 
     @property
     def content_dict(self):
         """ Return a dict of the values that store content data. """
+        if use_sparse_attributes():
+            return dict(self.attributes_dict, content=self.content)
         return {field: getattr(self, field) for field in self.content_fields}
 
+    def set_content_data(self, data):
+        """ Set the content, attributes and other fields from the given dict,
+            e.g. from the editor.  With sparse attributes, anything which isn't
+            a field (and the attributes which have columns) goes into the JSON,
+            and empty values are removed from it.
+        """
+        sparse = use_sparse_attributes()
+        attributes = self.attributes_dict
+        field_names = set(field.name for field in self._meta.fields)
+        for name, value in data.items():
+            if sparse and (name not in field_names or (name in self.content_fields and name != 'content')):
+                if value in (None, ''):
+                    attributes.pop(name, None)
+                else:
+                    attributes[name] = value
+            else:
+                setattr(self, name, value)
+        if sparse:
+            self.attributes = json.dumps(attributes, sort_keys=True) if attributes else ''
+
+    def save(self, *args, **kwargs):
+        self.schedule = self.publish_from.isoformat() if self.publish_from else ''
+        super(ContentItemBase, self).save(*args, **kwargs)
+
     def clean(self):
         if self.src:
             parsed = urlparse.urlparse(self.src)
@@ -0,0 +1,372 @@
+#SYSTEM
+from datetime import timedelta
+import threading
+import time
+
+#LIBRARIES
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import HttpRequest
+from django.template import Context, RequestContext
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import timezone, unittest
+import mock
+
+#CONTENTIOUS
+from contentious.contrib.basicedit.api import BasicEditAPI
+from contentious.contrib.basicedit.models import ContentItem
+from contentious.contrib.basicedit.utils import content_dict_cache_key
+from contentious.contrib.common.db import (
+    get_read_db,
+    get_write_db,
+    pin_to_write_db,
+)
+from contentious.scope import RenderScope
+from contentious.signals import content_bulk_saved, content_saved
+from contentious.variants import choose_variant
+
+
+class ReadReplicaTest(TestCase):
+    """ Tests for routing content reads and writes to different databases. """
+
+    multi_db = True
+
+    def _make_context(self):
+        request = HttpRequest()
+        request.session = {}
+        return RequestContext(request)
+
+    def test_db_aliases(self):
+        context = self._make_context()
+        #Without a read DB configured, everything goes to the default
+        self.assertEqual(get_read_db(context), 'default')
+        self.assertEqual(get_write_db(), 'default')
+        with override_settings(CONTENTIOUS_READ_DB='replica'):
+            self.assertEqual(get_read_db(context), 'replica')
+            self.assertEqual(get_read_db(), 'replica')
+            #After saving, the session should read from the write DB for a while...
+            pin_to_write_db(context)
+            self.assertEqual(get_read_db(context), 'default')
+            #...including on its next request
+            request = HttpRequest()
+            request.session = context['request'].session
+            self.assertEqual(get_read_db(RequestContext(request)), 'default')
+            #But other requests still read from the replica
+            self.assertEqual(get_read_db(self._make_context()), 'replica')
+            with override_settings(CONTENTIOUS_READ_YOUR_WRITES_SECONDS=-1):
+                context = self._make_context()
+                pin_to_write_db(context)
+                self.assertEqual(get_read_db(context), 'replica')
+
+    @unittest.skipUnless('replica' in settings.DATABASES, "Needs a 'replica' database alias")
+    def test_reads_go_to_replica(self):
+        """ Test with a separate (i.e. un-replicated) 'replica' database that
+            bulk loads come from the replica but the editor sees their own save.
+        """
+        api = BasicEditAPI(cache_prefix='replica_test_')
+        with override_settings(CONTENTIOUS_READ_DB='replica'):
+            editor_context = self._make_context()
+            api.save_content_data('my_key', {'content': 'cake'}, editor_context)
+            self.assertEqual(ContentItem.objects.using('default').count(), 1)
+            self.assertEqual(ContentItem.objects.using('replica').count(), 0)
+            #The editor reads from the primary...
+            self.assertEqual(api.get_content_data('my_key', editor_context)['content'], 'cake')
+            #...and the bulk loads for other requests come from the replica
+            self.assertEqual(api.load_content_dict(None), {})
+
+    @unittest.skipUnless('replica' in settings.DATABASES, "Needs a 'replica' database alias")
+    def test_replica_does_not_refill_cache(self):
+        """ Other requests shouldn't cache the lagging replica's content over
+            the content which has just been saved.
+        """
+        api = BasicEditAPI(cache_prefix='replica_refill_test_')
+        with override_settings(CONTENTIOUS_READ_DB='replica'):
+            api.save_content_data('my_key', {'content': 'cake'}, self._make_context())
+            other_context = self._make_context()
+            self.assertEqual(api.get_content_data('my_key', other_context)['content'], 'cake')
+            #A load from the replica which finishes after the save doesn't replace it...
+            api.warm_cache(None, using='replica', replace=False)
+            self.assertEqual(api.get_content_data('my_key', self._make_context())['content'], 'cake')
+            #...and while the replica may be lagging, cache misses load from the write DB
+            cache.delete(api._cache_key(None))
+            self.assertEqual(api.get_content_data('my_key', self._make_context())['content'], 'cake')
+
+
+class PrefetchingAPI(BasicEditAPI):
+    """ BasicEditAPI which records the thread that loads its content, and
+        can be made to wait before loading it.
+    """
+
+    def __init__(self):
+        super(PrefetchingAPI, self).__init__(cache_prefix='prefetch_test_')
+        self.loaded_in = []
+        self.can_load = threading.Event()
+
+    def _fetch_content_dict(self, namespace, pinned=False, variants=()):
+        self.can_load.wait()
+        self.loaded_in.append(threading.current_thread())
+        return {'my_key': {'content': 'prefetched'}}
+
+
+class PrefetchTest(TestCase):
+    """ Tests for loading the content in the background with start_content_prefetch. """
+
+    def test_get_content_data_waits_for_prefetch(self):
+        api = PrefetchingAPI()
+        context = Context({'request': HttpRequest()})
+        api.start_content_prefetch(context)
+        #Starting it twice for the same namespace doesn't load it twice
+        api.start_content_prefetch(context, [None])
+        self.assertEqual(api.loaded_in, [])
+        api.can_load.set()
+        self.assertEqual(api.get_content_data('my_key', context), {'content': 'prefetched'})
+        self.assertEqual(len(api.loaded_in), 1)
+        self.assertNotEqual(api.loaded_in[0], threading.current_thread())
+        #Without a prefetch, the content is loaded in this thread
+        api.get_content_data('my_key', Context({'request': HttpRequest()}))
+        self.assertEqual(api.loaded_in[1], threading.current_thread())
+
+
+class VariantTest(TestCase):
+    """ Tests for storing and loading variants of content for experiments. """
+
+    def _context_for(self, variant):
+        """ Return a context for a request which is bucketed into the given variant. """
+        visitor_id = next(i for i in range(100) if choose_variant('hero', ['a', 'b'], i) == variant)
+        request = HttpRequest()
+        request.visitor_id = visitor_id
+        return Context({'request': request})
+
+    @override_settings(
+        CONTENTIOUS_EXPERIMENTS={'hero': ['a', 'b']}, CONTENTIOUS_VARIANT_REQUEST_ATTRIBUTE='visitor_id'
+    )
+    def test_variant_content(self):
+        api = BasicEditAPI(cache_prefix='variant_test_')
+        api.save_content_data('title', {'content': 'Plain', 'href': '/plain/'}, self._context_for('a'))
+        api.save_content_data('title', {'content': 'Variant B', 'variant': 'hero:b'}, self._context_for('a'))
+        self.assertEqual(api.get_content_data('title', self._context_for('a'))['content'], 'Plain')
+        #The variant started off as a copy of the plain item
+        data = api.get_content_data('title', self._context_for('b'))
+        self.assertEqual((data['content'], data['href']), ('Variant B', '/plain/'))
+        #Requests without a bucketing value get the plain content
+        self.assertEqual(api.get_content_data('title', Context({'request': HttpRequest()}))['content'], 'Plain')
+        #Saving replaces the cached combinations of variants
+        api.save_content_data('other', {'content': 'New'}, self._context_for('a'))
+        self.assertEqual(api.get_content_data('other', self._context_for('b'))['content'], 'New')
+        self.assertEqual(len(api.load_content_dict(None)), 2)
+
+
+class ScheduledPublishingTest(TestCase):
+    """ Tests for items with publish_from/publish_until. """
+
+    def test_publishing_window(self):
+        api = BasicEditAPI(cache_prefix='schedule_test_')
+        context = Context({'request': HttpRequest()})
+        now = timezone.now()
+        api.save_content_data('promo', {'content': 'Normal'}, context)
+        api.save_content_data('promo', {'content': 'Sale', 'publish_from': now + timedelta(hours=1)}, context)
+        api.save_content_data('old', {'content': 'Gone', 'publish_until': now - timedelta(hours=1)}, context)
+        api.save_content_data('live', {'content': 'Live', 'publish_until': now + timedelta(hours=2)}, context)
+        content_dict, next_change = api._load_content(None)
+        self.assertEqual(content_dict['promo']['content'], 'Normal')
+        self.assertFalse('old' in content_dict)
+        self.assertEqual(content_dict['live']['content'], 'Live')
+        #The next change is the sale starting
+        self.assertTrue(3590 < next_change <= 3600)
+        #Once the sale has started it replaces the normal content
+        ContentItem.objects.filter(content='Sale').update(publish_from=now - timedelta(minutes=1))
+        self.assertEqual(api.load_content_dict(None)['promo']['content'], 'Sale')
+
+    def test_concurrent_creates(self):
+        """ If another request creates an unscheduled item between our looking
+            for it and creating it, we should update theirs rather than adding
+            a second one.
+        """
+        api = BasicEditAPI(cache_prefix='schedule_unique_test_')
+        context = Context({'request': HttpRequest()})
+        api.save_content_data('promo', {'content': 'Theirs'}, context)
+        get_item = api._get_item
+        with mock.patch.object(api, '_get_item', side_effect=[None, get_item('', {'key': 'promo'}, None)]):
+            api.save_content_data('promo', {'content': 'Ours'}, context)
+        self.assertEqual(list(ContentItem.objects.values_list('content', flat=True)), ['Ours'])
+
+    def test_save_after_scheduled_item_goes_live(self):
+        """ Saves without a publish_from should update the scheduled item once
+            it's live, as that's the one which the editor can see.
+        """
+        api = BasicEditAPI(cache_prefix='schedule_save_test_')
+        now = timezone.now()
+        api.save_content_data('promo', {'content': 'Normal'}, Context({'request': HttpRequest()}))
+        api.save_content_data(
+            'promo', {'content': 'Sale', 'publish_until': now + timedelta(days=1),
+                      'publish_from': now + timedelta(hours=1)},
+            Context({'request': HttpRequest()})
+        )
+        ContentItem.objects.filter(content='Sale').update(publish_from=now - timedelta(minutes=1))
+        api.save_content_data('promo', {'content': 'Bigger sale'}, Context({'request': HttpRequest()}))
+        context = Context({'request': HttpRequest()})
+        self.assertEqual(api.get_content_data('promo', context)['content'], 'Bigger sale')
+        #The unscheduled item is still there for when the sale ends
+        self.assertEqual(ContentItem.objects.get(key='promo', publish_from=None).content, 'Normal')
+
+    def test_version_changes_with_schedule(self):
+        api = BasicEditAPI(cache_prefix='schedule_version_test_')
+        context = Context({'request': HttpRequest()})
+        version = api.get_content_version(context)
+        self.assertEqual(api.get_content_version(context), version)
+        api._record_scheduled_change(None, time.time() + 60)
+        self.assertEqual(api.get_content_version(context), version)
+        #Once the recorded change has happened, the version changes
+        api._record_scheduled_change(None, time.time() - 1)
+        self.assertNotEqual(api.get_content_version(context), version)
+
+
+class SparseAttributesTest(TestCase):
+    """ Tests for storing the HTML attributes as JSON with CONTENTIOUS_SPARSE_ATTRIBUTES. """
+
+    def test_sparse_attributes(self):
+        api = BasicEditAPI(cache_prefix='sparse_test_')
+        context = Context({'request': HttpRequest()})
+        api.save_content_data('link', {'content': 'Home', 'href': '/', 'title': ''}, context)
+        #Without the setting, the attributes go in their columns
+        item = ContentItem.objects.get(key='link')
+        self.assertEqual((item.href, item.attributes), ('/', ''))
+        modified = timezone.now() - timedelta(days=1)
+        ContentItem.objects.filter(key='link').update(modified=modified)
+        with override_settings(CONTENTIOUS_SPARSE_ATTRIBUTES=True):
+            call_command('contentious_migrate_attributes', clear=True, verbosity=0)
+            item = ContentItem.objects.get(key='link')
+            self.assertEqual((item.attributes_dict, item.href), ({'href': '/'}, ''))
+            #Moving the attributes doesn't count as changing the content
+            self.assertEqual(item.modified, modified)
+            #Attributes without a column can be stored, and empty ones are removed
+            api.save_content_data('link', {'content': 'Home', 'href': '', 'alt': 'Go home'}, context)
+            item = ContentItem.objects.get(key='link')
+            self.assertEqual(item.attributes_dict, {'alt': 'Go home'})
+            self.assertEqual(
+                api.load_content_dict(None), {'link': {'content': 'Home', 'alt': 'Go home', 'display': True}}
+            )
+
+
+class DraftTest(TestCase):
+    """ Tests for keeping editors' saves as drafts with CONTENTIOUS_DRAFTS. """
+
+    def _make_context(self, session):
+        request = HttpRequest()
+        request.session = session
+        return Context({'request': request})
+
+    @override_settings(CONTENTIOUS_DRAFTS=True)
+    def test_drafts(self):
+        api = BasicEditAPI(cache_prefix='draft_test_')
+        session = {}
+        #Requests without a session save directly
+        api.save_content_data('title', {'content': 'Published', 'href': '/'}, Context({'request': HttpRequest()}))
+        self.assertEqual(api.get_content_data('title', self._make_context({}))['content'], 'Published')
+        #The editor's save is only seen by them, and doesn't clear the shared cache
+        api.save_content_data('title', {'content': 'Draft'}, self._make_context(session))
+        api.save_content_data('other', {'content': 'Other draft'}, self._make_context(session))
+        self.assertFalse(cache.get(content_dict_cache_key('draft_test_')) is None)
+        data = api.get_content_data('title', self._make_context(session))
+        self.assertEqual((data['content'], data['href']), ('Draft', '/'))
+        self.assertEqual(api.get_content_data('title', self._make_context({}))['content'], 'Published')
+        self.assertEqual(ContentItem.objects.count(), 1)
+        #Publishing saves them for everyone
+        self.assertEqual(api.publish_drafts(self._make_context(session), ['title']), ['title'])
+        self.assertEqual(api.get_content_data('title', self._make_context({}))['content'], 'Draft')
+        self.assertEqual(api.discard_drafts(self._make_context(session)), ['other'])
+        self.assertEqual(api.get_drafts(self._make_context(session)), {})
+        self.assertEqual(api.get_content_data('other', self._make_context(session)), {})
+
+
+class ReplaceTest(TestCase):
+    """ Tests for finding and replacing in the stored content. """
+
+    def test_replace_content(self):
+        api = BasicEditAPI(cache_prefix='replace_test_')
+        context = Context({'request': HttpRequest()})
+        api.save_content_data('logo', {'src': 'http://old.example.com/logo.png'}, context)
+        api.save_content_data('link', {'href': 'http://OLD.example.com/', 'content': 'old.example.com'}, context)
+        api.save_content_data('footer.link', {'href': 'http://old.example.com/about/'}, context)
+        #A dry run only says what it would do
+        changes = api.replace_content('old.example.com', 'new.example.com', fields=['href', 'src'], dry_run=True)
+        self.assertEqual(sorted((change['key'], change['field']) for change in changes), [
+            ('footer.link', 'href'), ('logo', 'src'),
+        ])
+        self.assertEqual(api.get_content_data('logo', context)['src'], 'http://old.example.com/logo.png')
+        changes = api.replace_content('old.example.com', 'new.example.com', fields=['href', 'src'])
+        self.assertEqual(len(changes), 2)
+        #(A new request, as the caches on the old one aren't cleared)
+        self.assertEqual(
+            api.get_content_data('logo', Context({'request': HttpRequest()}))['src'], 'http://new.example.com/logo.png'
+        )
+        self.assertEqual(ContentItem.objects.get(key='link').href, 'http://OLD.example.com/')
+        #Regexes, and limiting by key
+        api.replace_content(r'(?i)http://old\.example\.com/(\w*)', r'/\1', key_prefix='li', regex=True)
+        self.assertEqual(api.get_content_data('link', Context({'request': HttpRequest()}))['href'], '/')
+        self.assertEqual(ContentItem.objects.get(key='footer.link').href, 'http://new.example.com/about/')
+
+    def test_replace_sends_one_signal(self):
+        """ A replace should send one content_bulk_saved for each namespace
+            rather than a content_saved for each change, so that receivers
+            (e.g. catalog compiling) only do their work once.
+        """
+        api = BasicEditAPI(cache_prefix='replace_signal_test_')
+        for i in range(3):
+            api.save_content_data(
+                'link%d' % i, {'content': 'old', 'href': '/old/'}, Context({'request': HttpRequest()})
+            )
+        saved, bulk_saved = [], []
+        def on_saved(sender, **kwargs):
+            saved.append(kwargs)
+        def on_bulk_saved(sender, **kwargs):
+            bulk_saved.append(kwargs)
+        content_saved.connect(on_saved)
+        content_bulk_saved.connect(on_bulk_saved)
+        try:
+            changes = api.replace_content('old', 'new')
+        finally:
+            content_saved.disconnect(on_saved)
+            content_bulk_saved.disconnect(on_bulk_saved)
+        self.assertEqual(len(changes), 6)
+        self.assertEqual(saved, [])
+        self.assertEqual(len(bulk_saved), 1)
+        self.assertEqual(bulk_saved[0]['namespace'], None)
+        self.assertEqual(bulk_saved[0]['items']['link1'], {'content': 'new', 'href': '/new/'})
+
+
+class LargeContentTest(TestCase):
+    """ Tests for leaving large content out of the cached dicts with
+        CONTENTIOUS_LARGE_CONTENT_LENGTH.
+    """
+
+    @override_settings(CONTENTIOUS_LARGE_CONTENT_LENGTH=10)
+    def test_large_content(self):
+        api = BasicEditAPI(cache_prefix='large_test_')
+        api.save_content_data('short', {'content': 'Short'}, Context({'request': HttpRequest()}))
+        api.save_content_data('long', {'content': 'Long' * 10, 'title': 'Long'}, Context({'request': HttpRequest()}))
+        context = Context({'request': HttpRequest()})
+        self.assertEqual(api.get_content_data('short', context)['content'], 'Short')
+        cached = cache.get(content_dict_cache_key('large_test_'))
+        self.assertFalse('content' in cached['long'])
+        self.assertEqual(cached['long']['title'], 'Long')
+        #The large body is fetched when it's used, once per request
+        data = api.get_content_data('long', context)
+        self.assertEqual((data['content'], data['title']), ('Long' * 10, 'Long'))
+        with self.assertNumQueries(0):
+            api.get_content_data('long', context)
+            #And then it comes from the cache
+            api.prefetch_content_data(['short', 'long'], Context({'request': HttpRequest()}))
+        #Fresh loads have everything
+        self.assertEqual(api.load_content_dict(None)['long']['content'], 'Long' * 10)
+        api.save_content_data('long', {'content': 'Longer' * 10}, Context({'request': HttpRequest()}))
+        self.assertEqual(api.get_content_data('long', Context({'request': HttpRequest()}))['content'], 'Longer' * 10)
+        #In a RenderScope it's fetched once for the whole scope
+        cache.clear()
+        with RenderScope():
+            self.assertEqual(api.get_content_data('long', Context())['content'], 'Longer' * 10)
+            with self.assertNumQueries(0):
+                cache.clear()
+                self.assertEqual(api.get_content_data('long', Context())['content'], 'Longer' * 10)
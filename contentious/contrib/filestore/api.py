@@ -0,0 +1,202 @@
+#SYSTEM
+from collections import namedtuple
+import logging
+import os
+import threading
+import time
+
+#LIBRARIES
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import translation
+from django.utils._os import safe_join
+
+#CONTENTIOUS
+from contentious.signals import (
+    content_deleted,
+    content_loaded,
+    content_saved,
+)
+
+#FILESTORE
+from contentious.contrib.filestore.utils import (
+    JSON_EXTENSIONS,
+    find_content_files,
+    get_filestore_dir,
+    get_poll_interval,
+    read_content_file,
+    write_content_file,
+)
+
+logger = logging.getLogger(__name__)
+
+#The content of one file, along with what it looked like on disk when we read it
+ContentFile = namedtuple('ContentFile', 'path mtime size content_dict')
+
+
+class FileStoreAPI(object):
+    """ Implementation of the ContentiousInterface which keeps the content in
+        a JSON or YAML file per namespace (language), see README.md.
+        All of the content is held in memory, in a dict of ContentFiles which
+        is only ever replaced, never modified, so reads don't need a lock.
+    """
+
+    def __init__(self, directory=None, poll_interval=None):
+        self.directory = directory or get_filestore_dir()
+        if not self.directory:
+            raise ImproperlyConfigured("You must define CONTENTIOUS_FILESTORE_DIR in settings.py")
+        self.poll_interval = get_poll_interval() if poll_interval is None else poll_interval
+        self._lock = threading.Lock()
+        self._files = {}
+        self._unreadable = {} #paths of files which failed to load -> their (mtime, size)
+        self._checked_at = 0
+        self.reload()
+
+    def in_edit_mode(self, context):
+        """ Are we in edit mode?  At the moment we're assuming that all admin
+            users are always in edit mode.  You might want to override this method.
+        """
+        try:
+            user = context['request'].user
+            return user.is_admin
+        except (KeyError, AttributeError):
+            return False
+
+    def get_content_data(self, key, template_context):
+        self._reload_if_due()
+        content_file = self._files.get(self.get_content_namespace(template_context))
+        if content_file is None:
+            return {}
+        return content_file.content_dict.get(key, {})
+
+    def save_content_data(self, key, data, template_context):
+        namespace = self.get_content_namespace(template_context)
+        with self._lock:
+            path = self._get_path(namespace)
+            #Re-read the file rather than trusting our copy, so that we don't
+            #overwrite changes which we haven't polled for yet
+            content_dict = read_content_file(path) if os.path.exists(path) else {}
+            item = dict(content_dict.get(key, {}))
+            item.update(data)
+            content_dict[key] = item
+            write_content_file(path, content_dict)
+            self._replace_files({namespace: self._stat_file(path, content_dict)})
+        content_saved.send(sender=self.__class__, key=key, data=data, namespace=namespace)
+
+    def get_content_namespace(self, template_context):
+        request = template_context.get('request')
+        return getattr(request, 'language', None) or translation.get_language()
+
+    def get_content_namespaces(self):
+        self._reload_if_due()
+        return sorted(self._files)
+
+    def load_content_dict(self, namespace):
+        path = self._get_path(namespace)
+        return read_content_file(path) if os.path.exists(path) else {}
+
+    def get_content_version(self, template_context):
+        self._reload_if_due()
+        content_file = self._files.get(self.get_content_namespace(template_context))
+        if content_file is None:
+            return None
+        return "%r-%d" % (content_file.mtime, content_file.size)
+
+    def get_stored_keys(self):
+        self._reload_if_due()
+        keys = set()
+        for content_file in self._files.values():
+            keys.update(content_file.content_dict)
+        return keys
+
+    def delete_content(self, keys):
+        keys = set(keys)
+        with self._lock:
+            changed = {}
+            for namespace, path in find_content_files(self.directory).items():
+                content_dict = read_content_file(path)
+                if keys.isdisjoint(content_dict):
+                    continue
+                content_dict = {k: v for k, v in content_dict.items() if k not in keys}
+                write_content_file(path, content_dict)
+                changed[namespace] = self._stat_file(path, content_dict)
+            self._replace_files(changed)
+        content_deleted.send(sender=self.__class__, keys=list(keys))
+
+    def reload(self):
+        """ Re-read any files which have been added, changed or deleted since
+            we last read them, and swap them in.  Returns a list of the
+            namespaces which changed.
+        """
+        with self._lock:
+            return self._reload()
+
+    def _reload_if_due(self):
+        if time.time() - self._checked_at < self.poll_interval:
+            return
+        #If another thread is already reloading then carry on with what we've got
+        if not self._lock.acquire(False):
+            return
+        try:
+            self._reload()
+        finally:
+            self._lock.release()
+
+    def _reload(self):
+        self._checked_at = time.time()
+        found = find_content_files(self.directory)
+        changed = {}
+        for namespace, path in found.items():
+            current = self._files.get(namespace)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue #deleted since we listed the directory
+            signature = (stat.st_mtime, stat.st_size)
+            if current and current.path == path and (current.mtime, current.size) == signature:
+                continue
+            if self._unreadable.get(path) == signature:
+                continue
+            started = time.time()
+            try:
+                content_dict = read_content_file(path)
+            except ValueError:
+                #Probably half way through being edited, keep what we had until it changes again
+                logger.exception("Could not read content file %s", path)
+                self._unreadable[path] = signature
+                continue
+            self._unreadable.pop(path, None)
+            content_loaded.send(
+                sender=self.__class__, namespace=namespace, started=started, finished=time.time()
+            )
+            changed[namespace] = ContentFile(path, stat.st_mtime, stat.st_size, content_dict)
+        removed = set(self._files) - set(found)
+        self._replace_files(changed, removed)
+        return sorted(changed) + sorted(removed)
+
+    def _replace_files(self, changed, removed=()):
+        """ Swap in a new dict of the ContentFiles with the given changes.
+            Must be called with the lock held.
+        """
+        if not changed and not removed:
+            return
+        files = dict(self._files)
+        files.update(changed)
+        for namespace in removed:
+            files.pop(namespace, None)
+        self._files = files
+
+    def _stat_file(self, path, content_dict):
+        stat = os.stat(path)
+        return ContentFile(path, stat.st_mtime, stat.st_size, content_dict)
+
+    def _get_path(self, namespace):
+        """ Return the path of the file for the given namespace, which may not exist yet. """
+        content_file = self._files.get(namespace)
+        if content_file is not None:
+            return content_file.path
+        try:
+            return find_content_files(self.directory)[namespace]
+        except KeyError:
+            pass
+        #safe_join makes sure that a namespace can't take us out of the directory
+        return safe_join(self.directory, "%s%s" % (namespace, JSON_EXTENSIONS[0]))
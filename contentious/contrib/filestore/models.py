@@ -0,0 +1 @@
+#No models, all the data is stored in files
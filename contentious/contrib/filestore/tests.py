@@ -0,0 +1,77 @@
+#SYSTEM
+import json
+import os
+import shutil
+import tempfile
+
+#LIBRARIES
+from django.http import HttpRequest
+from django.template import Context
+from django.test import TestCase
+
+#CONTENTIOUS
+from .api import FileStoreAPI
+
+
+class APITest(TestCase):
+    """ Tests for the FileStoreAPI. """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.write_file('en.json', {'title': {'content': 'Hello'}})
+        self.api = FileStoreAPI(self.directory, poll_interval=0)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_file(self, filename, content_dict):
+        with open(os.path.join(self.directory, filename), 'w') as f:
+            json.dump(content_dict, f)
+
+    def read_file(self, filename):
+        with open(os.path.join(self.directory, filename)) as f:
+            return json.load(f)
+
+    def get_context(self, language):
+        request = HttpRequest()
+        request.language = language
+        return Context({'request': request})
+
+    def test_save_and_get_data(self):
+        context = self.get_context('en')
+        self.assertEqual(self.api.get_content_data('title', context), {'content': 'Hello'})
+        self.assertEqual(self.api.get_content_data('missing', context), {})
+        self.api.save_content_data('title', {'href': '/hello/'}, context)
+        self.assertEqual(
+            self.api.get_content_data('title', context), {'content': 'Hello', 'href': '/hello/'}
+        )
+        self.assertEqual(self.read_file('en.json')['title'], {'content': 'Hello', 'href': '/hello/'})
+        #Saving in a new language creates a new file
+        self.api.save_content_data('title', {'content': 'Bonjour'}, self.get_context('fr'))
+        self.assertEqual(self.read_file('fr.json'), {'title': {'content': 'Bonjour'}})
+        self.assertEqual(self.api.get_content_namespaces(), ['en', 'fr'])
+        self.assertEqual([f for f in os.listdir(self.directory) if f.endswith('.tmp')], [])
+
+    def test_reload(self):
+        """ Test that changes made to the files outside of the API are picked up. """
+        context = self.get_context('en')
+        version = self.api.get_content_version(context)
+        self.write_file('en.json', {'title': {'content': 'Hello again'}})
+        self.write_file('de.json', {'title': {'content': 'Hallo'}})
+        self.assertEqual(self.api.get_content_data('title', context), {'content': 'Hello again'})
+        self.assertNotEqual(self.api.get_content_version(context), version)
+        self.assertEqual(self.api.get_content_data('title', self.get_context('de')), {'content': 'Hallo'})
+        #A file which can't be read keeps its old content
+        with open(os.path.join(self.directory, 'en.json'), 'w') as f:
+            f.write('{"title": ')
+        self.assertEqual(self.api.get_content_data('title', context), {'content': 'Hello again'})
+        os.remove(os.path.join(self.directory, 'de.json'))
+        self.assertEqual(self.api.reload(), ['de'])
+        self.assertEqual(self.api.get_content_data('title', self.get_context('de')), {})
+
+    def test_delete_content(self):
+        self.write_file('fr.json', {'title': {'content': 'Bonjour'}, 'other': {'content': 'Autre'}})
+        self.api.delete_content(['title'])
+        self.assertEqual(self.read_file('en.json'), {})
+        self.assertEqual(self.read_file('fr.json'), {'other': {'content': 'Autre'}})
+        self.assertEqual(self.api.get_stored_keys(), set(['other']))
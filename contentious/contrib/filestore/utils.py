@@ -0,0 +1,80 @@
+#SYSTEM
+import io
+import json
+import os
+import tempfile
+
+#LIBRARIES
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.encoding import force_text
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+JSON_EXTENSIONS = ('.json',)
+YAML_EXTENSIONS = ('.yaml', '.yml')
+
+
+def get_filestore_dir():
+    return getattr(settings, "CONTENTIOUS_FILESTORE_DIR", None)
+
+
+def get_poll_interval():
+    return getattr(settings, "CONTENTIOUS_FILESTORE_POLL_INTERVAL", 2)
+
+
+def find_content_files(directory):
+    """ Return a dict mapping each namespace (e.g. language) to the path of
+        its content file in the given directory.
+    """
+    files = {}
+    for filename in sorted(os.listdir(directory)):
+        namespace, extension = os.path.splitext(filename)
+        if extension in JSON_EXTENSIONS or (yaml and extension in YAML_EXTENSIONS):
+            files.setdefault(namespace, os.path.join(directory, filename))
+    return files
+
+
+def read_content_file(path):
+    """ Read the dict of dicts of content from the given JSON or YAML file. """
+    with io.open(path, encoding='utf-8') as f:
+        if path.endswith(YAML_EXTENSIONS):
+            if yaml is None:
+                raise ImproperlyConfigured("PyYAML is needed to read %s" % path)
+            content_dict = yaml.safe_load(f) or {}
+        else:
+            content_dict = json.load(f)
+    if not isinstance(content_dict, dict) or not all(isinstance(v, dict) for v in content_dict.values()):
+        raise ValueError("%s is not a mapping of keys to dicts of content" % path)
+    return content_dict
+
+
+def write_content_file(path, content_dict):
+    """ Write the dict of dicts of content to the given JSON or YAML file, via a
+        temporary file in the same folder so that the change is atomic.
+    """
+    if path.endswith(YAML_EXTENSIONS):
+        if yaml is None:
+            raise ImproperlyConfigured("PyYAML is needed to write %s" % path)
+        data = yaml.safe_dump(content_dict, default_flow_style=False, allow_unicode=True)
+    else:
+        #Sorted and indented so that the files diff nicely in version control
+        data = json.dumps(content_dict, indent=2, sort_keys=True, ensure_ascii=False) + "\n"
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        #mkstemp makes the file private, keep the permissions of the one we're replacing
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except OSError:
+            mode = 0o644
+        os.chmod(temp_path, mode)
+        with io.open(handle, 'w', encoding='utf-8') as f:
+            f.write(force_text(data))
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(temp_path, path)
+    except:
+        os.remove(temp_path)
+        raise
@@ -1,9 +1,16 @@
+#SYSTEM
+from functools import wraps
+
 #LIBRARIES
+from django.core.cache import cache
 from django.http import HttpResponseForbidden
 from django.template import RequestContext
+from django.utils.cache import get_cache_key, learn_cache_key, patch_vary_headers
 
 #CONTENTIOUS
 from contentious.api import api
+from contentious.dependencies import DependencyRecorder, register_dependencies
+from contentious.prerender import resolve_response
 
 
 def require_edit_mode(function):
@@ -14,3 +21,42 @@ def require_edit_mode(function):
             return HttpResponseForbidden()
         return function(request, *args, **kwargs)
     return replacement
+
+
+def cache_page_with_dependencies(timeout=None, key_prefix=""):
+    """ View function decorator which caches the view's pages (for GET and
+        HEAD requests) for `timeout` seconds, like Django's cache_page, but
+        also records which {% editable %} keys each page rendered, so that
+        the cached page is deleted as soon as the content of any of them is
+        saved.  Pages aren't cached in edit mode or if the view set cookies.
+        Like Django's cache middleware, the cached pages vary on the request
+        headers in the response's Vary header, including the Cookie header
+        if the session was used, so pages for users with a session are cached
+        separately.
+    """
+    key_prefix = "contentious_page.%s" % key_prefix
+    def decorator(function):
+        @wraps(function)
+        def replacement(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or api.in_edit_mode(RequestContext(request)):
+                return function(request, *args, **kwargs)
+            cache_key = get_cache_key(request, key_prefix, 'GET', cache=cache)
+            response = cache.get(cache_key) if cache_key else None
+            if response is not None:
+                return response
+            with DependencyRecorder() as recorder:
+                response = function(request, *args, **kwargs)
+                if callable(getattr(response, 'render', None)):
+                    response = response.render()
+            if response.status_code == 200 and not getattr(response, 'streaming', False) and not response.cookies:
+                if getattr(getattr(request, 'session', None), 'accessed', False):
+                    #The session middleware adds this too, but only after we've cached the page
+                    patch_vary_headers(response, ('Cookie',))
+                #The placeholders of any deferred pre_render can't be resolved later
+                response = resolve_response(request, response)
+                cache_key = learn_cache_key(request, response, timeout, key_prefix, cache=cache)
+                cache.set(cache_key, response, timeout)
+                register_dependencies(cache_key, recorder.keys)
+            return response
+        return replacement
+    return decorator
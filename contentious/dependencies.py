@@ -0,0 +1,109 @@
+#SYSTEM
+import hashlib
+import threading
+
+#LIBRARIES
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from django.utils import translation
+
+#CONTENTIOUS
+from contentious.signals import content_bulk_saved, content_deleted, content_saved
+
+_state = threading.local()
+
+
+def get_dependency_index_timeout():
+    """ How long the record of which cache entries use each key is kept.  It
+        should be at least as long as the longest timeout of those entries.
+    """
+    return getattr(settings, "CONTENTIOUS_DEPENDENCY_INDEX_TIMEOUT", 7 * 24 * 60 * 60)
+
+
+class DependencyRecorder(object):
+    """ Context manager which records the keys of the {% editable %} tags
+        which are rendered (in this thread) while it's active:
+
+            with DependencyRecorder() as recorder:
+                html = template.render(context)
+            register_dependencies(cache_key, recorder.keys)
+
+        Recorders can be nested, e.g. for a cached fragment in a cached page,
+        and each key is recorded in all of the active ones.
+    """
+
+    def __init__(self):
+        self.keys = set()
+
+    def __enter__(self):
+        if not hasattr(_state, 'recorders'):
+            _state.recorders = []
+        _state.recorders.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _state.recorders.remove(self)
+
+
+def record_keys(keys):
+    """ Record that the given keys were used, in all of the active recorders. """
+    for recorder in getattr(_state, 'recorders', ()):
+        recorder.keys.update(keys)
+
+
+def make_fragment_cache_key(name, vary_on=()):
+    """ The cache key of a {% cache_editables %} fragment. """
+    parts = [name, translation.get_language() or ""] + [unicode(value) for value in vary_on]
+    return "contentious_fragment_%s" % hashlib.md5(u":".join(parts).encode('utf-8')).hexdigest()
+
+
+def _index_cache_key(key):
+    return "contentious_dependents_%s" % hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
+def register_dependencies(cache_key, keys):
+    """ Remember that the cache entry `cache_key` was rendered with the content
+        of the given keys, so that it's deleted when any of them change.  For
+        each key, the cache holds a tuple of the cache keys which use it.  Two
+        processes registering for the same key at once can lose one of the
+        entries from it, which then just lasts until its timeout.
+    """
+    index_keys = [_index_cache_key(key) for key in keys]
+    if not index_keys:
+        return
+    current = cache.get_many(index_keys)
+    updates = {}
+    for index_key in index_keys:
+        dependents = current.get(index_key, ())
+        if cache_key not in dependents:
+            updates[index_key] = tuple(dependents) + (cache_key,)
+    if updates:
+        cache.set_many(updates, get_dependency_index_timeout())
+
+
+def invalidate_dependents(keys):
+    """ Delete the cache entries which were rendered with the content of any
+        of the given keys.  Returns the number of entries deleted.
+    """
+    index_keys = [_index_cache_key(key) for key in keys]
+    dependents = set()
+    for cache_keys in cache.get_many(index_keys).values():
+        dependents.update(cache_keys)
+    cache.delete_many(list(dependents) + index_keys)
+    return len(dependents)
+
+
+@receiver(content_saved)
+def invalidate_on_save(sender, key, **kwargs):
+    invalidate_dependents([key])
+
+
+@receiver(content_bulk_saved)
+def invalidate_on_bulk_save(sender, items, **kwargs):
+    invalidate_dependents(list(items))
+
+
+@receiver(content_deleted)
+def invalidate_on_delete(sender, keys, **kwargs):
+    invalidate_dependents(keys)
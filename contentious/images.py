@@ -0,0 +1,178 @@
+#SYSTEM
+import hashlib
+import os
+import tempfile
+
+#LIBRARIES
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import receiver
+from django.utils._os import safe_join
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+#CONTENTIOUS
+from contentious.signals import content_bulk_saved, content_saved
+
+#Where the derivatives go, relative to MEDIA_ROOT/MEDIA_URL
+DERIVATIVES_DIR = "contentious/derivatives"
+IMAGE_FORMATS = {
+    '.jpg': 'JPEG',
+    '.jpeg': 'JPEG',
+    '.png': 'PNG',
+}
+
+
+def use_image_derivatives():
+    return Image is not None and getattr(settings, "CONTENTIOUS_IMAGE_DERIVATIVES", False)
+
+
+def get_image_widths():
+    return getattr(settings, "CONTENTIOUS_IMAGE_WIDTHS", (320, 640, 1024, 1600))
+
+
+def get_image_quality():
+    return getattr(settings, "CONTENTIOUS_IMAGE_QUALITY", 80)
+
+
+def get_srcset_miss_timeout():
+    """ How long to remember that an image has no derivatives, e.g. because
+        it was uploaded without its content being saved.
+    """
+    return getattr(settings, "CONTENTIOUS_SRCSET_MISS_TIMEOUT", 60)
+
+
+def get_image_sizes():
+    """ The default `sizes` attribute for <img> tags with a srcset. """
+    return getattr(settings, "CONTENTIOUS_IMAGE_SIZES", "100vw")
+
+
+def get_local_path(src):
+    """ Return the path of the file in MEDIA_ROOT which the given URL is for,
+        or None if it isn't a media URL.
+    """
+    media_url = settings.MEDIA_URL
+    if not media_url or not settings.MEDIA_ROOT or not src.startswith(media_url):
+        return None
+    relative = src[len(media_url):].split('?')[0].split('#')[0]
+    try:
+        return safe_join(settings.MEDIA_ROOT, relative)
+    except ValueError:
+        return None
+
+
+def get_derivatives(src, generate=False):
+    """ Return a list of (url, width) tuples of the resized versions of the
+        image at the given media URL, plus the original.  If `generate` is
+        True then any which don't exist yet are made, otherwise only the
+        ones which already exist are returned.  The derivatives' names include
+        a fingerprint of the original, so they're only made again when the
+        original changes.
+    """
+    path = get_local_path(src)
+    if Image is None or path is None:
+        return []
+    base, extension = os.path.splitext(os.path.basename(path))
+    image_format = IMAGE_FORMATS.get(extension.lower())
+    if image_format is None:
+        return []
+    try:
+        stat = os.stat(path)
+        image = Image.open(path)
+    except (IOError, OSError):
+        return []
+    fingerprint = hashlib.md5(
+        ("%s:%r:%d" % (path, stat.st_mtime, stat.st_size)).encode('utf-8')
+    ).hexdigest()[:12]
+    original_width, original_height = image.size
+    derivatives = []
+    for width in sorted(get_image_widths()):
+        if width >= original_width:
+            break
+        name = "%s/%s-%s-%dw%s" % (DERIVATIVES_DIR, base, fingerprint, width, extension.lower())
+        output_path = os.path.join(settings.MEDIA_ROOT, name)
+        if not os.path.exists(output_path):
+            if not generate:
+                continue
+            height = max(1, int(round(original_height * float(width) / original_width)))
+            _write_derivative(image, (width, height), image_format, output_path)
+        derivatives.append((settings.MEDIA_URL + name, width))
+    derivatives.append((src, original_width))
+    return derivatives
+
+
+def _write_derivative(image, size, image_format, output_path):
+    if not os.path.isdir(os.path.dirname(output_path)):
+        os.makedirs(os.path.dirname(output_path))
+    resample = getattr(Image, 'LANCZOS', None) or Image.ANTIALIAS
+    resized = image.resize(size, resample)
+    options = {'optimize': True}
+    if image_format == 'JPEG':
+        if resized.mode not in ('RGB', 'L'):
+            resized = resized.convert('RGB')
+        options.update(quality=get_image_quality(), progressive=True)
+    #Write to a temporary file first so that nothing is served half an image
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(output_path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            resized.save(f, image_format, **options)
+        os.chmod(temp_path, 0o644)
+        os.rename(temp_path, output_path)
+    except:
+        os.remove(temp_path)
+        raise
+
+
+def _srcset_cache_key(src):
+    return "contentious_srcset_%s" % hashlib.md5(src.encode('utf-8')).hexdigest()
+
+
+def make_srcset(derivatives):
+    return ", ".join("%s %dw" % (url, width) for url, width in derivatives)
+
+
+def get_srcset(src):
+    """ Return the srcset attribute for an <img> with the given src, or an
+        empty string if there are no derivatives of it.  Cached, so that
+        rendering doesn't touch the disk.
+    """
+    key = _srcset_cache_key(src)
+    srcset = cache.get(key)
+    if srcset is None:
+        derivatives = get_derivatives(src)
+        srcset = make_srcset(derivatives) if len(derivatives) > 1 else ""
+        _cache_srcset(src, srcset)
+    return srcset
+
+
+def generate_srcset(src):
+    """ Make the derivatives of the image at the given src (if needed) and
+        store its srcset in the cache.  Returns the srcset.
+    """
+    derivatives = get_derivatives(src, generate=True)
+    srcset = make_srcset(derivatives) if len(derivatives) > 1 else ""
+    _cache_srcset(src, srcset)
+    return srcset
+
+
+def _cache_srcset(src, srcset):
+    if srcset:
+        cache.set(_srcset_cache_key(src), srcset)
+    else:
+        cache.set(_srcset_cache_key(src), srcset, get_srcset_miss_timeout())
+
+
+@receiver(content_saved)
+def generate_derivatives_on_save(sender, key, data, namespace, **kwargs):
+    src = data.get('src')
+    if src and use_image_derivatives():
+        generate_srcset(src)
+
+
+@receiver(content_bulk_saved)
+def generate_derivatives_on_bulk_save(sender, items, namespace, **kwargs):
+    if use_image_derivatives():
+        for src in set(data['src'] for data in items.values() if data.get('src')):
+            generate_srcset(src)
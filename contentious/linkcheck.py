@@ -0,0 +1,238 @@
+#SYSTEM
+import httplib
+import json
+from multiprocessing.pool import ThreadPool
+import os
+import socket
+import tempfile
+import threading
+import time
+import urlparse
+
+#LIBRARIES
+from django.conf import settings
+from django.utils.encoding import iri_to_uri
+
+#The fields whose values are checked
+URL_FIELDS = ('href', 'src')
+SKIPPED_SCHEMES = ('mailto', 'tel', 'javascript', 'data')
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+USER_AGENT = "contentious-linkcheck"
+
+
+def get_base_url():
+    """ The URL which relative href/src values are checked against, e.g.
+        'https://www.example.com/'.  Relative URLs are skipped without it.
+    """
+    return getattr(settings, "CONTENTIOUS_LINKCHECK_BASE_URL", None)
+
+
+def get_linkcheck_cache_path():
+    return getattr(settings, "CONTENTIOUS_LINKCHECK_CACHE", None)
+
+
+def extract_urls(content_dicts, base_url=None):
+    """ Given a dict of namespace -> dict of dicts of content, return a dict
+        of each distinct absolute URL in the href/src values to a sorted list
+        of the (namespace, key, field) which use it.
+    """
+    urls = {}
+    for namespace, content_dict in content_dicts.items():
+        for key, data in content_dict.items():
+            for field in URL_FIELDS:
+                url = make_absolute_url(data.get(field), base_url)
+                if url:
+                    urls.setdefault(url, []).append((namespace, key, field))
+    for uses in urls.values():
+        uses.sort()
+    return urls
+
+
+def make_absolute_url(value, base_url=None):
+    """ Return the http(s) URL to check for the given href/src value, or None
+        if it isn't one which can be checked.
+    """
+    value = (value or "").strip()
+    if not value or value.startswith("#"):
+        return None
+    try:
+        if urlparse.urlparse(value).scheme in SKIPPED_SCHEMES:
+            return None
+        if base_url:
+            value = urlparse.urljoin(base_url, value)
+        elif value.startswith("//"):
+            value = "http:" + value
+        value = urlparse.urldefrag(value)[0]
+        if urlparse.urlparse(value).scheme not in ('http', 'https'):
+            return None
+    except ValueError:
+        #Malformed, e.g. 'http://[oops/', so let the checker report it
+        return value
+    return value
+
+
+class LinkChecker(object):
+    """ Checks lots of URLs concurrently, with:
+            - a pool of `workers` threads, each of which keeps its connections
+              open and reuses them for other URLs on the same host.
+            - at most one request to each host per `host_interval` seconds.
+            - an optional JSON file of results at `cache_path`, so that URLs
+              which were checked less than `max_age` seconds ago aren't
+              checked again.
+        HEAD requests are used, falling back to GET for servers which don't
+        allow HEAD, and redirects are followed.
+    """
+
+    def __init__(self, workers=8, timeout=10, host_interval=0.5, cache_path=None, max_age=24 * 60 * 60):
+        self.workers = workers
+        self.timeout = timeout
+        self.host_interval = host_interval
+        self.cache_path = cache_path
+        self.max_age = max_age
+        self._local = threading.local()
+        self._host_lock = threading.Lock()
+        self._next_request_at = {}
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def check(self, urls):
+        """ Return a dict of each of the given URLs to a dict of its result:
+                ok - True if it ended up at a 2xx response.
+                status - the final HTTP status, or None if there wasn't one.
+                error - a description of what went wrong, or None.
+                checked - the timestamp when it was checked.
+        """
+        urls = set(urls)
+        results = self.load_cache()
+        now = time.time()
+        results = {
+            url: result for url, result in results.items()
+            if url in urls and now - result['checked'] < self.max_age
+        }
+        to_check = sorted(urls - set(results))
+        if to_check:
+            pool = ThreadPool(min(self.workers, len(to_check)))
+            try:
+                for url, result in pool.imap_unordered(self._check_url, to_check):
+                    results[url] = result
+            finally:
+                pool.close()
+                pool.join()
+                self._close_connections()
+            self.save_cache(results)
+        return results
+
+    def load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except ValueError:
+            return {}
+
+    def save_cache(self, results):
+        """ Merge the results into the cache file, which is replaced atomically. """
+        if not self.cache_path:
+            return
+        cached = self.load_cache()
+        cached.update(results)
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.cache_path)), suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as f:
+                json.dump(cached, f, indent=1, sort_keys=True)
+            os.rename(temp_path, self.cache_path)
+        except:
+            os.remove(temp_path)
+            raise
+
+    def _check_url(self, url):
+        result = {'ok': False, 'status': None, 'error': None, 'checked': time.time()}
+        current_url = url
+        method = 'HEAD'
+        redirects = 0
+        while True:
+            try:
+                status, location = self._request(method, current_url)
+            except Exception as e:
+                #Anything wrong with one URL mustn't stop the others being checked
+                result['error'] = "%s: %s" % (e.__class__.__name__, e)
+                break
+            if status in (405, 501) and method == 'HEAD':
+                method = 'GET'
+                continue
+            if status in REDIRECT_STATUSES and location:
+                redirects += 1
+                current_url = urlparse.urljoin(current_url, location)
+                if redirects > MAX_REDIRECTS:
+                    result['error'] = "Too many redirects"
+                    break
+                if urlparse.urlparse(current_url).scheme not in ('http', 'https'):
+                    result['error'] = "Redirected to %s" % current_url
+                    break
+                continue
+            result['status'] = status
+            result['ok'] = 200 <= status < 300
+            break
+        if current_url != url:
+            result['redirected_to'] = current_url
+        return url, result
+
+    def _request(self, method, url):
+        """ Make the request on this thread's connection to the host (retrying
+            once on a fresh connection if the kept-alive one has been dropped)
+            and return the status and Location header.
+        """
+        #The URLs come from the content as unicode, which httplib can't send
+        parsed = urlparse.urlparse(iri_to_uri(url))
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        self._wait_for_host(parsed.netloc)
+        for attempt in (1, 2):
+            connection = self._get_connection(parsed.scheme, parsed.netloc)
+            try:
+                connection.request(method, path, headers={'User-Agent': USER_AGENT})
+                response = connection.getresponse()
+                #Read it all so that the connection can be reused
+                response.read()
+            except (httplib.HTTPException, socket.error):
+                self._drop_connection(parsed.scheme, parsed.netloc)
+                if attempt == 2:
+                    raise
+                continue
+            if response.getheader('connection', '').lower() == 'close':
+                self._drop_connection(parsed.scheme, parsed.netloc)
+            return response.status, response.getheader('location')
+
+    def _wait_for_host(self, host):
+        """ Sleep until this thread's turn to make a request to the host. """
+        with self._host_lock:
+            now = time.time()
+            at = max(now, self._next_request_at.get(host, 0))
+            self._next_request_at[host] = at + self.host_interval
+        if at > now:
+            time.sleep(at - now)
+
+    def _get_connection(self, scheme, netloc):
+        connections = self._local.__dict__.setdefault('connections', {})
+        connection = connections.get((scheme, netloc))
+        if connection is None:
+            connection_class = httplib.HTTPSConnection if scheme == 'https' else httplib.HTTPConnection
+            connection = connection_class(netloc, timeout=self.timeout)
+            connections[(scheme, netloc)] = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop_connection(self, scheme, netloc):
+        connection = self._local.__dict__.get('connections', {}).pop((scheme, netloc), None)
+        if connection is not None:
+            connection.close()
+
+    def _close_connections(self):
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
@@ -0,0 +1,179 @@
+#SYSTEM
+from collections import defaultdict
+import random
+import threading
+import time
+
+#LIBRARIES
+from django.core.urlresolvers import reverse
+from django.db import connection, connections, reset_queries
+from django.template import RequestContext, Template
+from django.test.client import Client, RequestFactory
+
+#CONTENTIOUS
+from contentious.api import api, get_optional_method
+from contentious.signals import content_loaded
+
+LOADTEST_KEY_PREFIX = "loadtest_"
+
+
+def percentile(values, pct):
+    """ Return the pct'th percentile of the given values (nearest rank). """
+    if not values:
+        return None
+    values = sorted(values)
+    index = int(round(pct / 100.0 * (len(values) - 1)))
+    return values[index]
+
+
+def max_overlap(intervals):
+    """ Given a list of (start, end) tuples, return the largest number of them
+        which overlap at any one time.
+    """
+    events = sorted([(start, 1) for start, end in intervals] + [(end, -1) for start, end in intervals])
+    current = highest = 0
+    for when, change in events:
+        current += change
+        highest = max(highest, current)
+    return highest
+
+
+def make_page_template(num_editables):
+    """ Return a Template with lots of {% editable %} tags in it. """
+    tags = [
+        '{%% editable p "%s%d" editable="content,title" title="Title" %%}Default %d{%% endeditable %%}'
+        % (LOADTEST_KEY_PREFIX, i, i) for i in range(num_editables)
+    ]
+    return Template("{% load contentious %}<html><body>" + "".join(tags) + "</body></html>")
+
+
+class LoadTestStats(object):
+    """ Thread-safe collector of the timings from a load test. """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.queries = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.loads = defaultdict(list)
+
+    def record(self, kind, seconds, queries, error=False):
+        with self.lock:
+            self.timings[kind].append(seconds)
+            self.queries[kind] += queries
+            if error:
+                self.errors[kind] += 1
+
+    def record_load(self, sender, namespace, started, finished, **kwargs):
+        with self.lock:
+            self.loads[namespace].append((started, finished))
+
+    def report(self, elapsed):
+        """ Return a dict of the results. """
+        report = {"elapsed": elapsed}
+        for kind, timings in self.timings.items():
+            report[kind] = {
+                "count": len(timings),
+                "errors": self.errors[kind],
+                "per_second": len(timings) / elapsed,
+                "p50": percentile(timings, 50),
+                "p99": percentile(timings, 99),
+                "queries": self.queries[kind],
+            }
+        report["content_loads"] = {
+            namespace: {"count": len(loads), "max_concurrent": max_overlap(loads)}
+            for namespace, loads in self.loads.items()
+        }
+        return report
+
+
+class LoadTest(object):
+    """ Simulates `readers` threads rendering pages with lots of editables while
+        `editors` threads save content, for `duration` seconds.
+
+        Readers GET `url` with the test client, or if there's no url they render
+        a page with `num_editables` editables directly.  Editors POST to the
+        contentious save_content view, logged in with `editor_credentials` if
+        given.  Everything runs in this process against the configured database
+        and cache, so point it at a local SQLite database and locmem cache.
+    """
+
+    def __init__(self, readers=10, editors=1, duration=10, url=None, num_editables=100,
+            editor_interval=1.0, editor_credentials=None, language=None):
+        self.readers = readers
+        self.editors = editors
+        self.duration = duration
+        self.url = url
+        self.num_editables = num_editables
+        self.editor_interval = editor_interval
+        self.editor_credentials = editor_credentials
+        self.language = language
+        self.stats = LoadTestStats()
+        self.template = make_page_template(num_editables)
+
+    def run(self):
+        """ Run the test and return a dict of the results. """
+        content_loaded.connect(self.stats.record_load)
+        self.stop_at = time.time() + self.duration
+        threads = [threading.Thread(target=self._worker, args=(self.read,)) for i in range(self.readers)]
+        threads += [threading.Thread(target=self._worker, args=(self.edit,)) for i in range(self.editors)]
+        start = time.time()
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            content_loaded.disconnect(self.stats.record_load)
+        return self.stats.report(time.time() - start)
+
+    def delete_content(self):
+        """ Delete the content which the editors may have saved, from each API. """
+        keys = ["%s%d" % (LOADTEST_KEY_PREFIX, i) for i in range(self.num_editables)]
+        for alias, content_api in api.get_apis():
+            delete_content = get_optional_method(content_api, 'delete_content')
+            if delete_content is not None:
+                delete_content(keys)
+
+    def _worker(self, action):
+        #Each thread has its own DB connection, which needs to log queries so we can count them
+        connection.use_debug_cursor = True
+        client = Client()
+        try:
+            if action == self.edit and self.editor_credentials:
+                client.login(**self.editor_credentials)
+            while time.time() < self.stop_at:
+                action(client)
+        finally:
+            for conn in connections.all():
+                conn.close()
+
+    def _timed(self, kind, function):
+        reset_queries()
+        start = time.time()
+        error = False
+        try:
+            error = not function()
+        except Exception:
+            error = True
+        self.stats.record(kind, time.time() - start, len(connection.queries), error)
+
+    def read(self, client):
+        if self.url:
+            self._timed("read", lambda: client.get(self.url).status_code == 200)
+        else:
+            self._timed("read", self._render_page)
+
+    def _render_page(self):
+        request = RequestFactory().get("/")
+        request.language = self.language
+        return bool(self.template.render(RequestContext(request)))
+
+    def edit(self, client):
+        data = {
+            "key": "%s%d" % (LOADTEST_KEY_PREFIX, random.randrange(self.num_editables)),
+            "content": "Edited at %f" % time.time(),
+        }
+        url = reverse("contentious_save_content")
+        self._timed("edit", lambda: client.post(url, data).status_code == 200)
+        time.sleep(self.editor_interval)
@@ -0,0 +1,81 @@
+#SYSTEM
+import json
+from optparse import make_option
+
+#LIBRARIES
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.api import api
+from contentious.baking import (
+    bake_templates,
+    get_baked_templates_dir,
+)
+from contentious.manifest import find_template_files
+
+
+class Command(BaseCommand):
+    args = "[template_name template_name ...]"
+    help = (
+        "Writes 'baked' copies of templates (defaults to all of them) in which "
+        "{% editable %} tags with constant arguments are replaced by their HTML, "
+        "as rendered outside of edit mode with the current published content."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--output', '-o', dest='output', default=None,
+            help="Directory to write to. Defaults to settings.CONTENTIOUS_BAKED_TEMPLATES_DIR."
+        ),
+        make_option(
+            '--language', '-l', action='append', dest='languages', default=[],
+            help="Language to bake. Can be given more than once. Defaults to settings.LANGUAGES."
+        ),
+        make_option(
+            '--snapshot', dest='snapshot', default=None,
+            help=(
+                "Path to a JSON file of a dict of dicts of the content to use, which may "
+                "contain %(language)s.  Defaults to loading it with the API's load_content_dict."
+            )
+        ),
+    )
+
+    def handle(self, *template_names, **options):
+        verbosity = int(options['verbosity'])
+        output_dir = options['output'] or get_baked_templates_dir()
+        if not output_dir:
+            raise CommandError("Give --output or set CONTENTIOUS_BAKED_TEMPLATES_DIR")
+        languages = options['languages'] or [code for code, name in settings.LANGUAGES]
+
+        template_files = find_template_files()
+        if template_names:
+            missing = set(template_names) - set(template_files)
+            if missing:
+                raise CommandError("Templates not found: %s" % ", ".join(sorted(missing)))
+            template_files = {name: template_files[name] for name in template_names}
+
+        for language in languages:
+            content_dict = self.get_snapshot(language, options['snapshot'])
+            #Only a bake of every template knows which baked files are stale
+            results = bake_templates(
+                template_files, language, content_dict, output_dir, remove_others=not template_names
+            )
+            if verbosity:
+                baked = sum(b for b, l in results.values())
+                left = sum(l for b, l in results.values())
+                self.stdout.write("%s: baked %d editables in %d templates, left %d live" % (
+                    language, baked, len(results), left
+                ))
+            if verbosity > 1:
+                for name, (baked, left) in sorted(results.items()):
+                    self.stdout.write("  %s: %d baked, %d live" % (name, baked, left))
+
+    def get_snapshot(self, language, snapshot_path):
+        if snapshot_path:
+            with open(snapshot_path % {'language': language}) as f:
+                return json.load(f)
+        try:
+            return api.load_content_dict(language)
+        except AttributeError:
+            raise CommandError("The API does not implement load_content_dict(), use --snapshot")
@@ -0,0 +1,63 @@
+#SYSTEM
+from optparse import make_option
+
+#LIBRARIES
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.api import api
+from contentious.linkcheck import (
+    LinkChecker,
+    extract_urls,
+    get_base_url,
+    get_linkcheck_cache_path,
+)
+
+
+class Command(BaseCommand):
+    args = "[namespace namespace ...]"
+    help = (
+        "Checks that the URLs in the stored content's href and src values work, "
+        "for all namespaces (e.g. languages) or just the given ones, and lists "
+        "the broken ones with the keys which use them."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option('--workers', dest='workers', type='int', default=8,
+            help="The number of URLs to check at once."),
+        make_option('--timeout', dest='timeout', type='float', default=10,
+            help="Seconds to wait for each response."),
+        make_option('--host-interval', dest='host_interval', type='float', default=0.5,
+            help="Minimum seconds between requests to the same host."),
+        make_option('--cache', dest='cache_path', default=None,
+            help="JSON file of results to reuse. Defaults to settings.CONTENTIOUS_LINKCHECK_CACHE."),
+        make_option('--max-age', dest='max_age', type='int', default=24 * 60 * 60,
+            help="Recheck cached results which are older than this many seconds."),
+        make_option('--base-url', dest='base_url', default=None,
+            help="Check relative URLs against this. Defaults to settings.CONTENTIOUS_LINKCHECK_BASE_URL."),
+    )
+
+    def handle(self, *namespaces, **options):
+        verbosity = int(options['verbosity'])
+        try:
+            namespaces = list(namespaces) or api.get_content_namespaces()
+            content_dicts = {namespace: api.load_content_dict(namespace) for namespace in namespaces}
+        except AttributeError:
+            raise CommandError(
+                "The API does not implement get_content_namespaces() and load_content_dict()"
+            )
+        urls = extract_urls(content_dicts, options['base_url'] or get_base_url())
+        checker = LinkChecker(
+            workers=options['workers'], timeout=options['timeout'],
+            host_interval=options['host_interval'],
+            cache_path=options['cache_path'] or get_linkcheck_cache_path(), max_age=options['max_age'],
+        )
+        results = checker.check(urls)
+        broken = sorted(url for url, result in results.items() if not result['ok'])
+        for url in broken:
+            result = results[url]
+            self.stdout.write(u"%s\t%s" % (result['status'] or result['error'], url))
+            for namespace, key, field in urls[url]:
+                self.stdout.write(u"\t%s\t%s\t%s" % (namespace, key, field))
+        if verbosity:
+            self.stdout.write("%d of %d URLs are broken" % (len(broken), len(urls)))
@@ -0,0 +1,23 @@
+#LIBRARIES
+from django.core.management.base import BaseCommand
+
+#CONTENTIOUS
+from contentious.contrib.basictrans.api import BasicTranslationAPI
+from contentious.contrib.basictrans.catalogs import get_catalog_path
+
+
+class Command(BaseCommand):
+    args = "[language language ...]"
+    help = (
+        "Compiles the basictrans translations into gettext catalogs in "
+        "settings.CONTENTIOUS_LOCALE_DIR, for all languages or just the given "
+        "ones, for the GettextTranslationAPI to read."
+    )
+
+    def handle(self, *languages, **options):
+        verbosity = int(options['verbosity'])
+        api = BasicTranslationAPI()
+        for language in list(languages) or api.get_content_namespaces():
+            count = api.compile_catalog(language)
+            if verbosity:
+                self.stdout.write("%s: %d messages in %s" % (language, count, get_catalog_path(language)))
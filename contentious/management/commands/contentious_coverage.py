@@ -0,0 +1,82 @@
+#SYSTEM
+import csv
+import json
+from optparse import make_option
+
+#LIBRARIES
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.contrib.basictrans.coverage import (
+    STATUSES,
+    get_coverage,
+    get_source_language,
+    iter_coverage_keys,
+)
+from contentious.manifest import get_manifest_keys, load_manifest
+
+
+class LineWriter(object):
+    """ File-like object for csv.writer which writes each line to the command's output. """
+
+    def __init__(self, stdout):
+        self.stdout = stdout
+
+    def write(self, line):
+        self.stdout.write(line.rstrip("\r\n"))
+
+
+class Command(BaseCommand):
+    args = "[language language ...]"
+    help = (
+        "Reports how many keys of the source language are missing, stale "
+        "(saved before the source changed) or identical to the source in each "
+        "language (defaults to settings.LANGUAGES), or lists those keys with --keys."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option('--source', dest='source', default=None,
+            help="The source language. Defaults to settings.CONTENTIOUS_SOURCE_LANGUAGE or LANGUAGE_CODE."),
+        make_option('--keys', action='store_true', dest='keys', default=False,
+            help="List the keys rather than counting them."),
+        make_option('--status', action='append', dest='statuses', default=[],
+            help="Only list keys with this status (%s). Can be given more than once." % ", ".join(STATUSES)),
+        make_option('--manifest', action='store_true', dest='manifest', default=False,
+            help="Only include the keys in the key manifest (see contentious_scan)."),
+        make_option('--format', dest='format', default='csv', choices=['csv', 'json'],
+            help="csv (the default) or json, which is written one object per line."),
+    )
+
+    def handle(self, *languages, **options):
+        languages = list(languages) or None
+        source_language = options['source'] or get_source_language()
+        keys = None
+        if options['manifest']:
+            manifest = load_manifest()
+            if manifest is None:
+                raise CommandError("Run contentious_scan to make the key manifest first")
+            keys = get_manifest_keys(manifest)
+        statuses = options['statuses'] or STATUSES
+        for status in statuses:
+            if status not in STATUSES:
+                raise CommandError("Unknown status: %s" % status)
+
+        if options['keys']:
+            fields = ('language', 'key', 'status')
+            rows = iter_coverage_keys(languages, source_language, keys, statuses)
+        else:
+            fields = ('language', 'total', 'translated') + STATUSES
+            coverage = get_coverage(languages, source_language, keys)
+            rows = (
+                [language] + [coverage[language][field] for field in fields[1:]]
+                for language in sorted(coverage)
+            )
+
+        if options['format'] == 'json':
+            for row in rows:
+                self.stdout.write(json.dumps(dict(zip(fields, row)), sort_keys=True))
+        else:
+            writer = csv.writer(LineWriter(self.stdout))
+            writer.writerow(fields)
+            for row in rows:
+                writer.writerow([unicode(value).encode('utf-8') for value in row])
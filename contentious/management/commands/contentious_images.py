@@ -0,0 +1,34 @@
+#LIBRARIES
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.api import api
+from contentious.images import generate_srcset, use_image_derivatives
+
+
+class Command(BaseCommand):
+    args = "[namespace namespace ...]"
+    help = (
+        "Makes the resized versions of the images in the stored content's src "
+        "values, for all namespaces (e.g. languages) or just the given ones.  "
+        "Images which already have them are skipped."
+    )
+
+    def handle(self, *namespaces, **options):
+        verbosity = int(options['verbosity'])
+        if not use_image_derivatives():
+            raise CommandError("Set CONTENTIOUS_IMAGE_DERIVATIVES = True and install PIL/Pillow")
+        try:
+            namespaces = list(namespaces) or api.get_content_namespaces()
+            content_dicts = [api.load_content_dict(namespace) for namespace in namespaces]
+        except AttributeError:
+            raise CommandError(
+                "The API does not implement get_content_namespaces() and load_content_dict()"
+            )
+        srcs = set()
+        for content_dict in content_dicts:
+            srcs.update(data['src'] for data in content_dict.values() if data.get('src'))
+        for src in sorted(srcs):
+            srcset = generate_srcset(src)
+            if verbosity:
+                self.stdout.write("%s: %s" % (src, srcset or "no derivatives"))
@@ -0,0 +1,85 @@
+#SYSTEM
+from optparse import make_option
+
+#LIBRARIES
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.loadtest import LoadTest
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs concurrent readers rendering pages full of editables while editors "
+        "save content, and reports throughput, latency, DB queries and content "
+        "reloads.  It saves content, so only run it against a local database."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option('--readers', dest='readers', type='int', default=10,
+            help="Number of concurrent readers."),
+        make_option('--editors', dest='editors', type='int', default=1,
+            help="Number of concurrent editors."),
+        make_option('--duration', dest='duration', type='float', default=10,
+            help="How long to run for, in seconds."),
+        make_option('--url', dest='url', default=None,
+            help="URL for readers to GET. Defaults to rendering a page of --editables editables."),
+        make_option('--editables', dest='num_editables', type='int', default=100,
+            help="Number of editables on the generated page, and of keys which editors save."),
+        make_option('--editor-interval', dest='editor_interval', type='float', default=1.0,
+            help="Seconds each editor waits between saves."),
+        make_option('--editor-username', dest='username', default=None,
+            help="Username for the editors to log in with."),
+        make_option('--editor-password', dest='password', default=None,
+            help="Password for the editors to log in with."),
+        make_option('--language', dest='language', default=None,
+            help="request.language for the generated page."),
+        make_option('--any-database', action='store_true', dest='any_database', default=False,
+            help="Run even if the default database isn't SQLite."),
+    )
+
+    def handle(self, *args, **options):
+        engine = settings.DATABASES['default']['ENGINE']
+        if not engine.endswith('sqlite3') and not options['any_database']:
+            raise CommandError(
+                "This saves content, so it only runs against SQLite unless you give --any-database"
+            )
+        credentials = None
+        if options['username']:
+            credentials = {'username': options['username'], 'password': options['password']}
+
+        load_test = LoadTest(
+            readers=options['readers'],
+            editors=options['editors'],
+            duration=options['duration'],
+            url=options['url'],
+            num_editables=options['num_editables'],
+            editor_interval=options['editor_interval'],
+            editor_credentials=credentials,
+            language=options['language'],
+        )
+        try:
+            report = load_test.run()
+        finally:
+            #Don't leave the editors' content behind, even if the test was interrupted
+            load_test.delete_content()
+
+        self.stdout.write("Ran for %.1fs" % report['elapsed'])
+        for kind in ('read', 'edit'):
+            if kind not in report:
+                continue
+            stats = report[kind]
+            self.stdout.write(
+                "%s: %d (%.1f/s), %d errors, p50 %.1fms, p99 %.1fms, %.1f queries each" % (
+                    kind, stats['count'], stats['per_second'], stats['errors'],
+                    stats['p50'] * 1000, stats['p99'] * 1000,
+                    float(stats['queries']) / stats['count'],
+                )
+            )
+        for namespace, loads in sorted(report['content_loads'].items()):
+            self.stdout.write(
+                "content loads for %s: %d, up to %d at once" % (
+                    namespace, loads['count'], loads['max_concurrent']
+                )
+            )
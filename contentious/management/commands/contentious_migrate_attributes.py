@@ -0,0 +1,60 @@
+#SYSTEM
+import json
+from optparse import make_option
+
+#LIBRARIES
+from django.core.management.base import BaseCommand
+from django.db import models
+
+#CONTENTIOUS
+from contentious.contrib.common.db import atomic, get_write_db
+from contentious.contrib.common.models import ContentItemBase
+
+
+class Command(BaseCommand):
+    help = (
+        "Copies the non-empty HTML attribute columns (href, src, title, target) "
+        "of the stored content into the `attributes` JSON, for switching on "
+        "CONTENTIOUS_SPARSE_ATTRIBUTES.  Values already in the JSON are kept."
+    )
+    option_list = BaseCommand.option_list + (
+        make_option('--clear', action='store_true', dest='clear', default=False,
+            help="Empty the columns after copying them."),
+        make_option('--batch-size', dest='batch_size', type='int', default=500,
+            help="The number of items to update in each transaction."),
+    )
+
+    def handle(self, *args, **options):
+        verbosity = int(options['verbosity'])
+        for model in models.get_models():
+            if issubclass(model, ContentItemBase):
+                count = self.migrate_model(model, options['clear'], options['batch_size'])
+                if verbosity:
+                    self.stdout.write("%s: %d items updated" % (model._meta.object_name, count))
+
+    def migrate_model(self, model, clear, batch_size):
+        using = get_write_db()
+        columns = [field for field in model.content_fields if field != 'content']
+        pks = list(model.objects.using(using).order_by('pk').values_list('pk', flat=True))
+        updated = 0
+        for start in range(0, len(pks), batch_size):
+            with atomic(using=using):
+                batch = model.objects.using(using).filter(pk__in=pks[start:start + batch_size])
+                for obj in batch.select_for_update():
+                    attributes = obj.attributes_dict
+                    changes = {}
+                    for column in columns:
+                        value = getattr(obj, column)
+                        if value:
+                            attributes.setdefault(column, value)
+                            if clear:
+                                changes[column] = ''
+                    new_attributes = json.dumps(attributes, sort_keys=True) if attributes else ''
+                    if new_attributes != obj.attributes:
+                        changes['attributes'] = new_attributes
+                    if changes:
+                        #update() rather than save(), so that `modified` is left alone, as
+                        #the content hasn't changed (e.g. for the translation coverage)
+                        model.objects.using(using).filter(pk=obj.pk).update(**changes)
+                        updated += 1
+        return updated
@@ -0,0 +1,66 @@
+#SYSTEM
+from optparse import make_option
+
+#LIBRARIES
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.api import api
+
+
+class Command(BaseCommand):
+    args = "<find> <replacement>"
+    help = (
+        "Finds and replaces text in the stored content, e.g. when a domain or "
+        "CDN path changes, in one transaction and with one cache invalidation."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option('--regex', action='store_true', dest='regex', default=False,
+            help="<find> is a regular expression, and <replacement> can use its groups, e.g. \\1."),
+        make_option('--field', '-f', action='append', dest='fields', default=[],
+            help="Only replace in this field, e.g. href or src. Can be given more than once."),
+        make_option('--namespace', '-n', action='append', dest='namespaces', default=[],
+            help="Only replace in this namespace, e.g. a language. Can be given more than once."),
+        make_option('--key-prefix', dest='key_prefix', default=None,
+            help="Only replace in keys starting with this."),
+        make_option('--alias', dest='alias', default=None,
+            help="With CONTENTIOUS_API_ROUTER, only replace in the API with this alias. Defaults to all of them."),
+        make_option('--dry-run', action='store_true', dest='dry_run', default=False,
+            help="Show what would be changed without changing it."),
+    )
+
+    def handle(self, *args, **options):
+        verbosity = int(options['verbosity'])
+        if len(args) != 2:
+            raise CommandError("Give the text to find and its replacement")
+        find, replacement = args
+        if not find:
+            raise CommandError("The text to find can't be empty")
+        try:
+            apis = api.get_apis(options['alias'])
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+        changes = []
+        for alias, content_api in apis:
+            try:
+                api_changes = content_api.replace_content(
+                    find, replacement, fields=options['fields'] or None,
+                    namespaces=options['namespaces'] or None, key_prefix=options['key_prefix'],
+                    regex=options['regex'], dry_run=options['dry_run'],
+                )
+            except AttributeError:
+                raise CommandError("The API does not implement replace_content()")
+            if options['dry_run'] or verbosity > 1:
+                prefix = u"%s\t" % alias if alias is not None else u""
+                for change in api_changes:
+                    self.stdout.write(
+                        prefix + u"%(namespace)s\t%(key)s\t%(variant)s\t%(field)s\t%(old)r -> %(new)r" % change
+                    )
+            changes += api_changes
+        if verbosity:
+            self.stdout.write("%s %d values in %d keys" % (
+                "Would change" if options['dry_run'] else "Changed",
+                len(changes), len(set(change['key'] for change in changes)),
+            ))
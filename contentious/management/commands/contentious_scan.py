@@ -0,0 +1,115 @@
+#SYSTEM
+from optparse import make_option
+
+#LIBRARIES
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.api import api
+from contentious.manifest import (
+    build_manifest,
+    get_manifest_keys,
+    get_manifest_path,
+    write_manifest,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Scans all templates for {% editable %} tags, writes a manifest of the "
+        "keys used and reports (or deletes) stored content for keys which are "
+        "no longer used by any template."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--output', '-o', dest='output', default=None,
+            help="Path to write the manifest to. Defaults to settings.CONTENTIOUS_KEY_MANIFEST."
+        ),
+        make_option(
+            '--orphans', action='store_true', dest='orphans', default=False,
+            help="Report stored keys which are not used by any template."
+        ),
+        make_option(
+            '--delete', action='store_true', dest='delete', default=False,
+            help="Delete the stored content for orphaned keys."
+        ),
+        make_option(
+            '--keep-prefix', action='append', dest='keep_prefixes', default=[],
+            help="Never treat keys starting with this prefix as orphaned. Can be given more than once."
+        ),
+        make_option(
+            '--alias', dest='alias', default=None,
+            help="With CONTENTIOUS_API_ROUTER, only look at the API with this alias. Defaults to all of them."
+        ),
+        make_option(
+            '--ignore-dynamic', action='store_true', dest='ignore_dynamic', default=False,
+            help="Allow --delete even though some templates have keys which are variables."
+        ),
+    )
+
+    def handle(self, *args, **options):
+        verbosity = int(options['verbosity'])
+        manifest, errors = build_manifest()
+        for name, error in sorted(errors.items()):
+            self.stderr.write("Could not parse %s: %s" % (name, error))
+
+        output = options['output'] or get_manifest_path()
+        if output:
+            write_manifest(manifest, output)
+            if verbosity:
+                self.stdout.write("Wrote manifest of %d templates to %s" % (
+                    len(manifest['templates']), output
+                ))
+
+        dynamic = sorted(
+            name for name, info in manifest['templates'].items() if info['dynamic']
+        )
+        if verbosity > 1:
+            for name in dynamic:
+                self.stdout.write("%s uses keys which are variables" % name)
+
+        if not (options['orphans'] or options['delete']):
+            return
+
+        if options['delete'] and errors:
+            raise CommandError(
+                "Not deleting anything because %d templates could not be parsed, so "
+                "the keys which they use are missing from the manifest." % len(errors)
+            )
+
+        try:
+            apis = api.get_apis(options['alias'])
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+        if options['delete'] and dynamic and not options['ignore_dynamic']:
+            raise CommandError(
+                "Not deleting anything because %d templates use keys which are "
+                "variables, so some 'orphans' may still be in use. Use --keep-prefix "
+                "and --ignore-dynamic if you're sure." % len(dynamic)
+            )
+        used_keys = get_manifest_keys(manifest)
+        keep_prefixes = tuple(options['keep_prefixes'])
+        for alias, content_api in apis:
+            try:
+                stored_keys = set(content_api.get_stored_keys())
+            except AttributeError:
+                raise CommandError("The API does not implement get_stored_keys()")
+            orphans = sorted(
+                key for key in stored_keys - used_keys
+                if not (keep_prefixes and key.startswith(keep_prefixes))
+            )
+            prefix = "%s\t" % alias if alias is not None else ""
+            for key in orphans:
+                self.stdout.write(prefix + key)
+            if verbosity:
+                self.stdout.write("%s%d of %d stored keys are orphaned" % (prefix, len(orphans), len(stored_keys)))
+
+            if options['delete'] and orphans:
+                try:
+                    content_api.delete_content(orphans)
+                except AttributeError:
+                    raise CommandError("The API does not implement delete_content()")
+                if verbosity:
+                    self.stdout.write("%sDeleted content for %d keys" % (prefix, len(orphans)))
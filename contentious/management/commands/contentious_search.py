@@ -0,0 +1,61 @@
+#SYSTEM
+from optparse import make_option
+
+#LIBRARIES
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.api import api
+from contentious.search import get_search_index
+
+
+class Command(BaseCommand):
+    args = "<query>"
+    help = (
+        "Searches the full-text index of the stored content and prints the "
+        "matching keys, namespaces (e.g. languages), fields and snippets."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option('--namespace', '-n', dest='namespace', default=None,
+            help="Only search in this namespace, e.g. a language."),
+        make_option('--field', '-f', action='append', dest='fields', default=[],
+            help="Only search this field, e.g. content or href. Can be given more than once."),
+        make_option('--limit', dest='limit', type='int', default=50,
+            help="Maximum number of results."),
+        make_option('--rebuild', action='store_true', dest='rebuild', default=False,
+            help="Rebuild the index from all of the stored content first."),
+        make_option('--alias', dest='alias', default=None,
+            help="With CONTENTIOUS_API_ROUTER, rebuild the index from the API with this alias "
+                 "rather than the default one."),
+    )
+
+    def handle(self, *args, **options):
+        index = get_search_index()
+        if index is None:
+            raise CommandError("Set CONTENTIOUS_SEARCH_INDEX to enable searching")
+        if options['rebuild']:
+            try:
+                if options['alias'] is not None:
+                    (alias, content_api), = api.get_apis(options['alias'])
+                else:
+                    content_api = api.get_api_for_context()
+                count = index.rebuild(content_api)
+            except ImproperlyConfigured as e:
+                raise CommandError(e)
+            except AttributeError:
+                raise CommandError(
+                    "The API does not implement get_content_namespaces() and load_content_dict()"
+                )
+            self.stdout.write("Indexed %d keys" % count)
+        if not args:
+            if options['rebuild']:
+                return
+            raise CommandError("Give a search query")
+        try:
+            results = index.search(" ".join(args), options['namespace'], options['fields'], options['limit'])
+        except ValueError as e:
+            raise CommandError(e)
+        for result in results:
+            self.stdout.write(u"%(key)s\t%(namespace)s\t%(field)s\t%(snippet)s" % result)
@@ -0,0 +1,96 @@
+#SYSTEM
+from optparse import make_option
+import time
+
+#LIBRARIES
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+#CONTENTIOUS
+from contentious.api import api
+from contentious.warming import (
+    get_cache_max_item_size,
+    warm_caches,
+)
+
+
+class Command(BaseCommand):
+    args = "[namespace namespace ...]"
+    help = (
+        "Rebuilds the cached content for all namespaces (e.g. languages), or "
+        "just the given ones.  Run it after a deploy or a cache restart."
+    )
+
+    option_list = BaseCommand.option_list + (
+        make_option(
+            '--workers', '-w', dest='workers', type='int', default=4,
+            help="Number of namespaces to load in parallel."
+        ),
+        make_option(
+            '--alias', dest='alias', default=None,
+            help="With CONTENTIOUS_API_ROUTER, only warm the API with this alias. Defaults to all of them."
+        ),
+        make_option(
+            '--check-size', action='store_true', dest='check_size', default=False,
+            help="Check that each payload fits in settings.CONTENTIOUS_CACHE_MAX_ITEM_SIZE."
+        ),
+    )
+
+    def handle(self, *namespaces, **options):
+        verbosity = int(options['verbosity'])
+        check_size = options['check_size']
+        max_size = get_cache_max_item_size()
+        try:
+            apis = api.get_apis(options['alias'])
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+        results = []
+        too_big = []
+        start = time.time()
+        for alias, content_api in apis:
+            if alias is not None and verbosity:
+                self.stdout.write("Warming %s" % alias)
+            results += self.warm(content_api, namespaces, options, too_big)
+        if verbosity:
+            self.stdout.write("Warmed %d namespaces in %.2fs" % (len(results), time.time() - start))
+
+        failed = [r for r in results if r.error is not None]
+        for result in too_big:
+            self.stderr.write("%s is %d bytes, which is more than the cache limit of %d bytes" % (
+                result.namespace, result.size, max_size
+            ))
+        if failed or too_big:
+            raise CommandError("%d namespaces failed, %d are too big for the cache" % (len(failed), len(too_big)))
+
+    def warm(self, content_api, namespaces, options, too_big):
+        """ Warm the given API's caches, and return the list of WarmResults. """
+        verbosity = int(options['verbosity'])
+        check_size = options['check_size']
+        max_size = get_cache_max_item_size()
+        try:
+            namespaces = list(namespaces) or content_api.get_content_namespaces()
+        except AttributeError:
+            raise CommandError("The API does not implement get_content_namespaces()")
+        total = len(namespaces)
+        done = []
+
+        def report(result):
+            done.append(result)
+            if result.error is not None:
+                self.stderr.write("[%d/%d] %s: failed: %s" % (len(done), total, result.namespace, result.error))
+                return
+            if check_size and result.size > max_size:
+                too_big.append(result)
+            if verbosity:
+                size = " (%d bytes)" % result.size if check_size else ""
+                self.stdout.write("[%d/%d] %s: %d items in %.2fs%s" % (
+                    len(done), total, result.namespace, result.items, result.seconds, size
+                ))
+
+        return warm_caches(
+            api=content_api,
+            namespaces=namespaces,
+            workers=options['workers'],
+            check_size=check_size,
+            callback=report,
+        )
@@ -0,0 +1,148 @@
+#SYSTEM
+import json
+import os
+import threading
+
+#LIBRARIES
+from django.conf import settings
+from django.template import loader, TemplateDoesNotExist, TemplateSyntaxError, Variable
+
+_manifest = None
+_manifest_lock = threading.Lock()
+
+
+def literal_value(filter_expression):
+    """ Given a FilterExpression from a template tag, return its value if it's
+        a literal string (with no filters), otherwise return None.
+    """
+    if filter_expression is None or filter_expression.filters:
+        return None
+    var = filter_expression.var
+    if isinstance(var, Variable):
+        var = var.literal
+    if isinstance(var, basestring):
+        return unicode(var)
+    return None
+
+
+def find_template_files():
+    """ Return a dict mapping the names of all of the template files in
+        settings.TEMPLATE_DIRS and in the 'templates' folders of the installed
+        apps to their paths.  Where a name exists in more than one place, the
+        first one wins, as it does for the template loaders.
+    """
+    from django.template.loaders.app_directories import app_template_dirs
+    files = {}
+    for template_dir in list(settings.TEMPLATE_DIRS) + list(app_template_dirs):
+        for dirpath, dirnames, filenames in os.walk(template_dir):
+            for filename in filenames:
+                if filename.startswith("."):
+                    continue
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, template_dir).replace(os.sep, "/")
+                files.setdefault(name, path)
+    return files
+
+
+def find_template_names():
+    """ Return the names of all of the template files in settings.TEMPLATE_DIRS
+        and in the 'templates' folders of the installed apps.
+    """
+    return sorted(find_template_files())
+
+
+def scan_template(template_name):
+    """ Parse the given template with the template engine and return a dict
+        describing the {% editable %} tags in it:
+            editables - a list of dicts of the key, tag_name and editables of
+                each tag which has a literal key.
+            dynamic - the number of tags whose key is a template variable.
+    """
+    #Imported here because the template library imports us
+    from contentious.templatetags.contentious import EditableTag
+    template = loader.get_template(template_name)
+    template = getattr(template, 'template', template)
+    result = {"editables": [], "dynamic": 0}
+    for node in template.nodelist.get_nodes_by_type(EditableTag):
+        key = literal_value(node.key)
+        if key is None:
+            result["dynamic"] += 1
+            continue
+        editables = literal_value(node.editables)
+        if editables is not None:
+            editables = [x for x in editables.split(",") if x]
+        result["editables"].append({
+            "key": key,
+            "tag_name": node.tag_name,
+            "editables": editables,
+        })
+    return result
+
+
+def build_manifest(template_names=None):
+    """ Scan the given templates (defaults to all of them) and return a tuple of
+        (manifest, errors) where errors is a dict of template names which could
+        not be parsed and the reasons why.
+    """
+    if template_names is None:
+        template_names = find_template_names()
+    manifest = {"templates": {}}
+    errors = {}
+    for name in template_names:
+        try:
+            result = scan_template(name)
+        except (TemplateSyntaxError, TemplateDoesNotExist, UnicodeDecodeError) as e:
+            errors[name] = unicode(e)
+            continue
+        if result["editables"] or result["dynamic"]:
+            manifest["templates"][name] = result
+    return manifest, errors
+
+
+def get_manifest_keys(manifest, template_names=None):
+    """ Return the set of literal keys in the manifest, optionally only for the
+        given templates.
+    """
+    templates = manifest["templates"]
+    if template_names is None:
+        template_names = templates.keys()
+    keys = set()
+    for name in template_names:
+        for editable in templates.get(name, {}).get("editables", []):
+            keys.add(editable["key"])
+    return keys
+
+
+def get_manifest_path():
+    return getattr(settings, "CONTENTIOUS_KEY_MANIFEST", None)
+
+
+def write_manifest(manifest, path):
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+
+
+def load_manifest():
+    """ Return the manifest from the file at settings.CONTENTIOUS_KEY_MANIFEST,
+        or None if there isn't one.  The file is only read once per process.
+    """
+    global _manifest
+    if _manifest is None:
+        path = get_manifest_path()
+        if not path or not os.path.exists(path):
+            return None
+        with _manifest_lock:
+            if _manifest is None:
+                with open(path) as f:
+                    _manifest = json.load(f)
+    return _manifest
+
+
+def get_keys_for_templates(template_names):
+    """ Return the set of keys used by the given templates according to the
+        manifest, or None if there is no manifest.
+    """
+    manifest = load_manifest()
+    if manifest is None:
+        return None
+    return get_manifest_keys(manifest, template_names)
@@ -0,0 +1,5 @@
+#Django imports the models of every installed app, so this is where we make sure
+#that our signal receivers are connected
+import contentious.dependencies
+import contentious.images
+import contentious.search
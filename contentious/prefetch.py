@@ -0,0 +1,84 @@
+#SYSTEM
+from multiprocessing.pool import ThreadPool
+import threading
+
+#LIBRARIES
+from django.conf import settings
+from django.db import connections
+from django.template import Context
+
+#CONTENTIOUS
+from contentious.api import api
+
+_pool = None
+_pool_lock = threading.Lock()
+
+#Routes which match any url name in CONTENTIOUS_PREFETCH_ROUTES
+ALL_ROUTES = '*'
+
+
+def get_prefetch_workers():
+    return getattr(settings, "CONTENTIOUS_PREFETCH_WORKERS", 4)
+
+
+def get_prefetch_routes():
+    return getattr(settings, "CONTENTIOUS_PREFETCH_ROUTES", {})
+
+
+def get_prefetch_pool():
+    """ Return the process-wide pool of threads which prefetches content. """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPool(get_prefetch_workers())
+    return _pool
+
+
+def run_in_background(function, *args):
+    """ Call the function with the given args in the prefetch pool and return
+        an AsyncResult for it.  The thread's DB connections are closed after.
+    """
+    def run():
+        try:
+            return function(*args)
+        finally:
+            for connection in connections.all():
+                connection.close()
+    return get_prefetch_pool().apply_async(run)
+
+
+def get_route_namespaces(url_name):
+    """ Return the list of namespaces which CONTENTIOUS_PREFETCH_ROUTES says to
+        prefetch for the given url name, or None if it's not listed.  In the
+        list, None stands for the namespace (e.g. language) of the request.
+    """
+    routes = get_prefetch_routes()
+    try:
+        return routes[url_name]
+    except KeyError:
+        return routes.get(ALL_ROUTES)
+
+
+class ContentPrefetchMiddleware(object):
+    """ Middleware which, for the url names in CONTENTIOUS_PREFETCH_ROUTES,
+        starts loading the request's content in a background thread before
+        the view is called, so that the load overlaps with the view's own
+        work.  The API's get_content_data then waits for it.  E.g.
+            CONTENTIOUS_PREFETCH_ROUTES = {
+                'home': [None],  #the request's language
+                'product_detail': [None, 'en'],
+            }
+        Needs the API to implement start_content_prefetch, and must go after
+        any middleware which that needs (e.g. the locale middleware).
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        resolver_match = getattr(request, 'resolver_match', None)
+        namespaces = get_route_namespaces(resolver_match.url_name if resolver_match else None)
+        if namespaces:
+            try:
+                api.start_content_prefetch(Context({'request': request}), namespaces)
+            except AttributeError:
+                pass
+        return None
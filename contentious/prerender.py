@@ -0,0 +1,130 @@
+#SYSTEM
+from collections import OrderedDict
+import re
+import uuid
+
+#LIBRARIES
+from django.utils.encoding import force_text
+
+#CONTENTIOUS
+from contentious.api import get_optional_method
+
+PRE_RENDER_BATCH_CONTEXT_VARIABLE = "contentious_pre_render_batch"
+PRE_RENDER_BATCH_REQUEST_ATTRIBUTE = "_contentious_pre_render_batch"
+
+#Deferred tags are rendered as the tag without its pre_render between two
+#comments, so that output which is stored before it can be resolved (e.g. by
+#Django's {% cache %} or cache_page, or a render_to_string) is still valid
+PLACEHOLDER_START = "<!--cts-deferred-"
+PLACEHOLDER_REGEX = re.compile(r'<!--(cts-deferred-[0-9a-f]{32})-->(.*?)<!--/\1-->', re.DOTALL)
+
+
+def pre_render_tags(items, content_api):
+    """ Give the API a chance to modify the data for a list of HTML tags before
+        they're rendered.  `items` is a list of (tag_spec, meta) tuples; returns
+        a list of tag_specs.  Uses the API's pre_render_batch if it has one,
+        otherwise its pre_render for each tag.
+    """
+    pre_render_batch = get_optional_method(content_api, "pre_render_batch")
+    if pre_render_batch is not None:
+        return pre_render_batch(items)
+    pre_render = get_optional_method(content_api, "pre_render")
+    if pre_render is None:
+        return [tag_spec for tag_spec, meta in items]
+    return [pre_render(tag_spec, meta) for tag_spec, meta in items]
+
+
+def get_pre_render_batch(template_context):
+    """ Return the PreRenderBatch which {% editable %} tags rendered in the
+        given context should defer their pre_render to, or None.  A
+        {% pre_render_batch %} tag takes precedence over the middleware.
+    """
+    batch = template_context.get(PRE_RENDER_BATCH_CONTEXT_VARIABLE)
+    if batch is None:
+        request = template_context.get('request')
+        batch = getattr(request, PRE_RENDER_BATCH_REQUEST_ATTRIBUTE, None)
+    return batch
+
+
+class PreRenderBatch(object):
+    """ Collects the tags which are rendered as placeholders, so that they
+        can all be passed to the API's pre_render_batch in one call when
+        resolve() is called on the rendered output.
+    """
+
+    def __init__(self):
+        self.deferred = OrderedDict()
+
+    def defer(self, tag_spec, meta, self_closing, content_api):
+        """ Store the tag and return a placeholder to render in its place. """
+        #Imported here because the template library imports us
+        from contentious.templatetags.contentious import build_html_tag
+        placeholder = "cts-deferred-%s" % uuid.uuid4().hex
+        html = build_html_tag(tag_spec, self_closing)
+        self.deferred[placeholder] = (tag_spec, meta, self_closing, content_api)
+        return "<!--%s-->%s<!--/%s-->" % (placeholder, html, placeholder)
+
+    def resolve(self, output):
+        """ Call pre_render_batch for all of the deferred tags and replace
+            their placeholders in `output` with the final HTML.  Placeholders
+            from other batches, e.g. in output which was cached, are replaced
+            with the tag as it was rendered without its pre_render.
+        """
+        from contentious.templatetags.contentious import build_html_tag
+        if PLACEHOLDER_START not in output:
+            return output
+        deferred, self.deferred = self.deferred, OrderedDict()
+        #Tags rendered by different APIs (e.g. per-site) are batched separately
+        by_api = OrderedDict()
+        for placeholder, (tag_spec, meta, self_closing, content_api) in deferred.items():
+            by_api.setdefault(id(content_api), (content_api, []))[1].append(
+                (placeholder, tag_spec, meta, self_closing)
+            )
+        html = {}
+        for content_api, entries in by_api.values():
+            tag_specs = pre_render_tags(
+                [(tag_spec, meta) for placeholder, tag_spec, meta, self_closing in entries], content_api
+            )
+            for (placeholder, _, _, self_closing), tag_spec in zip(entries, tag_specs):
+                html[placeholder] = build_html_tag(tag_spec, self_closing)
+
+        def replace(match):
+            placeholder, undeferred_html = match.groups()
+            #Nested editables leave placeholders in the content of the outer ones
+            return PLACEHOLDER_REGEX.sub(replace, html.get(placeholder, undeferred_html))
+        return PLACEHOLDER_REGEX.sub(replace, output)
+
+
+class PreRenderBatchMiddleware(object):
+    """ Middleware which defers the pre_render of all of the {% editable %}
+        tags rendered with a RequestContext during the request, and passes them
+        to the API's pre_render_batch in one call when the HTML response is
+        ready.  Put it after UpdateCacheMiddleware, so that pages are resolved
+        before they're cached.
+    """
+
+    def process_request(self, request):
+        setattr(request, PRE_RENDER_BATCH_REQUEST_ATTRIBUTE, PreRenderBatch())
+
+    def process_response(self, request, response):
+        return resolve_response(request, response)
+
+
+def resolve_response(request, response):
+    """ Resolve the request's PreRenderBatch (if it has one) in the content of
+        the response, if it's HTML.  Returns the response.
+    """
+    batch = getattr(request, PRE_RENDER_BATCH_REQUEST_ATTRIBUTE, None)
+    if (
+        batch is None or getattr(response, 'streaming', False) or response.has_header('Content-Encoding')
+        or not response.get('Content-Type', '').startswith('text/html')
+    ):
+        return response
+    charset = getattr(response, '_charset', None) or 'utf-8'
+    if PLACEHOLDER_START.encode(charset) not in response.content:
+        return response
+    content = force_text(response.content, charset)
+    response.content = batch.resolve(content).encode(charset)
+    if response.has_header('Content-Length'):
+        response['Content-Length'] = str(len(response.content))
+    return response
@@ -0,0 +1,93 @@
+#SYSTEM
+import threading
+
+#LIBRARIES
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+#CONTENTIOUS
+from contentious.api import load_api
+
+DEFAULT_API_ALIAS = 'default'
+
+
+class APIRouter(object):
+    """ Picks which API instance to use for a given template context, allowing
+        several sites/tenants to be served from one process.
+
+        The available APIs are defined in settings.py, e.g.
+
+        CONTENTIOUS_APIS = {
+            'default': {
+                'API': 'contentious.contrib.basictrans.api.BasicTranslationAPI',
+            },
+            'shop': {
+                'API': 'contentious.contrib.basictrans.api.BasicTranslationAPI',
+                'OPTIONS': {'cache_prefix': 'shop_'},
+            },
+        }
+
+        Each alias gets its own API instance, created on first use.  Subclass
+        this and override `route()` to pick the alias.
+    """
+
+    def __init__(self):
+        self._apis = {}
+        self._lock = threading.Lock()
+
+    def route(self, template_context):
+        """ Return the alias (a key of settings.CONTENTIOUS_APIS) of the API
+            to use for the given template context, which may be None when
+            there is no request, e.g. in management commands.
+        """
+        return DEFAULT_API_ALIAS
+
+    def get_api(self, template_context):
+        return self.get_api_for_alias(self.route(template_context) or DEFAULT_API_ALIAS)
+
+    def get_api_for_alias(self, alias):
+        try:
+            return self._apis[alias]
+        except KeyError:
+            pass
+        with self._lock:
+            if alias not in self._apis:
+                self._apis[alias] = self._build_api(alias)
+        return self._apis[alias]
+
+    def get_aliases(self):
+        return get_api_configs().keys()
+
+    def _build_api(self, alias):
+        try:
+            config = get_api_configs()[alias]
+        except KeyError:
+            raise ImproperlyConfigured(
+                "No API with alias '%s' defined in CONTENTIOUS_APIS" % alias
+            )
+        return load_api(config['API'], config.get('OPTIONS'))
+
+
+class HostAPIRouter(APIRouter):
+    """ Routes to the API whose alias is the host name of the request, falling
+        back to the default API if there's no request or no API for the host.
+    """
+
+    def route(self, template_context):
+        try:
+            host = template_context['request'].get_host()
+        except (KeyError, TypeError, AttributeError):
+            return DEFAULT_API_ALIAS
+        host = host.split(":")[0]
+        if host in get_api_configs():
+            return host
+        return DEFAULT_API_ALIAS
+
+
+def get_api_configs():
+    try:
+        return settings.CONTENTIOUS_APIS
+    except AttributeError:
+        raise ImproperlyConfigured(
+            "You must define CONTENTIOUS_APIS in settings.py to use an API router"
+        )
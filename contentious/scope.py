@@ -0,0 +1,83 @@
+#SYSTEM
+import threading
+
+#LIBRARIES
+from django.utils import translation
+
+_state = threading.local()
+
+
+def get_render_scope():
+    """ Return the innermost RenderScope which is active in this thread, or None. """
+    stack = getattr(_state, 'scopes', None)
+    return stack[-1] if stack else None
+
+
+class RenderScope(object):
+    """ Context manager for rendering templates outside of a request, e.g. in
+        a task which sends emails.  While it's active, the contrib APIs take
+        the language and edit mode from it rather than from a request, and
+        keep the content which they load in it, so that it's only loaded once
+        for all of the renders in the scope:
+
+            with RenderScope(language='fr'):
+                for user in users:
+                    send_email(render_to_string('email.html', {'user': user}))
+
+        The language is also activated for the template's own translations.
+        The scope is per thread, but the same scope can be entered in more
+        than one thread to share its content between them.
+    """
+
+    def __init__(self, language=None, edit_mode=False):
+        self.language = language
+        self.edit_mode = edit_mode
+        self.content_cache = {}
+        self.memos = {}
+        self._lock = threading.Lock()
+        self._translation_overrides = threading.local()
+
+    def __enter__(self):
+        if not hasattr(_state, 'scopes'):
+            _state.scopes = []
+        _state.scopes.append(self)
+        if self.language is not None:
+            override = translation.override(self.language)
+            override.__enter__()
+            self._translation_overrides.override = override
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        override = getattr(self._translation_overrides, 'override', None)
+        if override is not None:
+            override.__exit__(exc_type, exc_value, traceback)
+            self._translation_overrides.override = None
+        _state.scopes.pop()
+
+    def get_content_dict(self, api, namespace, load):
+        """ Return the content dict which `api` has for `namespace`, calling
+            `load` to get it the first time it's asked for.
+        """
+        key = (id(api), namespace)
+        try:
+            return self.content_cache[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self.content_cache:
+                self.content_cache[key] = load()
+            return self.content_cache[key]
+
+    def get_memo(self, api, name):
+        """ Return a dict named `name` for `api` to keep other things which it
+            loads in, e.g. content which isn't in the content dict, for the
+            rest of the scope.
+        """
+        with self._lock:
+            return self.memos.setdefault((id(api), name), {})
+
+    def clear(self):
+        """ Forget the loaded content, e.g. after it has changed. """
+        with self._lock:
+            self.content_cache = {}
+            self.memos = {}
@@ -0,0 +1,188 @@
+#SYSTEM
+from contextlib import closing
+import sqlite3
+
+#LIBRARIES
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.dispatch import receiver
+
+#CONTENTIOUS
+from contentious.signals import content_bulk_saved, content_deleted, content_saved
+
+SCHEMA = (
+    #One row per (namespace, key, field), so that we can find the FTS rows to
+    #update without scanning the FTS table
+    "CREATE TABLE IF NOT EXISTS content_docs ("
+    " docid INTEGER PRIMARY KEY, namespace TEXT NOT NULL, key TEXT NOT NULL, field TEXT NOT NULL,"
+    " UNIQUE (namespace, key, field))",
+    "CREATE INDEX IF NOT EXISTS content_docs_key ON content_docs (key)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS content_fts USING fts4(value)",
+)
+#Fields which say where an item is published rather than what it says
+UNINDEXED_FIELDS = ('variant', 'publish_from', 'publish_until')
+
+
+def get_search_index_path():
+    return getattr(settings, "CONTENTIOUS_SEARCH_INDEX", None)
+
+
+def get_search_index():
+    """ Return the SearchIndex at settings.CONTENTIOUS_SEARCH_INDEX, or None if
+        searching isn't enabled.
+    """
+    path = get_search_index_path()
+    return SearchIndex(path) if path else None
+
+
+def search_content(query, namespace=None, fields=None, limit=50):
+    """ Search the stored content, see SearchIndex.search. """
+    index = get_search_index()
+    if index is None:
+        raise ImproperlyConfigured("Set CONTENTIOUS_SEARCH_INDEX to enable searching")
+    return index.search(query, namespace, fields, limit)
+
+
+class SearchIndex(object):
+    """ A full-text index of the content and attribute values of the live
+        (i.e. currently published, non-variant) content, kept in an SQLite
+        FTS4 table in its own database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=10)
+        for statement in SCHEMA:
+            connection.execute(statement)
+        return connection
+
+    def update(self, key, data, namespace=None):
+        """ Index the string values in `data` for the given key, replacing any
+            values which were previously indexed for the same fields.
+        """
+        self.update_many({key: data}, namespace)
+
+    def update_many(self, items, namespace=None):
+        """ Index the data of each key in the dict of dicts `items`, in one
+            transaction.  Data for a variant or a scheduled item is ignored, as
+            it doesn't change the live content.
+        """
+        namespace = namespace or ""
+        with closing(self.connect()) as connection:
+            with connection:
+                for key, data in items.items():
+                    if data.get('variant') or data.get('publish_from'):
+                        continue
+                    for field, value in data.items():
+                        self._update_field(connection, namespace, key, field, value)
+
+    def remove(self, keys):
+        """ Remove everything indexed for the given keys, in all namespaces. """
+        with closing(self.connect()) as connection:
+            with connection:
+                for key in keys:
+                    docids = [row[0] for row in connection.execute(
+                        "SELECT docid FROM content_docs WHERE key = ?", (key,)
+                    )]
+                    self._delete_docids(connection, docids)
+
+    def rebuild(self, api):
+        """ Re-index all of the content from the API's optional
+            get_content_namespaces and load_content_dict methods.
+            Returns the number of keys indexed.
+        """
+        count = 0
+        with closing(self.connect()) as connection:
+            with connection:
+                connection.execute("DELETE FROM content_docs")
+                connection.execute("DELETE FROM content_fts")
+                for namespace in api.get_content_namespaces():
+                    for key, data in api.load_content_dict(namespace).items():
+                        for field, value in data.items():
+                            self._insert_field(connection, namespace or "", key, field, value)
+                        count += 1
+        return count
+
+    def search(self, query, namespace=None, fields=None, limit=50):
+        """ Return a list of dicts of the key, namespace, field and a snippet of
+            the value for the indexed values which match the FTS query.  Raises
+            ValueError if the query isn't valid FTS syntax.
+        """
+        sql = (
+            "SELECT d.key, d.namespace, d.field, snippet(content_fts, '[', ']', '...')"
+            " FROM content_fts JOIN content_docs d ON d.docid = content_fts.docid"
+            " WHERE content_fts MATCH ?"
+        )
+        params = [query]
+        if namespace is not None:
+            sql += " AND d.namespace = ?"
+            params.append(namespace)
+        if fields:
+            sql += " AND d.field IN (%s)" % ",".join("?" * len(fields))
+            params.extend(fields)
+        sql += " LIMIT ?"
+        params.append(limit)
+        with closing(self.connect()) as connection:
+            try:
+                rows = connection.execute(sql, params).fetchall()
+            except sqlite3.OperationalError as e:
+                raise ValueError("Invalid search query %r: %s" % (query, e))
+        return [
+            {"key": key, "namespace": namespace or None, "field": field, "snippet": snippet}
+            for key, namespace, field, snippet in rows
+        ]
+
+    def _update_field(self, connection, namespace, key, field, value):
+        docids = [row[0] for row in connection.execute(
+            "SELECT docid FROM content_docs WHERE namespace = ? AND key = ? AND field = ?",
+            (namespace, key, field)
+        )]
+        self._delete_docids(connection, docids)
+        self._insert_field(connection, namespace, key, field, value)
+
+    def _insert_field(self, connection, namespace, key, field, value):
+        if not isinstance(value, basestring) or not value or field in UNINDEXED_FIELDS:
+            return
+        cursor = connection.execute(
+            "INSERT INTO content_docs (namespace, key, field) VALUES (?, ?, ?)",
+            (namespace, key, field)
+        )
+        connection.execute(
+            "INSERT INTO content_fts (docid, value) VALUES (?, ?)", (cursor.lastrowid, value)
+        )
+
+    def _delete_docids(self, connection, docids):
+        for docid in docids:
+            connection.execute("DELETE FROM content_fts WHERE docid = ?", (docid,))
+            connection.execute("DELETE FROM content_docs WHERE docid = ?", (docid,))
+
+
+@receiver(content_saved)
+def update_search_index(sender, key, data, namespace, **kwargs):
+    index = get_search_index()
+    if index is not None:
+        index.update(key, data, namespace)
+
+
+@receiver(content_bulk_saved)
+def update_search_index_in_bulk(sender, items, namespace, **kwargs):
+    index = get_search_index()
+    if index is None:
+        return
+    try:
+        #The changes may have been to variants or scheduled items, so index the live values
+        live = sender().load_content_dict(namespace)
+    except AttributeError:
+        live = None
+    if live is not None:
+        items = {key: live[key] for key in items if key in live}
+    index.update_many(items, namespace)
+
+
+@receiver(content_deleted)
+def remove_from_search_index(sender, keys, **kwargs):
+    index = get_search_index()
+    if index is not None:
+        index.remove(keys)
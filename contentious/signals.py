@@ -0,0 +1,16 @@
+from django.dispatch import Signal
+
+#Sent by the contrib APIs each time they load all of the content for a namespace
+#from the DB, i.e. on a cache miss.  The sender is the API class.
+content_loaded = Signal(providing_args=["namespace", "started", "finished"])
+
+#Sent by the contrib APIs after content for a key has been saved
+content_saved = Signal(providing_args=["key", "data", "namespace"])
+
+#Sent by the contrib APIs after changing the content of many keys at once (e.g. by
+#replace_content), once per namespace instead of content_saved for each key.
+#`items` is a dict of the keys to dicts of their changed fields.
+content_bulk_saved = Signal(providing_args=["items", "namespace"])
+
+#Sent by the contrib APIs after all of the content for some keys has been deleted
+content_deleted = Signal(providing_args=["keys"])
@@ -16,6 +16,10 @@ Usage:
 	treatContentAsHTML:
 		An array of HTML elements, which when edited should allow the user to edit the
 		content as HTML, rather than as text.  Default list is in defaultTreatContentAsHTML.
+	rerenderURL:
+		The URL of the contentious_rerender_editable view.  If it's given, each element is
+		replaced with its HTML from the server after it's saved, so that the page shows what
+		the API's pre_render does to it.
 
 Events:
 	The Contentious plugin fires several events which allow you to hook into parts of the editing
@@ -68,6 +72,11 @@ Events:
 		This is triggered after the dialog is closed.
 
 		params: the jQuery object of the form, the clicked element being edited.
+
+	'cts-element-rerendered':
+		This is triggered after a saved element has been replaced with its HTML from rerenderURL.
+
+		params: the new element, the element which it replaced.
 */
 
 var Contentious = (function(){
@@ -144,6 +153,7 @@ var Contentious = (function(){
 
 	var klass = function(config){
 		this.apiURL = config.apiURL;
+		this.rerenderURL = config.rerenderURL;
 		this.config = this.mergeObjects(this.defaultEditFormConfig(), config.editFormConfig || {});
 		this.treatContentAsHTML = config.treatContentAsHTML || this.defaultTreatContentAsHTML;
 
@@ -617,6 +627,7 @@ var Contentious = (function(){
 			$elem.removeClass('cts-default-data');
 			$elem.closest('.cts-highlight-default-data-editable').removeClass('cts-highlight-default-data-editable');
 			cts.updateEditedElement($elem, $form);
+			cts.rerenderElement($elem);
 			cts.updateTranslationProgress();
 			cts.closeDialog();
 			cts.events.publish('cts-dialog-closed', [$form, $elem], $form);
@@ -701,6 +712,28 @@ var Contentious = (function(){
 		);
 	};
 
+	klass.prototype.rerenderElement = function($elem){
+		//Replace the element with its HTML from the server, if we can.  The values have already
+		//been set on it by updateEditedElement, so if this fails it's left as it is.
+		var cts = this,
+			token = $elem.data("cts-token");
+		if(!this.rerenderURL || !token){
+			return;
+		}
+		$.ajax({
+			url: this.rerenderURL,
+			type: "GET",
+			data: {t: token},
+			dataType: "html",
+			success: function(html){
+				var $newElem = $($.trim(html));
+				$elem.replaceWith($newElem);
+				cts.applyEditableClasses();
+				cts.events.publish('cts-element-rerendered', [$newElem, $elem], $newElem);
+			}
+		});
+	};
+
 	klass.prototype.initToolbar = function ($toolBar) {
 		var $clsHighlightVisibleBtn = $toolBar.find(".cts-highlight-visible-editables"),
 			$clsHighlightHiddenBtn = $toolBar.find(".cts-highlight-hidden-editables"),
@@ -4,15 +4,41 @@ import re
 
 # LIBRARIES
 from django import template
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
 from django.template import loader, TemplateSyntaxError
 from django.utils.html import escape
+from django.utils.http import urlencode
 
 # CONTENTIOUS
-from ..api import api
+from ..api import api, get_optional_method
 from ..constants import (
     SELF_CLOSING_HTML_TAGS,
     TREAT_CONTENT_AS_HTML_TAGS,
 )
+from ..dependencies import (
+    DependencyRecorder,
+    make_fragment_cache_key,
+    record_keys,
+    register_dependencies,
+)
+from ..images import get_image_sizes, get_srcset, use_image_derivatives
+from ..manifest import get_keys_for_templates
+from ..prerender import (
+    PLACEHOLDER_REGEX,
+    PRE_RENDER_BATCH_CONTEXT_VARIABLE,
+    PreRenderBatch,
+    get_pre_render_batch,
+)
+from ..utils import (
+    ESI_CONTEXT_VARIABLE,
+    ESI_TOKEN_SALT,
+    RERENDER_TOKEN_SALT,
+    get_esi_max_default_length,
+    get_rerender_max_default_length,
+    make_editable_token,
+    use_esi,
+)
 
 register = template.Library()
 
@@ -68,6 +94,27 @@ class EditableTag(template.Node):
             with the defaults used for ones which have not been edited.  In
             edit mode we also add lots of data-x attributes for the JS.
         """
+        key, editables, optionals, attrs, extra = self.resolve_arguments(context)
+        if self._use_esi(context):
+            default_content = self.render_default_content(context)
+            if len(default_content) <= get_esi_max_default_length():
+                return render_esi_include(
+                    self.tag_name, key, editables, optionals, attrs, extra, context, default_content
+                )
+            #It would make the include's URL too long, so render it here instead
+            return render_editable(
+                self.tag_name, key, editables, optionals, attrs, extra, context,
+                lambda context: default_content, is_nested
+            )
+        return render_editable(
+            self.tag_name, key, editables, optionals, attrs, extra, context,
+            self.render_default_content, is_nested
+        )
+
+    def resolve_arguments(self, context):
+        """ Resolve the arguments of the tag against the context.  Returns a
+            tuple of (key, editables, optionals, attrs, extra).
+        """
         #Note, we should not modifiy the properties of self in here, hence variables
         #from the context are resolved into new variables, not the properties
         key = self.key.resolve(context)
@@ -85,116 +132,34 @@ class EditableTag(template.Node):
 
         if isinstance(optionals, basestring):
             optionals = [x for x in optionals.split(",") if x]
+        return key, editables, optionals, attrs, extra
 
-        edit_mode = api.in_edit_mode(context)
-        data = api.get_content_data(key, context).copy()
-        data_was_provided = bool(data)
-
-        #Check that the edited data only contains items which are allowed to be edited
-        data = {k:v for k, v in data.items() if k in editables}
-
-        display_from_tag = bool(attrs.pop('display', True))
-        display_from_data = data.pop('display', None)
-        if display_from_data is not None:
-            switched_off = not display_from_data
-        else:
-            switched_off = not display_from_tag
-
-        #Now start to build the HTML tag...
-        final_attrs = {}
-        #start with the default attrs which were defined in the template tag
-        final_attrs.update(attrs)
-
-        if edit_mode:
-            final_attrs.update({
-                "data-cts-key": key,
-                "data-cts-editables": ",".join(editables),
-                "data-cts-optionals": ",".join(optionals)
-            })
-            if extra:
-                final_attrs["data-cts-extra"] = extra
-            #Add a CSS class, preserving any which is already defined
-            classes = final_attrs.get("class", "").split(" ")
-            classes.append("cts-nested-editable" if is_nested else "cts-editable")
-
-            final_attrs['data-cts-switched-off'] = int(switched_off)
-            if switched_off:
-                classes.append("cts-switched-off")
-
-            if not data_was_provided:
-                classes.append("cts-default-data")
-
-            #Add the key of the content as the id of the HTML tag if it doesn't already have one
-            if "id" not in final_attrs:
-                final_attrs["id"] = key
-
-            final_attrs['class'] = " ".join(c for c in classes if c)
-        elif switched_off:
-            # we aren't in edit mode and content is set to not show
-            return ''
-
-        #remove the content from the data dict, everything else is attrs
-        content = data.pop('content', None)
-        if self.is_self_closing():
-            #We check that 'content' was NOT IN the data dict, rather than
-            #just checking that it was in there but as an empty string
-            assert content is None
-            content = ""
-        elif content is None:
-            #'content' was not provided in the data dict, so use the default
-            #contents of the template tag
-            content = ""
-            for tag in self.nodelist:
-                content += tag.render(context, is_nested=True) if isinstance(tag, EditableTag) else tag.render(context)
-
-        elif not self.content_is_html():
-            #If the content has been edited but is not to be treated as HTML
-            content = escape(content)
-        #then override them with any which have been edited
-        final_attrs.update(data)
-        #escape our attribute values
-        final_attrs = {k: escape(v) for k, v in final_attrs.items()}
-        #Now start to build our tag
-        assert not (content and self.is_self_closing())
-
-        tag_spec = {
-            "tag_name": self.tag_name,
-            "attrs": final_attrs,
-            "content": content,
-        }
-        meta = {
-            "context": context,
-            "key": key,
-            "editables": editables,
-            "optionals": optionals,
-            "extra": extra,
-            "in_edit_mode": edit_mode,
-            "data_was_provided": data_was_provided,
-        }
-        tag_spec = self._pre_render(tag_spec, meta)
-        tag = {
-            "tag_name": tag_spec['tag_name'],
-            "attrs": " ".join('%s%s' % (k, '="%s"' % v if v else '') for k, v in tag_spec['attrs'].items()),
-            "self_close": " />" if self.is_self_closing() else ">",
-            "content": tag_spec['content'],
-            "close": "" if self.is_self_closing() else "</%s>" % tag_spec['tag_name'],
-        }
-        return "<%(tag_name)s %(attrs)s%(self_close)s%(content)s%(close)s" % tag
-
+    def render_default_content(self, context):
+        """ Render the contents of the template tag, which are the default
+            contents of the HTML tag.
+        """
+        content = ""
+        for tag in self.nodelist:
+            content += tag.render(context, is_nested=True) if isinstance(tag, EditableTag) else tag.render(context)
+        return content
 
     def is_self_closing(self):
-        return self.tag_name in SELF_CLOSING_HTML_TAGS
+        return is_self_closing(self.tag_name)
 
     def content_is_html(self):
-        return self.tag_name in TREAT_CONTENT_AS_HTML_TAGS
+        return content_is_html(self.tag_name)
 
-    def _pre_render(self, tag_spec, meta):
-        """ Give the API a chance to modify the data for the HTML tag before it's rendered. """
-        try:
-            pre_render = api.pre_render
-        except AttributeError:
-            return tag_spec
-        return pre_render(tag_spec, meta)
+    def has_nested_editables(self):
+        return bool(self.nodelist and self.nodelist.get_nodes_by_type(EditableTag))
+
+    def _use_esi(self, context):
+        """ Should this tag be rendered as an ESI include rather than inline?
+            Tags with nested editables are always rendered inline (the nested
+            ones can still be included), as is everything in edit mode.
+        """
+        if not (context.get(ESI_CONTEXT_VARIABLE) or use_esi()):
+            return False
+        return not self.has_nested_editables() and not api.in_edit_mode(context)
 
     def _coerce_to_list(self, value):
         """ Given a value which can be either a comma-separated string or a list, return a list. """
@@ -203,6 +168,202 @@ class EditableTag(template.Node):
         return value
 
 
+def is_self_closing(tag_name):
+    return tag_name in SELF_CLOSING_HTML_TAGS
+
+
+def content_is_html(tag_name):
+    return tag_name in TREAT_CONTENT_AS_HTML_TAGS
+
+
+def render_editable(tag_name, key, editables, optionals, attrs, extra, context,
+        default_content, is_nested=False, content_api=None):
+    """ Render the HTML for an {% editable %} tag from its resolved arguments.
+        `default_content` is a function which takes the context and returns the
+        default contents of the HTML tag; it's only called if they're needed.
+        `content_api` can be given to use something other than the site's API.
+        In edit mode the tag gets a data-cts-token of its arguments, which the
+        rerender_editable view can render it again from after it's saved.
+    """
+    content_api = content_api or api
+    record_keys([key])
+    edit_mode = content_api.in_edit_mode(context)
+    template_attrs = attrs
+    data = content_api.get_content_data(key, context).copy()
+    data_was_provided = bool(data)
+
+    #Check that the edited data only contains items which are allowed to be edited
+    data = {k:v for k, v in data.items() if k in editables}
+
+    attrs = attrs.copy()
+    display_from_tag = bool(attrs.pop('display', True))
+    display_from_data = data.pop('display', None)
+    if display_from_data is not None:
+        switched_off = not display_from_data
+    else:
+        switched_off = not display_from_tag
+
+    #Now start to build the HTML tag...
+    final_attrs = {}
+    #start with the default attrs which were defined in the template tag
+    final_attrs.update(attrs)
+
+    if edit_mode:
+        final_attrs.update({
+            "data-cts-key": key,
+            "data-cts-editables": ",".join(editables),
+            "data-cts-optionals": ",".join(optionals)
+        })
+        if extra:
+            final_attrs["data-cts-extra"] = extra
+        #Add a CSS class, preserving any which is already defined
+        classes = final_attrs.get("class", "").split(" ")
+        classes.append("cts-nested-editable" if is_nested else "cts-editable")
+
+        final_attrs['data-cts-switched-off'] = int(switched_off)
+        if switched_off:
+            classes.append("cts-switched-off")
+
+        if not data_was_provided:
+            classes.append("cts-default-data")
+
+        #Add the key of the content as the id of the HTML tag if it doesn't already have one
+        if "id" not in final_attrs:
+            final_attrs["id"] = key
+
+        final_attrs['class'] = " ".join(c for c in classes if c)
+    elif switched_off:
+        # we aren't in edit mode and content is set to not show
+        return ''
+
+    #remove the content from the data dict, everything else is attrs
+    content = data.pop('content', None)
+    used_default_content = False
+    if is_self_closing(tag_name):
+        #We check that 'content' was NOT IN the data dict, rather than
+        #just checking that it was in there but as an empty string
+        assert content is None
+        content = ""
+    elif content is None:
+        #'content' was not provided in the data dict, so use the default
+        #contents of the template tag
+        content = default_content(context)
+        used_default_content = True
+    elif not content_is_html(tag_name):
+        #If the content has been edited but is not to be treated as HTML
+        content = escape(content)
+    if edit_mode:
+        #Only default content which is shown goes in the token, as that's
+        #when the content saved by the editor may not replace it
+        final_attrs["data-cts-token"] = make_rerender_token(
+            tag_name, key, editables, optionals, template_attrs, extra,
+            content if used_default_content else None, is_nested
+        )
+    #then override them with any which have been edited
+    final_attrs.update(data)
+    if tag_name == 'img' and final_attrs.get('src') and 'srcset' not in final_attrs and use_image_derivatives():
+        srcset = get_srcset(final_attrs['src'])
+        if srcset:
+            final_attrs['srcset'] = srcset
+            final_attrs.setdefault('sizes', get_image_sizes())
+    #escape our attribute values
+    final_attrs = {k: escape(v) for k, v in final_attrs.items()}
+    #Now start to build our tag
+    assert not (content and is_self_closing(tag_name))
+
+    tag_spec = {
+        "tag_name": tag_name,
+        "attrs": final_attrs,
+        "content": content,
+    }
+    meta = {
+        "context": context,
+        "key": key,
+        "editables": editables,
+        "optionals": optionals,
+        "extra": extra,
+        "in_edit_mode": edit_mode,
+        "data_was_provided": data_was_provided,
+    }
+    batch = get_pre_render_batch(context)
+    if batch is not None:
+        return batch.defer(tag_spec, meta, is_self_closing(tag_name), content_api)
+    tag_spec = _pre_render(tag_spec, meta, content_api)
+    return build_html_tag(tag_spec, is_self_closing(tag_name))
+
+
+def make_rerender_token(tag_name, key, editables, optionals, attrs, extra, default_content, is_nested):
+    """ Return the signed data-cts-token for the rerender_editable view.  The
+        default content is left out if it's large or contains other editables
+        (so that their tokens aren't nested in this one, and because the
+        view couldn't do their deferred pre_render), in which case the view
+        can only render the tag once it has saved content.
+    """
+    if default_content and (
+        len(default_content) > get_rerender_max_default_length()
+        or 'data-cts-token=' in default_content or PLACEHOLDER_REGEX.search(default_content)
+    ):
+        default_content = None
+    return make_editable_token({
+        "tag_name": tag_name,
+        "key": key,
+        "editables": editables,
+        "optionals": optionals,
+        "attrs": attrs,
+        "extra": extra,
+        "default_content": default_content,
+        "is_nested": is_nested,
+    }, RERENDER_TOKEN_SALT)
+
+
+def build_html_tag(tag_spec, self_closing):
+    """ Build the HTML string for the given tag_spec. """
+    tag = {
+        "tag_name": tag_spec['tag_name'],
+        "attrs": " ".join('%s%s' % (k, '="%s"' % v if v else '') for k, v in tag_spec['attrs'].items()),
+        "self_close": " />" if self_closing else ">",
+        "content": tag_spec['content'],
+        "close": "" if self_closing else "</%s>" % tag_spec['tag_name'],
+    }
+    return "<%(tag_name)s %(attrs)s%(self_close)s%(content)s%(close)s" % tag
+
+
+def _pre_render(tag_spec, meta, content_api):
+    """ Give the API a chance to modify the data for the HTML tag before it's rendered. """
+    pre_render = get_optional_method(content_api, "pre_render")
+    if pre_render is not None:
+        return pre_render(tag_spec, meta)
+    pre_render_batch = get_optional_method(content_api, "pre_render_batch")
+    if pre_render_batch is None:
+        return tag_spec
+    return pre_render_batch([(tag_spec, meta)])[0]
+
+
+def render_esi_include(tag_name, key, editables, optionals, attrs, extra, context, default_content):
+    """ Render an ESI include of the contentious fragment view, which will
+        render the tag with the given arguments.
+    """
+    token = make_editable_token({
+        "tag_name": tag_name,
+        "key": key,
+        "editables": editables,
+        "optionals": optionals,
+        "attrs": attrs,
+        "extra": extra,
+        "default_content": default_content,
+    }, ESI_TOKEN_SALT)
+    params = {"t": token}
+    try:
+        #The fragment's URL must vary by namespace (e.g. language) for the proxy's cache
+        namespace = api.get_content_namespace(context)
+    except AttributeError:
+        namespace = None
+    if namespace is not None:
+        params["ns"] = namespace
+    url = "%s?%s" % (reverse("contentious_editable_fragment"), urlencode(params))
+    return '<esi:include src="%s" />' % url
+
+
 def convert_kwarg_strings_to_kwargs(kwarg_strings, parser, tag_name):
     """ Takes a list of strings from token.split_contents() which are in the format
         'some_key="some_value"' or 'some_key=variable_name' and returns a dict of
@@ -225,6 +386,145 @@ def convert_kwarg_strings_to_kwargs(kwarg_strings, parser, tag_name):
     return kwargs
 
 
+@register.tag
+def esi_editables(parser, token):
+    """ Template tag which causes the {% editable %} tags inside it to be
+        rendered as ESI includes (when not in edit mode), so that the page
+        around them can be cached for much longer than the content.
+    """
+    nodelist = parser.parse(('endesi_editables',))
+    parser.delete_first_token()
+    return ESIEditablesTag(nodelist)
+
+
+class ESIEditablesTag(template.Node):
+    """ Node for {% esi_editables %}. """
+
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        context.push()
+        context[ESI_CONTEXT_VARIABLE] = True
+        try:
+            return self.nodelist.render(context)
+        finally:
+            context.pop()
+
+
+@register.tag
+def pre_render_batch(parser, token):
+    """ Template tag which defers the API's pre_render of the {% editable %}
+        tags inside it until they've all been rendered, and then passes them to
+        the API's pre_render_batch in one call.
+    """
+    nodelist = parser.parse(('endpre_render_batch',))
+    parser.delete_first_token()
+    return PreRenderBatchTag(nodelist)
+
+
+class PreRenderBatchTag(template.Node):
+    """ Node for {% pre_render_batch %}. """
+
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        batch = PreRenderBatch()
+        context.push()
+        context[PRE_RENDER_BATCH_CONTEXT_VARIABLE] = batch
+        try:
+            output = self.nodelist.render(context)
+        finally:
+            context.pop()
+        return batch.resolve(output)
+
+
+@register.tag
+def cache_editables(parser, token):
+    """ Template tag which caches its contents, like Django's {% cache %} tag:
+            {% cache_editables 3600 "sidebar" request.user.is_staff %}...{% endcache_editables %}
+        takes the timeout, a name and any number of values to vary on (the
+        language is always varied on).  The cached fragment is deleted when
+        the content of any of the {% editable %} tags inside it is saved.
+        Nothing is cached in edit mode.
+    """
+    nodelist = parser.parse(('endcache_editables',))
+    parser.delete_first_token()
+    parts = token.split_contents()
+    if len(parts) < 3:
+        raise TemplateSyntaxError("%s tag expects a timeout and a name." % parts[0])
+    return CacheEditablesTag(
+        nodelist, parser.compile_filter(parts[1]), parser.compile_filter(parts[2]),
+        [parser.compile_filter(part) for part in parts[3:]]
+    )
+
+
+class CacheEditablesTag(template.Node):
+    """ Node for {% cache_editables %}. """
+
+    def __init__(self, nodelist, timeout, name, vary_on):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        if api.in_edit_mode(context):
+            return self.nodelist.render(context)
+        cache_key = make_fragment_cache_key(
+            self.name.resolve(context), [value.resolve(context) for value in self.vary_on]
+        )
+        cached = cache.get(cache_key)
+        if cached is not None:
+            output, keys = cached
+            #A cached page around this fragment depends on its keys too
+            record_keys(keys)
+            return output
+        #Resolve any deferred pre_render within the fragment, as placeholders
+        #can't be cached
+        batch = PreRenderBatch()
+        context.push()
+        context[PRE_RENDER_BATCH_CONTEXT_VARIABLE] = batch
+        try:
+            with DependencyRecorder() as recorder:
+                output = batch.resolve(self.nodelist.render(context))
+        finally:
+            context.pop()
+        cache.set(cache_key, (output, sorted(recorder.keys)), int(self.timeout.resolve(context)))
+        register_dependencies(cache_key, recorder.keys)
+        return output
+
+
+@register.tag
+def prefetch_editables(parser, token):
+    """ Template tag which takes the names of one or more templates and tells
+        the API which keys (according to the key manifest) they use, so that it
+        can fetch the content for them all in one go.  E.g.
+        {% prefetch_editables "base.html" "shop/product.html" %}
+    """
+    parts = token.split_contents()
+    if len(parts) < 2:
+        raise TemplateSyntaxError("%s tag expects at least one template name." % parts[0])
+    return PrefetchEditablesTag([parser.compile_filter(part) for part in parts[1:]])
+
+
+class PrefetchEditablesTag(template.Node):
+    """ Node for {% prefetch_editables %}.  Renders nothing. """
+
+    def __init__(self, template_names):
+        self.template_names = template_names
+
+    def render(self, context):
+        keys = get_keys_for_templates([name.resolve(context) for name in self.template_names])
+        if keys:
+            try:
+                api.prefetch_content_data(keys, context)
+            except AttributeError:
+                pass
+        return ""
+
+
 @register.tag
 def toolbar(parser, token):
     """
@@ -1,6 +1,23 @@
 from .. contrib.basicedit.tests import APITest as EditAPITest
-from .. contrib.basictrans.tests import APITest as TransAPITest
+from .. contrib.basictrans.tests import APITest as TransAPITest, CatalogTest, CoverageTest
+from .. contrib.common.tests import *
+from .. contrib.filestore.tests import APITest as FileStoreAPITest
 
+from .api import *
+from .baking import *
+from .conditional import *
+from .dependencies import *
+from .esi import *
+from .images import *
+from .linkcheck import *
+from .loadtest import *
+from .manifest import *
+from .prefetch import *
+from .prerender import *
+from .scope import *
+from .search import *
 from .templatetags import *
 from .utils import *
+from .variants import *
+from .warming import *
 from .views import *
@@ -0,0 +1,125 @@
+#LIBRARIES
+from django.http import HttpRequest
+from django.template import RequestContext
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+import mock
+
+#CONTENTIOUS
+from contentious.api import LazyAPI
+from contentious.conditional import get_content_etag
+from contentious.routers import HostAPIRouter
+from contentious.tests.mocks import (
+    EditModeNoOpAPI,
+    NoOpAPI,
+)
+
+
+class VersionedNoOpAPI(NoOpAPI):
+    """ NoOpAPI with a content version, given as an option. """
+
+    def __init__(self, version):
+        self.version = version
+
+    def get_content_version(self, context):
+        return self.version
+
+
+class ReplacingNoOpAPI(NoOpAPI):
+    """ NoOpAPI which records its calls to replace_content. """
+
+    def __init__(self):
+        self.replaced = []
+
+    def replace_content(self, find, replacement, **kwargs):
+        self.replaced.append((find, replacement))
+        return []
+
+
+class LazyAPITest(TestCase):
+    """ Tests for the LazyAPI proxy and API routing. """
+
+    @override_settings(CONTENTIOUS_API='contentious.tests.mocks.EditModeNoOpAPI')
+    def test_resolves_on_first_use(self):
+        api = LazyAPI()
+        #Nothing should have been loaded until we actually use the API
+        self.assertFalse(api._resolved)
+        self.assertTrue(api.in_edit_mode({}))
+        self.assertIsInstance(api.get_api_for_context(), EditModeNoOpAPI)
+        #And we should keep getting the same instance
+        self.assertIs(api.get_api_for_context(), api.get_api_for_context())
+
+    @override_settings(CONTENTIOUS_API='contentious.tests.mocks.NoOpAPI')
+    def test_pre_render_is_optional(self):
+        """ The proxy always has a pre_render(), but if the real API doesn't
+            then the tag_spec should be returned untouched.
+        """
+        api = LazyAPI()
+        tag_spec = {'tag_name': 'div', 'attrs': {}, 'content': ''}
+        self.assertEqual(api.pre_render(tag_spec, {'context': {}}), tag_spec)
+
+    @override_settings(
+        CONTENTIOUS_API_ROUTER='contentious.routers.HostAPIRouter',
+        CONTENTIOUS_APIS={
+            'default': {'API': 'contentious.tests.mocks.NoOpAPI'},
+            'edit.example.com': {'API': 'contentious.tests.mocks.EditModeNoOpAPI'},
+        },
+    )
+    def test_host_routing(self):
+        api = LazyAPI()
+        request = HttpRequest()
+        request.META['HTTP_HOST'] = 'edit.example.com:8000'
+        with override_settings(ALLOWED_HOSTS=['*']):
+            self.assertTrue(api.in_edit_mode(RequestContext(request)))
+            request.META['HTTP_HOST'] = 'www.example.com'
+            self.assertFalse(api.in_edit_mode(RequestContext(request)))
+        #No context at all should give us the default API
+        self.assertIsInstance(api.get_api_for_context(), NoOpAPI)
+        self.assertIsInstance(api._router, HostAPIRouter)
+
+    @override_settings(
+        ALLOWED_HOSTS=['*'],
+        CONTENTIOUS_API_ROUTER='contentious.routers.HostAPIRouter',
+        CONTENTIOUS_APIS={
+            'default': {'API': 'contentious.tests.api.VersionedNoOpAPI', 'OPTIONS': {'version': 'a1'}},
+            'shop.example.com': {'API': 'contentious.tests.api.VersionedNoOpAPI', 'OPTIONS': {'version': 'b1'}},
+        },
+    )
+    def test_routed_optional_methods(self):
+        """ Optional methods which take a context should go to the API for that
+            context, so that e.g. each site's ETags follow its own content.
+        """
+        api = LazyAPI()
+        def get_etag(host):
+            request = HttpRequest()
+            request.META['HTTP_HOST'] = host
+            with mock.patch("contentious.conditional.api", new=api):
+                return get_content_etag(RequestContext(request))
+        www_etag = get_etag('www.example.com')
+        shop_etag = get_etag('shop.example.com')
+        self.assertNotEqual(www_etag, shop_etag)
+        #Saving content on one site changes only that site's ETag
+        api.get_api_for_context().version = 'a2'
+        self.assertNotEqual(get_etag('www.example.com'), www_etag)
+        self.assertEqual(get_etag('shop.example.com'), shop_etag)
+
+    @override_settings(
+        CONTENTIOUS_API_ROUTER='contentious.routers.HostAPIRouter',
+        CONTENTIOUS_APIS={
+            'default': {'API': 'contentious.tests.api.ReplacingNoOpAPI'},
+            'shop.example.com': {'API': 'contentious.tests.api.ReplacingNoOpAPI'},
+        },
+    )
+    def test_commands_use_all_apis(self):
+        """ Commands which aren't for a request should work on all of the
+            router's APIs, or just the one with the given alias.
+        """
+        api = LazyAPI()
+        apis = api.get_apis()
+        self.assertEqual([alias for alias, content_api in apis], ['default', 'shop.example.com'])
+        with mock.patch("contentious.management.commands.contentious_replace.api", new=api):
+            call_command('contentious_replace', 'old', 'new', verbosity=0)
+            self.assertEqual([content_api.replaced for alias, content_api in apis], [[('old', 'new')]] * 2)
+            call_command('contentious_replace', 'a', 'b', alias='shop.example.com', verbosity=0)
+        self.assertEqual([len(content_api.replaced) for alias, content_api in apis], [1, 2])
@@ -0,0 +1,81 @@
+#SYSTEM
+import os
+import shutil
+import tempfile
+
+#LIBRARIES
+from django.template import Context, Template
+from django.test import TestCase
+import mock
+
+#CONTENTIOUS
+from contentious.baking import (
+    SnapshotAPI,
+    bake_source,
+    bake_templates,
+    escape_template_syntax,
+)
+from contentious.tests.mocks import NoOpAPI
+
+
+class BakingTest(TestCase):
+    """ Tests for baking content into templates. """
+
+    source = (
+        '{% load contentious %}<p>{{ variable }}</p>'
+        '{% editable a "my_link" editable="content,href" href="/" %}Home{% endeditable %}'
+        '{% editable p "dynamic" editable="content" title=variable %}Hi{% endeditable %}'
+        '{% editable div "outer" editable="title" title=variable %}'
+        '{% editable span "inner" editable="content" %}Inner{% endeditable %}'
+        '{% endeditable %}'
+        '{% editable img "my_image" editable="src" src="/cake.jpg" %}'
+    )
+
+    def test_bake_source(self):
+        snapshot_api = SnapshotAPI(
+            {'my_link': {'content': 'Go {{ home }}', 'href': '/new/'}, 'inner': {'content': 'Baked'}},
+            api=NoOpAPI(),
+        )
+        baked_source, baked, left = bake_source(self.source, snapshot_api)
+        #The link, the inner span and the image can be baked, the others use variables
+        self.assertEqual((baked, left), (3, 2))
+        self.assertFalse('"my_link"' in baked_source)
+        self.assertFalse('"inner"' in baked_source)
+        self.assertTrue('"outer"' in baked_source)
+        #The baked template should render exactly the same as the live one
+        context = Context({'variable': 'value'})
+        with mock.patch("contentious.templatetags.contentious.api", new=snapshot_api):
+            live = Template(self.source).render(context)
+            self.assertEqual(Template(baked_source).render(context), live)
+        self.assertTrue('Go {{ home }}' in live)
+
+    def test_bake_templates_removes_stale_files(self):
+        source_dir = tempfile.mkdtemp()
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, source_dir)
+        self.addCleanup(shutil.rmtree, output_dir)
+
+        def write(name, source):
+            path = os.path.join(source_dir, name)
+            with open(path, 'w') as f:
+                f.write(source)
+            return path
+
+        editable = '{% load contentious %}{% editable p "para" editable="content" %}Hi{% endeditable %}'
+        template_files = {'one.html': write('one.html', editable), 'two.html': write('two.html', editable)}
+        bake_templates(template_files, 'en', {}, output_dir)
+        self.assertEqual(sorted(os.listdir(os.path.join(output_dir, 'en'))), ['one.html', 'two.html'])
+        #A template which no longer has anything to bake loses its baked copy...
+        write('one.html', '<p>No editables</p>')
+        bake_templates(template_files, 'en', {}, output_dir)
+        self.assertEqual(os.listdir(os.path.join(output_dir, 'en')), ['two.html'])
+        #...and baking everything removes the copies of templates which have gone
+        os.makedirs(os.path.join(output_dir, 'en', 'old'))
+        with open(os.path.join(output_dir, 'en', 'old', 'gone.html'), 'w') as f:
+            f.write('<p>Baked</p>')
+        bake_templates({'two.html': template_files['two.html']}, 'en', {}, output_dir, remove_others=True)
+        self.assertEqual(os.listdir(os.path.join(output_dir, 'en')), ['two.html'])
+
+    def test_escape_template_syntax(self):
+        html = '<p>{{ a }} {% b %} {# c #} {{{</p>'
+        self.assertEqual(Template(escape_template_syntax(html)).render(Context()), html)
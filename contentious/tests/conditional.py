@@ -0,0 +1,70 @@
+#LIBRARIES
+from django.http import HttpResponse
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+import mock
+
+#CONTENTIOUS
+from contentious.conditional import (
+    ContentETagMiddleware,
+    condition_on_content,
+)
+from contentious.tests.mocks import ConfigurableAPI
+
+
+class VersionedAPI(ConfigurableAPI):
+    """ Mock API with a content version. """
+
+    def get_content_version(self, context):
+        return self._get_return_value("get_content_version")
+
+
+class ConditionalTest(TestCase):
+    """ Tests for the content-version based ETags in conditional.py. """
+
+    def setUp(self):
+        self.api = VersionedAPI()
+        self.api.set_return_value('in_edit_mode', False)
+        self.api.set_return_value('get_content_version', 'v1')
+        self.factory = RequestFactory()
+
+    def test_decorator(self):
+        view = condition_on_content(lambda request: HttpResponse("page"))
+        with mock.patch("contentious.conditional.api", new=self.api):
+            response = view(self.factory.get('/'))
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            #The same ETag should give us a 304...
+            response = view(self.factory.get('/', HTTP_IF_NONE_MATCH=etag))
+            self.assertEqual(response.status_code, 304)
+            #...until the content changes
+            self.api.set_return_value('get_content_version', 'v2')
+            response = view(self.factory.get('/', HTTP_IF_NONE_MATCH=etag))
+            self.assertEqual(response.status_code, 200)
+            #or until we deploy new templates
+            new_etag = response['ETag']
+            with override_settings(CONTENTIOUS_DEPLOY_VERSION='r2'):
+                response = view(self.factory.get('/', HTTP_IF_NONE_MATCH=new_etag))
+                self.assertEqual(response.status_code, 200)
+            #And we don't want any of it in edit mode
+            self.api.set_return_value('in_edit_mode', True)
+            response = view(self.factory.get('/', HTTP_IF_NONE_MATCH=new_etag))
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.has_header('ETag'))
+
+    @override_settings(CONTENTIOUS_ETAG_PATHS=[r'^/cached/'])
+    def test_middleware(self):
+        middleware = ContentETagMiddleware()
+        with mock.patch("contentious.conditional.api", new=self.api):
+            request = self.factory.get('/cached/page/')
+            self.assertIsNone(middleware.process_request(request))
+            response = middleware.process_response(request, HttpResponse("page"))
+            etag = response['ETag']
+            request = self.factory.get('/cached/page/', HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(middleware.process_request(request).status_code, 304)
+            #Paths which don't match the settings are left alone
+            request = self.factory.get('/other/', HTTP_IF_NONE_MATCH=etag)
+            self.assertIsNone(middleware.process_request(request))
+            response = middleware.process_response(request, HttpResponse("page"))
+            self.assertFalse(response.has_header('ETag'))
@@ -0,0 +1,110 @@
+#LIBRARIES
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.template import Context, RequestContext, Template
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+import mock
+
+#CONTENTIOUS
+from contentious.contrib.basictrans.api import BasicTranslationAPI
+from contentious.decorators import cache_page_with_dependencies
+from contentious.dependencies import DependencyRecorder
+from contentious.signals import content_saved
+from contentious.tests.mocks import ConfigurableAPI
+
+
+class DependencyTest(TestCase):
+    """ Tests for deleting cached pages and fragments when the content which
+        they used is saved.
+    """
+
+    templ = Template(
+        '{% load contentious %}{% cache_editables 60 "test" %}'
+        '{% editable p "first" editable="content" %}{% endeditable %}{% editable p "second" editable="content" %}{% endeditable %}'
+        '{% endcache_editables %}{% editable p "outside" editable="content" %}{% endeditable %}'
+    )
+
+    def setUp(self):
+        cache.clear()
+        self.api = ConfigurableAPI()
+        self.api.set_return_value('in_edit_mode', False)
+        self.api.set_return_value('get_content_data', {'content': 'Old'})
+        self.patchers = [
+            mock.patch("contentious.templatetags.contentious.api", new=self.api),
+            mock.patch("contentious.decorators.api", new=self.api),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+
+    def tearDown(self):
+        for patcher in self.patchers:
+            patcher.stop()
+
+    def test_fragment(self):
+        self.assertEqual(self.templ.render(Context()), '<p >Old</p><p >Old</p><p >Old</p>')
+        self.api.set_return_value('get_content_data', {'content': 'New'})
+        #A page around the cached fragment still depends on the fragment's keys
+        with DependencyRecorder() as recorder:
+            self.assertEqual(self.templ.render(Context()), '<p >Old</p><p >Old</p><p >New</p>')
+        self.assertEqual(recorder.keys, set(['first', 'second', 'outside']))
+        #Saving a key which isn't in the fragment leaves it cached...
+        content_saved.send(sender=None, key='outside', data={}, namespace=None)
+        self.assertEqual(self.templ.render(Context()), '<p >Old</p><p >Old</p><p >New</p>')
+        #...but saving one which is deletes it
+        content_saved.send(sender=None, key='second', data={}, namespace=None)
+        self.assertEqual(self.templ.render(Context()), '<p >New</p><p >New</p><p >New</p>')
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cache')
+    def test_page(self):
+        """ Pages should be cached with a contrib API behind the session and
+            auth middleware, even though checking for edit mode loads the user
+            from the session, with separate copies for visitors with a session.
+        """
+        api = BasicTranslationAPI(cache_prefix='dependency_page_test_')
+        calls = []
+
+        @cache_page_with_dependencies(60)
+        def view(request):
+            calls.append(request)
+            template = Template('{% load contentious %}{% editable p "page_key" editable="content" %}{% endeditable %}')
+            return HttpResponse(template.render(RequestContext(request)))
+
+        factory = RequestFactory()
+        def get(method='get', admin=False, **headers):
+            request = getattr(factory, method)('/page/', **headers)
+            SessionMiddleware().process_request(request)
+            AuthenticationMiddleware().process_request(request)
+            if admin:
+                request.user = mock.Mock(is_admin=True)
+            request.language = 'en' #as the i18n middleware would
+            with mock.patch("contentious.templatetags.contentious.api", new=api):
+                with mock.patch("contentious.decorators.api", new=api):
+                    return view(request)
+
+        def save(content):
+            request = HttpRequest()
+            request.language = 'en'
+            api.save_content_data('page_key', {'content': content}, Context({'request': request}))
+
+        save('Old')
+        response = get()
+        self.assertEqual(response.content, b'<p >Old</p>')
+        self.assertEqual(response['Vary'], 'Cookie')
+        self.assertEqual(get().content, b'<p >Old</p>')
+        self.assertEqual(len(calls), 1)
+        #Visitors with a session get their own copy
+        self.assertEqual(get(HTTP_COOKIE='sessionid=abc').content, b'<p >Old</p>')
+        self.assertEqual(len(calls), 2)
+        #Saving the content deletes all of the copies
+        save('New')
+        self.assertEqual(get().content, b'<p >New</p>')
+        self.assertEqual(get(HTTP_COOKIE='sessionid=abc').content, b'<p >New</p>')
+        self.assertEqual(len(calls), 4)
+        #Other methods and edit mode aren't cached
+        get('post')
+        get(admin=True)
+        self.assertEqual(len(calls), 6)
@@ -0,0 +1,136 @@
+#SYSTEM
+import re
+
+#LIBRARIES
+from django.http import HttpRequest
+from django.template import Context, Template
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import translation
+import mock
+
+#CONTENTIOUS
+from contentious.tests.mocks import ConfigurableAPI
+
+ESI_INCLUDE_REGEX = re.compile(r'<esi:include src="([^"]+)" />')
+
+
+class LanguageAPI(object):
+    """ Mock API whose content says which language it's for. """
+
+    def in_edit_mode(self, context):
+        return False
+
+    def get_content_namespace(self, context):
+        request = context.get('request')
+        return getattr(request, 'language', None) or translation.get_language()
+
+    def get_content_data(self, key, context):
+        return {'content': u"Content in %s" % self.get_content_namespace(context)}
+
+
+class ESITest(TestCase):
+    """ Tests for rendering editables as ESI includes. """
+
+    urls = 'contentious.tests.urls'
+
+    page_templ = (
+        '{% load contentious %}<p>Page shell</p>'
+        '{% editable div "my_div" editable="title" title="cake" %}'
+        'Default {{ variable }}'
+        '{% editable span "nested" editable="content" %}Nested{% endeditable %}'
+        '{% endeditable %}'
+        '{% editable a "my_link" editable="content,href" href="/" %}Link text{% endeditable %}'
+    )
+
+    def process_esi(self, html):
+        """ A stand-in for an ESI-processing proxy, which replaces each ESI
+            include with the response from the URL it includes.
+        """
+        def fetch(match):
+            response = self.client.get(match.group(1))
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue('public' in response['Cache-Control'])
+            return response.content.decode('utf-8')
+        return ESI_INCLUDE_REGEX.sub(fetch, html)
+
+    def test_esi_rendering(self):
+        api = ConfigurableAPI()
+        api.set_return_value('in_edit_mode', False)
+        api.set_return_value('get_content_data', {'href': '/edited/'})
+        inline_templ = Template(self.page_templ)
+        esi_templ = Template(
+            '{% load contentious %}{% esi_editables %}' + self.page_templ[len('{% load contentious %}'):] +
+            '{% endesi_editables %}'
+        )
+        context = Context({'variable': 'value'})
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            with mock.patch("contentious.views.api", new=api), mock.patch("contentious.conditional.api", new=api):
+                inline = inline_templ.render(context)
+                shell = esi_templ.render(context)
+                #The div contains a nested editable, so it is rendered inline,
+                #but the nested one and the link should be includes
+                self.assertEqual(len(ESI_INCLUDE_REGEX.findall(shell)), 2)
+                self.assertFalse('Link text' in shell)
+                self.assertTrue('Default value' in shell)
+                self.assertEqual(self.process_esi(shell), inline)
+
+    def test_no_esi_in_edit_mode(self):
+        api = ConfigurableAPI()
+        api.set_return_value('in_edit_mode', True)
+        api.set_return_value('get_content_data', {})
+        templ = Template(
+            '{% load contentious %}{% esi_editables %}'
+            '{% editable a "my_link" editable="content,href" href="/" %}Link text{% endeditable %}'
+            '{% endesi_editables %}'
+        )
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            result = templ.render(Context())
+        self.assertFalse('esi:include' in result)
+        self.assertTrue('data-cts-key="my_link"' in result)
+
+    @override_settings(LANGUAGE_CODE='en', LANGUAGES=(('en', 'English'), ('fr', 'French')))
+    def test_fragment_namespace(self):
+        """ The fragments should be rendered in the namespace of the page which
+            included them, not whatever the fragment request's language is.
+        """
+        api = LanguageAPI()
+        templ = Template(
+            '{% load contentious %}{% esi_editables %}'
+            '{% editable p "my_para" editable="content" %}Default{% endeditable %}'
+            '{% endesi_editables %}'
+        )
+        request = HttpRequest()
+        request.language = 'fr'
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            with mock.patch("contentious.views.api", new=api), mock.patch("contentious.conditional.api", new=api):
+                shell = templ.render(Context({'request': request}))
+                url = ESI_INCLUDE_REGEX.search(shell).group(1)
+                self.assertTrue('ns=fr' in url)
+                self.assertTrue('Content in fr' in self.process_esi(shell))
+                #Only known namespaces are allowed
+                response = self.client.get(url.replace('ns=fr', 'ns=xx'))
+                self.assertEqual(response.status_code, 400)
+
+    @override_settings(CONTENTIOUS_ESI_MAX_DEFAULT_LENGTH=10)
+    def test_long_default_content_inline(self):
+        """ Default content which is too long to go in the include's URL should
+            be rendered inline.
+        """
+        api = ConfigurableAPI()
+        api.set_return_value('in_edit_mode', False)
+        api.set_return_value('get_content_data', {})
+        templ = Template(
+            '{% load contentious %}{% esi_editables %}'
+            '{% editable p "short" editable="content" %}Short{% endeditable %}'
+            '{% editable p "long" editable="content" %}Much longer default content{% endeditable %}'
+            '{% endesi_editables %}'
+        )
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            result = templ.render(Context())
+        self.assertEqual(len(ESI_INCLUDE_REGEX.findall(result)), 1)
+        self.assertTrue('Much longer default content' in result)
+
+    def test_tampered_token(self):
+        response = self.client.get('/contentious/fragment/', {'t': 'not-a-real-token'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,76 @@
+#SYSTEM
+import os
+import shutil
+import tempfile
+
+#LIBRARIES
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils import unittest
+import mock
+
+#CONTENTIOUS
+from contentious.images import Image, generate_srcset, get_derivatives, get_srcset
+from contentious.tests.mocks import ConfigurableAPI
+
+
+@unittest.skipUnless(Image, "Needs PIL or Pillow")
+class ImageDerivativesTest(TestCase):
+    """ Tests for making resized versions of images in editable src values. """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media_root, MEDIA_URL='/media/',
+            CONTENTIOUS_IMAGE_DERIVATIVES=True, CONTENTIOUS_IMAGE_WIDTHS=(100, 200, 1000),
+        )
+        self.settings.enable()
+        Image.new('RGB', (400, 300), (255, 0, 0)).save(os.path.join(self.media_root, 'hero.jpg'))
+        cache.clear()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_generate(self):
+        self.assertEqual(get_derivatives('/media/hero.jpg'), [('/media/hero.jpg', 400)])
+        self.assertEqual(get_derivatives('http://example.com/hero.jpg', generate=True), [])
+        derivatives = get_derivatives('/media/hero.jpg', generate=True)
+        #There's no point in a 1000px version of a 400px image
+        self.assertEqual([width for url, width in derivatives], [100, 200, 400])
+        path = os.path.join(self.media_root, derivatives[0][0][len('/media/'):])
+        self.assertEqual(Image.open(path).size, (100, 75))
+        #They're not made again unless the original changes
+        mtime = os.path.getmtime(path)
+        self.assertEqual(get_derivatives('/media/hero.jpg', generate=True), derivatives)
+        self.assertEqual(os.path.getmtime(path), mtime)
+        Image.new('RGB', (400, 200), (0, 0, 255)).save(os.path.join(self.media_root, 'hero.jpg'))
+        self.assertNotEqual(get_derivatives('/media/hero.jpg', generate=True), derivatives)
+
+    def test_srcset_rendering(self):
+        templ = Template('{% load contentious %}{% editable img "hero" editable="src" src="/media/nope.jpg" %}')
+        api = ConfigurableAPI()
+        api.set_return_value('in_edit_mode', False)
+        api.set_return_value('get_content_data', {'src': '/media/hero.jpg'})
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            self.assertFalse('srcset' in templ.render(Context()))
+            srcset = generate_srcset('/media/hero.jpg')
+            self.assertEqual(get_srcset('/media/hero.jpg'), srcset)
+            html = templ.render(Context())
+        self.assertTrue('srcset="%s"' % srcset in html)
+        self.assertTrue('sizes="100vw"' in html)
+
+    def test_srcset_misses_expire(self):
+        """ Images without derivatives are only remembered for a short time,
+            so that ones which get them later (e.g. from contentious_images)
+            aren't left without a srcset.
+        """
+        with mock.patch("contentious.images.cache") as mock_cache:
+            mock_cache.get.return_value = None
+            with override_settings(CONTENTIOUS_SRCSET_MISS_TIMEOUT=5):
+                self.assertEqual(get_srcset('/media/hero.jpg'), "")
+            self.assertEqual(mock_cache.set.call_args[0][1:], ("", 5))
+            srcset = generate_srcset('/media/hero.jpg')
+            self.assertEqual(mock_cache.set.call_args[0][1:], (srcset,))
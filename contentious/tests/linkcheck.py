@@ -0,0 +1,122 @@
+#SYSTEM
+import BaseHTTPServer
+import os
+import shutil
+import SocketServer
+import tempfile
+import threading
+import time
+
+#LIBRARIES
+from django.test import TestCase
+
+#CONTENTIOUS
+from contentious.linkcheck import LinkChecker, extract_urls
+
+
+class StandInHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """ Answers like a small site, and records the requests and the client
+        ports (i.e. connections) which they came on.
+    """
+
+    protocol_version = "HTTP/1.1" #so that connections are kept alive
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def respond(self, head):
+        self.server.requests.append((self.command, self.path, self.client_address[1], time.time()))
+        if self.path == '/moved/':
+            self.send_response(301)
+            self.send_header('Location', '/ok/')
+        elif self.path == '/no-head/' and head:
+            self.send_response(405)
+        elif self.path in ('/ok/', '/no-head/', '/caf%C3%A9/'):
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class StandInServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+class LinkCheckTest(TestCase):
+    """ Tests for checking the URLs in href/src values, against a local server. """
+
+    def setUp(self):
+        self.server = StandInServer(('127.0.0.1', 0), StandInHandler)
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.base_url = "http://127.0.0.1:%d/" % self.server.server_address[1]
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_extract_urls(self):
+        urls = extract_urls({
+            'en': {
+                'a': {'href': '/ok/#top', 'content': 'OK'},
+                'b': {'href': 'mailto:me@example.com', 'src': 'http://example.com/x.png'},
+            },
+            'fr': {'a': {'href': '/ok/'}, 'c': {'href': '#'}},
+        }, base_url='http://site.com/')
+        self.assertEqual(urls, {
+            'http://site.com/ok/': [('en', 'a', 'href'), ('fr', 'a', 'href')],
+            'http://example.com/x.png': [('en', 'b', 'src')],
+        })
+
+    def test_check(self):
+        cache_path = os.path.join(self.temp_dir, 'links.json')
+        checker = LinkChecker(workers=1, host_interval=0.1, cache_path=cache_path)
+        urls = [self.base_url + path for path in ('ok/', 'moved/', 'missing/', 'no-head/')]
+        results = checker.check(urls)
+        self.assertEqual(
+            {url[len(self.base_url):]: (result['ok'], result['status']) for url, result in results.items()},
+            {'ok/': (True, 200), 'moved/': (True, 200), 'missing/': (False, 404), 'no-head/': (True, 200)},
+        )
+        self.assertEqual(results[self.base_url + 'moved/']['redirected_to'], self.base_url + 'ok/')
+        requests = self.server.requests
+        self.assertEqual(len(requests), 6)
+        #One worker reuses one connection
+        self.assertEqual(len(set(port for method, path, port, at in requests)), 1)
+        #And the requests to the host are spaced out
+        times = [at for method, path, port, at in requests]
+        self.assertTrue(all(later - earlier >= 0.09 for earlier, later in zip(times, times[1:])))
+        #Checking again uses the cached results, unless they've expired
+        self.assertEqual(LinkChecker(cache_path=cache_path).check(urls), results)
+        self.assertEqual(len(requests), 6)
+        LinkChecker(cache_path=cache_path, max_age=0).check(urls[:1])
+        self.assertEqual(len(requests), 7)
+        #Hosts which aren't there are reported as errors
+        result = LinkChecker(timeout=1).check(['http://127.0.0.1:1/'])['http://127.0.0.1:1/']
+        self.assertFalse(result['ok'])
+        self.assertTrue(result['error'])
+
+    def test_unusual_urls(self):
+        """ Non-ASCII URLs should be encoded, and URLs which can't be checked
+            at all shouldn't stop the others being checked and cached.
+        """
+        cache_path = os.path.join(self.temp_dir, 'links.json')
+        urls = extract_urls({None: {
+            'cafe': {'href': u'/caf\xe9/'},
+            'broken': {'href': u'http://[broken/'},
+        }}, base_url=self.base_url)
+        results = LinkChecker(cache_path=cache_path).check(urls)
+        self.assertTrue(results[self.base_url + u'caf\xe9/']['ok'])
+        self.assertFalse(results[u'http://[broken/']['ok'])
+        self.assertTrue(results[u'http://[broken/']['error'])
+        self.assertEqual(LinkChecker(cache_path=cache_path).load_cache(), results)
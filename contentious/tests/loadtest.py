@@ -0,0 +1,94 @@
+#SYSTEM
+from StringIO import StringIO
+
+#LIBRARIES
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+import mock
+
+#CONTENTIOUS
+from contentious.contrib.basicedit.api import BasicEditAPI
+from contentious.contrib.basicedit.models import ContentItem
+from contentious.loadtest import (
+    LOADTEST_KEY_PREFIX,
+    LoadTestStats,
+    max_overlap,
+    percentile,
+)
+from contentious.signals import content_saved
+
+
+class EditingAPI(BasicEditAPI):
+    """ BasicEditAPI which is always in edit mode. """
+
+    def in_edit_mode(self, context):
+        return True
+
+
+class InlineThread(object):
+    """ Stand-in for threading.Thread which runs its target in this thread
+        when it's joined, so that it uses the test database.
+    """
+
+    def __init__(self, target, args=()):
+        self.target = target
+        self.args = args
+
+    def start(self):
+        pass
+
+    def join(self):
+        self.target(*self.args)
+
+
+class LoadTestTest(TestCase):
+    """ Tests for the sums in loadtest.py. """
+
+    def test_percentile(self):
+        values = range(1, 101)
+        self.assertEqual(percentile(values, 50), 51)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3], 99), 3)
+        self.assertIsNone(percentile([], 50))
+
+    def test_max_overlap(self):
+        self.assertEqual(max_overlap([]), 0)
+        self.assertEqual(max_overlap([(0, 1), (2, 3)]), 1)
+        self.assertEqual(max_overlap([(0, 10), (1, 2), (1.5, 3), (5, 6)]), 3)
+
+    def test_report(self):
+        stats = LoadTestStats()
+        stats.record("read", 0.1, 2)
+        stats.record("read", 0.3, 4, error=True)
+        stats.record_load(None, "en", 0, 1)
+        stats.record_load(None, "en", 0.5, 1.5)
+        report = stats.report(2.0)
+        self.assertEqual(report["read"]["count"], 2)
+        self.assertEqual(report["read"]["errors"], 1)
+        self.assertEqual(report["read"]["per_second"], 1)
+        self.assertEqual(report["read"]["queries"], 6)
+        self.assertEqual(report["content_loads"]["en"], {"count": 2, "max_concurrent": 2})
+
+    def test_command_deletes_content(self):
+        api = EditingAPI(cache_prefix='loadtest_test_')
+        saved = []
+
+        def record_save(sender, key, **kwargs):
+            saved.append(key)
+        content_saved.connect(record_save)
+        self.addCleanup(content_saved.disconnect, record_save)
+        self.addCleanup(setattr, connection, 'use_debug_cursor', connection.use_debug_cursor)
+        stdout = StringIO()
+        with mock.patch("contentious.loadtest.threading.Thread", new=InlineThread), \
+                mock.patch("contentious.loadtest.connections", new=mock.Mock(all=mock.Mock(return_value=[]))), \
+                mock.patch("contentious.views.api", new=api), \
+                mock.patch("contentious.decorators.api", new=api), \
+                mock.patch("contentious.loadtest.api", new=mock.Mock(get_apis=mock.Mock(return_value=[(None, api)]))):
+            call_command(
+                'contentious_loadtest', readers=0, editors=1, duration=0.2, editor_interval=0,
+                num_editables=5, any_database=True, stdout=stdout,
+            )
+        self.assertTrue(saved)
+        self.assertTrue("edit: %d" % len(saved) in stdout.getvalue())
+        self.assertFalse(ContentItem.objects.filter(key__startswith=LOADTEST_KEY_PREFIX).exists())
@@ -0,0 +1,67 @@
+#LIBRARIES
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Context, Template
+from django.test import TestCase
+import mock
+
+#CONTENTIOUS
+from contentious.manifest import (
+    build_manifest,
+    get_manifest_keys,
+    scan_template,
+)
+from contentious.tests.mocks import NoOpAPI
+
+
+class ManifestTest(TestCase):
+    """ Tests for the template scanning in manifest.py. """
+
+    def test_scan_template(self):
+        result = scan_template("contentious/tests/test_manifest.html")
+        self.assertEqual(result["dynamic"], 1)
+        self.assertEqual(
+            sorted(result["editables"]),
+            sorted([
+                {"key": "manifest_link", "tag_name": "a", "editables": ["content", "href"]},
+                {"key": "manifest_image", "tag_name": "img", "editables": ["src"]},
+            ])
+        )
+
+    def test_build_manifest(self):
+        manifest, errors = build_manifest(["contentious/tests/test_manifest.html", "does/not/exist.html"])
+        self.assertTrue("does/not/exist.html" in errors)
+        self.assertEqual(get_manifest_keys(manifest), set(["manifest_link", "manifest_image"]))
+        #Templates without any editables don't go in the manifest
+        manifest, errors = build_manifest(["contentious/toolbar.html"])
+        self.assertEqual(manifest["templates"], {})
+
+    def test_prefetch_editables(self):
+        """ Test that {% prefetch_editables %} passes the keys for the given
+            templates to the API.
+        """
+        manifest, errors = build_manifest(["contentious/tests/test_manifest.html"])
+        api = NoOpAPI()
+        api.prefetch_content_data = mock.Mock()
+        templ = Template('{% load contentious %}{% prefetch_editables "contentious/tests/test_manifest.html" %}')
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            with mock.patch("contentious.manifest._manifest", new=manifest):
+                self.assertEqual(templ.render(Context()), "")
+        keys, context = api.prefetch_content_data.call_args[0]
+        self.assertEqual(keys, set(["manifest_link", "manifest_image"]))
+
+    def test_no_delete_with_parse_errors(self):
+        """ The keys of templates which can't be parsed aren't in the manifest,
+            so nothing should be deleted if there are any.
+        """
+        manifest = {"templates": {"ok.html": {"editables": [], "dynamic": 0}}}
+        api = NoOpAPI()
+        api.get_stored_keys = mock.Mock(return_value=["used_by_broken_template"])
+        api.delete_content = mock.Mock()
+        with mock.patch("contentious.management.commands.contentious_scan.api", new=api):
+            with mock.patch(
+                "contentious.management.commands.contentious_scan.build_manifest",
+                return_value=(manifest, {"broken.html": "Invalid block tag"}),
+            ):
+                self.assertRaises(CommandError, call_command, 'contentious_scan', delete=True, verbosity=0)
+        self.assertEqual(api.delete_content.call_count, 0)
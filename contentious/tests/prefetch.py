@@ -0,0 +1,43 @@
+#LIBRARIES
+from django.core.urlresolvers import resolve
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+import mock
+
+#CONTENTIOUS
+from contentious.prefetch import ContentPrefetchMiddleware
+from contentious.tests.mocks import NoOpAPI
+
+
+class PrefetchMiddlewareTest(TestCase):
+    """ Tests for the ContentPrefetchMiddleware. """
+
+    urls = 'contentious.tests.urls'
+
+    def _process_view(self, api):
+        request = RequestFactory().get('/test_view/')
+        request.resolver_match = resolve(request.path_info)
+        with mock.patch("contentious.prefetch.api", new=api):
+            ContentPrefetchMiddleware().process_view(request, None, (), {})
+        return request
+
+    def test_prefetch_routes(self):
+        api = NoOpAPI()
+        api.start_content_prefetch = mock.Mock()
+        with override_settings(CONTENTIOUS_PREFETCH_ROUTES={'main': [None, 'fr']}):
+            request = self._process_view(api)
+        self.assertEqual(api.start_content_prefetch.call_count, 1)
+        context, namespaces = api.start_content_prefetch.call_args[0]
+        self.assertEqual(context['request'], request)
+        self.assertEqual(namespaces, [None, 'fr'])
+        #Routes which aren't listed aren't prefetched, unless there's a '*'
+        with override_settings(CONTENTIOUS_PREFETCH_ROUTES={'other': [None]}):
+            self._process_view(api)
+        self.assertEqual(api.start_content_prefetch.call_count, 1)
+        with override_settings(CONTENTIOUS_PREFETCH_ROUTES={'*': [None]}):
+            self._process_view(api)
+        self.assertEqual(api.start_content_prefetch.call_count, 2)
+        #And APIs which can't prefetch are left alone
+        with override_settings(CONTENTIOUS_PREFETCH_ROUTES={'*': [None]}):
+            self._process_view(NoOpAPI())
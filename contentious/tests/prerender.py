@@ -0,0 +1,170 @@
+#LIBRARIES
+from django.http import HttpResponse
+from django.template import Context, RequestContext, Template
+from django.test import TestCase
+from django.test.client import RequestFactory
+import mock
+
+#CONTENTIOUS
+from contentious.api import ContentiousInterface
+from contentious.prerender import PLACEHOLDER_REGEX, PreRenderBatchMiddleware
+from contentious.tests.mocks import ConfigurableAPI
+
+
+class BatchingAPI(ConfigurableAPI):
+    """ Mock API with a pre_render_batch which records its calls. """
+
+    def __init__(self):
+        super(BatchingAPI, self).__init__()
+        self.set_return_value('in_edit_mode', False)
+        self.set_return_value('get_content_data', {})
+        self.batches = []
+
+    def pre_render_batch(self, items):
+        self.batches.append([meta['key'] for tag_spec, meta in items])
+        tag_specs = []
+        for tag_spec, meta in items:
+            tag_spec['attrs']['data-batched'] = meta['key']
+            tag_specs.append(tag_spec)
+        return tag_specs
+
+
+class InterfaceAPI(ContentiousInterface):
+    """ Mock API which subclasses the interface and marks the tags which go
+        through whichever pre_render hook is given to it.
+    """
+
+    def __init__(self, hook_name):
+        self.hooks = []
+        def pre_render(tag_spec, meta):
+            self.hooks.append(hook_name)
+            tag_spec['attrs']['data-hook'] = hook_name
+            return tag_spec
+        if hook_name == 'pre_render':
+            self.pre_render = pre_render
+        else:
+            self.pre_render_batch = lambda items: [pre_render(tag_spec, meta) for tag_spec, meta in items]
+
+    def in_edit_mode(self, context):
+        return False
+
+    def get_content_data(self, key, context):
+        return {}
+
+
+class PreRenderBatchTest(TestCase):
+    """ Tests for batching the API's pre_render of {% editable %} tags. """
+
+    templ = Template(
+        '{% load contentious %}{% pre_render_batch %}'
+        '{% editable div "outer" editable="title" %}'
+        '{% editable span "inner" editable="content" %}Inner{% endeditable %}'
+        '{% endeditable %}'
+        '{% editable img "image" editable="src" src="/a.png" %}'
+        '{% endpre_render_batch %}'
+    )
+
+    def test_batch_tag(self):
+        """ Test that all of the tags in {% pre_render_batch %} are passed to
+            pre_render_batch in one call, and that their placeholders
+            (including nested ones) are replaced with the final HTML.
+        """
+        api = BatchingAPI()
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            result = self.templ.render(Context())
+        self.assertEqual(api.batches, [["inner", "outer", "image"]])
+        self.assertFalse(PLACEHOLDER_REGEX.search(result))
+        self.assertTrue('<span data-batched="inner">Inner</span></div>' in result)
+        self.assertTrue('data-batched="outer"' in result)
+        self.assertTrue('data-batched="image"' in result)
+
+    def test_without_batch(self):
+        """ Test that pre_render_batch is called for each tag when there's no
+            batch, and that pre_render is preferred when there is one.
+        """
+        api = BatchingAPI()
+        templ = Template(
+            '{% load contentious %}'
+            '{% editable p "one" editable="content" %}One{% endeditable %}'
+            '{% editable p "two" editable="content" %}Two{% endeditable %}'
+        )
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            result = templ.render(Context())
+            self.assertEqual(api.batches, [["one"], ["two"]])
+            self.assertTrue('data-batched="two"' in result)
+            api.pre_render = lambda tag_spec, meta: tag_spec
+            result = templ.render(Context())
+            self.assertEqual(len(api.batches), 2)
+            self.assertFalse('data-batched' in result)
+
+    def test_middleware(self):
+        """ Test that with the middleware, tags rendered with a RequestContext
+            are batched until the response is processed.
+        """
+        api = BatchingAPI()
+        middleware = PreRenderBatchMiddleware()
+        templ = Template(
+            '{% load contentious %}'
+            '{% editable p "one" editable="content" %}One{% endeditable %}'
+            '{% editable p "two" editable="content" %}Two{% endeditable %}'
+        )
+        request = RequestFactory().get("/")
+        middleware.process_request(request)
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            html = templ.render(RequestContext(request, {'request': request}))
+            self.assertEqual(len(PLACEHOLDER_REGEX.findall(html)), 2)
+            self.assertEqual(api.batches, [])
+            response = middleware.process_response(request, HttpResponse(html))
+        self.assertEqual(api.batches, [["one", "two"]])
+        self.assertTrue('<p data-batched="one">One</p>' in response.content)
+        self.assertFalse(PLACEHOLDER_REGEX.search(response.content))
+        #Only HTML is resolved
+        request = RequestFactory().get("/")
+        middleware.process_request(request)
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            html = templ.render(RequestContext(request, {'request': request}))
+        response = middleware.process_response(request, HttpResponse(html, content_type='text/plain'))
+        self.assertEqual(response.content, html)
+        self.assertEqual(len(api.batches), 1)
+
+    def test_cached_placeholders(self):
+        """ Test that placeholders which were stored in a cache before they
+            were resolved fall back to the tag without its pre_render.
+        """
+        api = BatchingAPI()
+        middleware = PreRenderBatchMiddleware()
+        templ = Template(
+            '{% load cache contentious %}{% cache 60 "prerender_test" %}'
+            '{% editable div "outer" editable="title" %}'
+            '{% editable p "one" editable="content" %}One{% endeditable %}'
+            '{% endeditable %}'
+            '{% endcache %}'
+        )
+        results = []
+        with mock.patch("contentious.templatetags.contentious.api", new=api):
+            for i in range(2):
+                request = RequestFactory().get("/")
+                middleware.process_request(request)
+                html = templ.render(RequestContext(request, {'request': request}))
+                results.append(middleware.process_response(request, HttpResponse(html)).content)
+        self.assertTrue('<p data-batched="one">One</p>' in results[0])
+        self.assertEqual(results[1], '<div><p>One</p></div>')
+
+    def test_interface_subclasses(self):
+        """ Test that APIs which subclass ContentiousInterface and only define
+            one of the hooks have it used both with and without a batch,
+            rather than the stub of the other one.
+        """
+        templ = Template('{% load contentious %}{% editable p "one" editable="content" %}One{% endeditable %}')
+        for hook_name in ('pre_render', 'pre_render_batch'):
+            api = InterfaceAPI(hook_name)
+            middleware = PreRenderBatchMiddleware()
+            request = RequestFactory().get("/")
+            middleware.process_request(request)
+            with mock.patch("contentious.templatetags.contentious.api", new=api):
+                html = templ.render(RequestContext(request, {'request': request}))
+                response = middleware.process_response(request, HttpResponse(html))
+                self.assertTrue('<p data-hook="%s">One</p>' % hook_name in response.content)
+                html = templ.render(Context())
+                self.assertTrue('<p data-hook="%s">One</p>' % hook_name in html)
+            self.assertEqual(api.hooks, [hook_name, hook_name])
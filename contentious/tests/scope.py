@@ -0,0 +1,57 @@
+#SYSTEM
+import threading
+
+#LIBRARIES
+from django.core.cache import cache
+from django.http import HttpRequest
+from django.template import Context, Template
+from django.test import TestCase
+import mock
+
+#CONTENTIOUS
+from contentious.contrib.basictrans.api import BasicTranslationAPI
+from contentious.scope import RenderScope, get_render_scope
+
+
+class RenderScopeTest(TestCase):
+    """ Tests for rendering outside of a request in a RenderScope. """
+
+    templ = Template(
+        '{% load contentious %}'
+        '{% editable p "greeting" editable="content" %}Hello{% endeditable %} {{ name }}'
+    )
+
+    def setUp(self):
+        self.api = BasicTranslationAPI(cache_prefix='scope_test_')
+        for language, content in (('en', 'Hi'), ('fr', 'Salut')):
+            request = HttpRequest()
+            request.language = language
+            self.api.save_content_data('greeting', {'content': content}, Context({'request': request}))
+        cache.clear()
+
+    def test_scope(self):
+        self.assertEqual(get_render_scope(), None)
+        load = mock.Mock(wraps=self.api._get_cached_content_dict)
+        with mock.patch("contentious.templatetags.contentious.api", new=self.api):
+            with mock.patch.object(self.api, '_get_cached_content_dict', new=load):
+                with RenderScope(language='fr') as scope:
+                    self.assertEqual(get_render_scope(), scope)
+                    results = [self.templ.render(Context({'name': name})) for name in range(10)]
+                    #Nested scopes take over until they end
+                    with RenderScope(language='en'):
+                        english = self.templ.render(Context({'name': 'x'}))
+                    self.assertTrue('Salut' in self.templ.render(Context({'name': 'x'})))
+        self.assertEqual(get_render_scope(), None)
+        self.assertTrue(all('<p >Salut</p>' in result for result in results))
+        self.assertTrue('<p >Hi</p>' in english)
+        #The content was loaded once for each scope, not for each render
+        self.assertEqual(load.call_count, 2)
+
+    def test_scope_is_per_thread(self):
+        seen = []
+        with RenderScope(language='fr', edit_mode=True):
+            self.assertTrue(self.api.in_edit_mode(Context()))
+            thread = threading.Thread(target=lambda: seen.append(get_render_scope()))
+            thread.start()
+            thread.join()
+        self.assertEqual(seen, [None])
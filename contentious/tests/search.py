@@ -0,0 +1,71 @@
+#SYSTEM
+import os
+import tempfile
+
+#LIBRARIES
+from django.test import TestCase
+
+#CONTENTIOUS
+from contentious.search import SearchIndex
+from contentious.tests.warming import WarmableAPI
+
+
+class IndexableAPI(WarmableAPI):
+    """ Mock API with content to index. """
+
+    def get_content_namespaces(self):
+        return ['en', 'fr']
+
+    def load_content_dict(self, namespace):
+        return {
+            'greeting': {'content': 'Hello world (%s)' % namespace, 'href': '/hello/', 'display': True},
+            'farewell': {'content': 'Goodbye', 'title': ''},
+        }
+
+
+class SearchIndexTest(TestCase):
+    """ Tests for the full-text SearchIndex. """
+
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(handle)
+        self.index = SearchIndex(self.path)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_rebuild_and_search(self):
+        self.assertEqual(self.index.rebuild(IndexableAPI()), 4)
+        results = self.index.search('hello')
+        self.assertEqual(sorted((r['key'], r['namespace'], r['field']) for r in results), [
+            ('greeting', 'en', 'content'), ('greeting', 'en', 'href'),
+            ('greeting', 'fr', 'content'), ('greeting', 'fr', 'href'),
+        ])
+        results = self.index.search('hello', namespace='fr', fields=['content'])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['snippet'], '[Hello] world (fr)')
+
+    def test_incremental_updates(self):
+        self.index.rebuild(IndexableAPI())
+        self.index.update('farewell', {'content': 'Hello and goodbye'}, 'en')
+        self.assertEqual(
+            sorted(r['key'] for r in self.index.search('goodbye', namespace='en')), ['farewell']
+        )
+        self.assertEqual(len(self.index.search('hello', namespace='en', fields=['content'])), 2)
+        self.index.remove(['greeting'])
+        self.assertEqual([r['key'] for r in self.index.search('hello')], ['farewell'])
+
+    def test_only_live_content_indexed(self):
+        self.index.rebuild(IndexableAPI())
+        #Variants and scheduled items don't replace the live content...
+        self.index.update('greeting', {'content': 'Bonjour', 'variant': 'hero:b'}, 'en')
+        self.index.update('greeting', {'content': 'Hola', 'publish_from': '2030-01-01 00:00'}, 'en')
+        self.assertEqual(len(self.index.search('hello', namespace='en', fields=['content'])), 1)
+        self.assertEqual(self.index.search('bonjour OR hola'), [])
+        #...and the fields which say where an item is published aren't indexed
+        self.index.update('farewell', {'content': 'Bye', 'publish_until': '2030-01-01 00:00'}, 'en')
+        self.assertEqual(self.index.search('2030'), [])
+
+    def test_invalid_query(self):
+        self.index.rebuild(IndexableAPI())
+        self.assertRaises(ValueError, self.index.search, '"unbalanced')
@@ -3,4 +3,5 @@ from django.views.generic import View
 
 urlpatterns = patterns('',
     url(r'^test_view/$', View.as_view(), name="main"),
+    url(r'^contentious/', include('contentious.urls')),
 )
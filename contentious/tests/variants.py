@@ -0,0 +1,37 @@
+#LIBRARIES
+from django.http import HttpRequest
+from django.test import TestCase
+from django.test.utils import override_settings
+
+#CONTENTIOUS
+from contentious.variants import choose_variant, get_request_variants
+
+
+class VariantBucketingTest(TestCase):
+    """ Tests for bucketing requests into the variants of experiments. """
+
+    def _make_request(self, session_key=None):
+        request = HttpRequest()
+        if session_key is not None:
+            request.session = type('Session', (object,), {'session_key': session_key})()
+        return request
+
+    def test_choose_variant(self):
+        variants = ['a', 'b', 'c']
+        choices = [choose_variant('hero', variants, i) for i in range(300)]
+        #The same value always gets the same variant...
+        self.assertEqual(choices, [choose_variant('hero', variants, i) for i in range(300)])
+        #...and the values are split between all of the variants
+        for variant in variants:
+            self.assertTrue(60 < choices.count(variant) < 140)
+
+    @override_settings(CONTENTIOUS_EXPERIMENTS={'hero': ['a', 'b'], 'footer': ['x', 'y']})
+    def test_get_request_variants(self):
+        variants = get_request_variants(self._make_request('abc123'))
+        self.assertEqual(len(variants), 2)
+        self.assertTrue(variants[0].startswith('footer:'))
+        self.assertTrue(variants[1].startswith('hero:'))
+        self.assertEqual(variants, get_request_variants(self._make_request('abc123')))
+        self.assertEqual(get_request_variants(self._make_request()), ())
+        with override_settings(CONTENTIOUS_EXPERIMENTS={}):
+            self.assertEqual(get_request_variants(self._make_request('abc123')), ())
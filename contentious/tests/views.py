@@ -1,14 +1,22 @@
 #SYSTEM
 import json
+import re
 
 #LIBRARIES
 from django.core.exceptions import ValidationError
 from django.http import HttpRequest
+from django.template import Context, Template
 from django.test import TestCase
+from django.test.utils import override_settings
 import mock
 
 #CONTENTIOUS
-from contentious.views import save_content as save_content_view
+from contentious.templatetags.contentious import make_rerender_token
+from contentious.views import (
+    rerender_editable as rerender_editable_view,
+    save_content as save_content_view,
+)
+from contentious.utils import RERENDER_TOKEN_SALT, load_editable_token
 from contentious.tests.mocks import (
     EditModeNoOpAPI,
 )
@@ -48,3 +56,63 @@ class ViewsTest(TestCase):
                     response = save_content_view(request)
         self.assertEqual(response.status_code, 400)
         self.assertEqual(json.loads(response.content), error_dict)
+
+    def test_rerender_editable(self):
+        """ Test that the rerender_editable() view renders the tag in its token
+            with the current content.
+        """
+        mock_api = EditModeNoOpAPI()
+        def rerender(token):
+            request = HttpRequest()
+            request.method = 'GET'
+            request.GET = {'t': token}
+            with mock.patch("contentious.views.api", new=mock_api):
+                with mock.patch("contentious.decorators.api", new=mock_api):
+                    with mock.patch("contentious.templatetags.contentious.api", new=mock_api):
+                        return rerender_editable_view(request)
+        token = make_rerender_token('p', 'my_key', ['content'], [], {}, None, u"Default", False)
+        with mock.patch.object(mock_api, "get_content_data", return_value={'content': u"Saved"}):
+            response = rerender(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(u">Saved</p>", response.content.decode('utf-8'))
+        #The tag which it renders has a token too, so it can be re-rendered
+        #again, without the default content now that it isn't shown
+        new_token = make_rerender_token('p', 'my_key', ['content'], [], {}, None, None, False)
+        self.assertIn(u'data-cts-token="%s"' % new_token, response.content.decode('utf-8'))
+        self.assertEqual(rerender(token).content.decode('utf-8').count(u">Default</p>"), 1)
+        #Default content which has other editables in it, or is too long,
+        #isn't in the token, so the view can't render the tag without content
+        for default_content in [u"<b>cts-deferred-%s</b>" % ("0" * 32), u'<b data-cts-token="x">Nested</b>']:
+            token = make_rerender_token('p', 'my_key', ['content'], [], {}, None, default_content, False)
+            self.assertEqual(rerender(token).status_code, 409)
+        with override_settings(CONTENTIOUS_RERENDER_MAX_DEFAULT_LENGTH=5):
+            token = make_rerender_token('p', 'my_key', ['content'], [], {}, None, u"Default", False)
+        self.assertEqual(rerender(token).status_code, 409)
+        response = rerender('not-a-real-token')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rerender_tokens(self):
+        """ Test that the tokens only contain the default content which is
+            shown, and not that of tags with other editables in them.
+        """
+        templ = Template(
+            '{% load contentious %}'
+            '{% editable div "outer" editable="title" %}<p>Outer</p>'
+            '{% editable span "inner" editable="content" %}Inner{% endeditable %}'
+            '{% endeditable %}'
+            '{% editable p "saved" editable="content" %}Not shown{% endeditable %}'
+        )
+        mock_api = EditModeNoOpAPI()
+        def get_content_data(key, context):
+            return {'content': u"Saved"} if key == 'saved' else {}
+        with mock.patch.object(mock_api, "get_content_data", new=get_content_data):
+            with mock.patch("contentious.templatetags.contentious.api", new=mock_api):
+                html = templ.render(Context())
+        specs = [
+            load_editable_token(token, RERENDER_TOKEN_SALT)
+            for token in re.findall(r'data-cts-token="([^"]+)"', html)
+        ]
+        self.assertEqual(
+            [(spec['key'], spec['default_content']) for spec in specs],
+            [('outer', None), ('inner', u"Inner"), ('saved', None)]
+        )
@@ -0,0 +1,44 @@
+#LIBRARIES
+from django.test import TestCase
+
+#CONTENTIOUS
+from contentious.warming import warm_caches
+
+
+class WarmableAPI(object):
+    """ Mock API which implements the optional cache warming methods. """
+
+    def __init__(self):
+        self.warmed = []
+
+    def get_content_namespaces(self):
+        return ['en', 'es', 'fr', 'broken']
+
+    def warm_cache(self, namespace):
+        if namespace == 'broken':
+            raise ValueError("Nope")
+        self.warmed.append(namespace)
+        return {'key_%d' % i: {'content': namespace} for i in range(3)}
+
+
+class WarmingTest(TestCase):
+    """ Tests for warming.py. """
+
+    def test_warm_caches(self):
+        api = WarmableAPI()
+        reported = []
+        results = warm_caches(api=api, workers=2, check_size=True, callback=reported.append)
+        self.assertEqual(sorted(api.warmed), ['en', 'es', 'fr'])
+        self.assertEqual(sorted(results), sorted(reported))
+        results = {r.namespace: r for r in results}
+        self.assertEqual(results['en'].items, 3)
+        self.assertTrue(results['en'].size > 0)
+        self.assertIsNone(results['en'].error)
+        #Errors are reported rather than stopping the other namespaces from being warmed
+        self.assertIsInstance(results['broken'].error, ValueError)
+
+    def test_warm_given_namespaces(self):
+        api = WarmableAPI()
+        results = warm_caches(api=api, namespaces=['fr'])
+        self.assertEqual(api.warmed, ['fr'])
+        self.assertIsNone(results[0].size)
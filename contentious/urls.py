@@ -4,5 +4,9 @@ from django.conf.urls import patterns, url
 urlpatterns = patterns(
     'contentious.views',
     url(r'^save_content/$', 'save_content', name="contentious_save_content"),
+    url(r'^publish_drafts/$', 'publish_drafts', name="contentious_publish_drafts"),
+    url(r'^discard_drafts/$', 'discard_drafts', name="contentious_discard_drafts"),
+    url(r'^fragment/$', 'editable_fragment', name="contentious_editable_fragment"),
+    url(r'^rerender/$', 'rerender_editable', name="contentious_rerender_editable"),
 )
 
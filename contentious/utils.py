@@ -2,10 +2,16 @@
 import json
 
 #LIBRARIES
+from django.conf import settings
+from django.core import signing
 from django.http import HttpResponse
 from django.utils.html import escape
 from django.utils.safestring import SafeData
 
+ESI_CONTEXT_VARIABLE = "contentious_esi"
+ESI_TOKEN_SALT = "contentious.esi"
+RERENDER_TOKEN_SALT = "contentious.rerender"
+
 
 def json_response_from_exception(error):
     """ Given an exception instance (preferably a ValidationError) return an
@@ -51,3 +57,50 @@ def recursive_make_safe(obj):
         return obj
     return new
 
+
+
+def use_esi():
+    """ Should all {% editable %} tags be rendered as ESI includes, rather than
+        just those inside {% esi_editables %}?
+    """
+    return getattr(settings, "CONTENTIOUS_ESI", False)
+
+
+def get_esi_max_age():
+    """ How long (in seconds) caches may keep an ESI fragment for. """
+    return getattr(settings, "CONTENTIOUS_ESI_MAX_AGE", 60)
+
+
+def get_esi_max_default_length():
+    """ The longest default content (in characters) which is put in the URL
+        of an ESI include.  Tags with longer default content are rendered inline.
+    """
+    return getattr(settings, "CONTENTIOUS_ESI_MAX_DEFAULT_LENGTH", 1000)
+
+
+def get_rerender_max_default_length():
+    """ The longest default content (in characters) which is put in the
+        data-cts-token of an editable for re-rendering it.
+    """
+    return getattr(settings, "CONTENTIOUS_RERENDER_MAX_DEFAULT_LENGTH", 1000)
+
+
+def make_editable_token(spec, salt):
+    """ Given a dict of the resolved arguments of an {% editable %} tag, return
+        a signed (and therefore tamper-proof) string containing them.
+    """
+    spec = dict(spec, attrs={k: make_json_safe(v) for k, v in spec['attrs'].items()})
+    return signing.dumps(spec, salt=salt, compress=True)
+
+
+def load_editable_token(token, salt):
+    """ The reverse of make_editable_token.  Raises signing.BadSignature if the
+        token has been tampered with.
+    """
+    return signing.loads(token, salt=salt)
+
+
+def make_json_safe(value):
+    if value is None or isinstance(value, (basestring, bool, int, long, float)):
+        return value
+    return unicode(value)
@@ -0,0 +1,70 @@
+#SYSTEM
+import hashlib
+
+#LIBRARIES
+from django.conf import settings
+
+
+def get_experiments():
+    """ Return settings.CONTENTIOUS_EXPERIMENTS, a dict of experiment names to
+        lists of the names of their variants, e.g.
+        {'homepage_hero': ['control', 'big_button']}.
+    """
+    return getattr(settings, "CONTENTIOUS_EXPERIMENTS", {})
+
+
+def get_bucketing_attribute():
+    """ The (dotted) name of the request attribute which visitors are bucketed
+        into variants by.  It should be stable for each visitor.
+    """
+    return getattr(settings, "CONTENTIOUS_VARIANT_REQUEST_ATTRIBUTE", "session.session_key")
+
+
+def make_variant_name(experiment, variant):
+    """ The name of the variant as it's stored on the content, e.g. 'homepage_hero:big_button'. """
+    return "%s:%s" % (experiment, variant)
+
+
+def choose_variant(experiment, variants, bucketing_value):
+    """ Deterministically pick one of the variants of the experiment for the
+        given value, splitting values evenly between the variants.
+    """
+    digest = hashlib.md5(("%s:%s" % (experiment, bucketing_value)).encode('utf-8')).hexdigest()
+    return variants[int(digest[:8], 16) % len(variants)]
+
+
+def get_bucketing_value(request):
+    value = request
+    for attribute in get_bucketing_attribute().split("."):
+        value = getattr(value, attribute, None)
+        if value is None:
+            return None
+    return value
+
+
+def get_request_variants(request):
+    """ Return a sorted tuple of the stored names of the variants which the
+        request is bucketed into, one per experiment, or an empty tuple if
+        there are no experiments or the request has no bucketing value.
+        The result is stored on the request.
+    """
+    try:
+        return request._contentious_variants
+    except AttributeError:
+        pass
+    experiments = get_experiments()
+    value = get_bucketing_value(request) if experiments else None
+    if value is None:
+        variants = ()
+    else:
+        variants = tuple(sorted(
+            make_variant_name(experiment, choose_variant(experiment, names, value))
+            for experiment, names in experiments.items() if names
+        ))
+    request._contentious_variants = variants
+    return variants
+
+
+def variants_cache_key_suffix(variants):
+    """ A short string which identifies the given combination of variants. """
+    return hashlib.md5("|".join(variants).encode('utf-8')).hexdigest()
@@ -1,13 +1,31 @@
+#STANDARD LIB
+import hashlib
+import json
+
 #LIBRARIES
+from django.conf import settings
+from django.core import signing
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotModified
 from django.template import RequestContext
-from django.views.decorators.http import require_POST
+from django.utils.cache import patch_cache_control
+from django.utils import translation
+from django.utils.http import quote_etag
+from django.views.decorators.http import require_GET, require_POST
 
 #CONTENTIOUS
 from contentious.api import api
+from contentious.conditional import etag_matches, get_content_etag
 from contentious.decorators import require_edit_mode
-from contentious.utils import json_response_from_exception
+from contentious.prerender import get_pre_render_batch
+from contentious.templatetags.contentious import is_self_closing, render_editable
+from contentious.utils import (
+    ESI_TOKEN_SALT,
+    RERENDER_TOKEN_SALT,
+    get_esi_max_age,
+    json_response_from_exception,
+    load_editable_token,
+)
 
 
 @require_POST
@@ -24,3 +42,119 @@ def save_content(request):
         return HttpResponse('ok')
     except ValidationError as e:
         return json_response_from_exception(e)
+
+
+def _change_drafts(request, method_name):
+    context = RequestContext(request)
+    try:
+        method = getattr(api.get_api_for_context(context), method_name)
+    except AttributeError:
+        return HttpResponseBadRequest("The API does not support drafts")
+    keys = method(context, request.POST.getlist('key') or None)
+    return HttpResponse(json.dumps({'keys': keys}), content_type='application/json')
+
+
+@require_POST
+@require_edit_mode
+def publish_drafts(request):
+    """ View for publishing the editor's drafts, or just those for the POSTed keys. """
+    return _change_drafts(request, 'publish_drafts')
+
+
+@require_POST
+@require_edit_mode
+def discard_drafts(request):
+    """ View for throwing away the editor's drafts, or just those for the POSTed keys. """
+    return _change_drafts(request, 'discard_drafts')
+
+
+@require_GET
+def editable_fragment(request):
+    """ View which renders a single {% editable %} tag from the signed token
+        in an ESI include (see {% esi_editables %}).  Its ETag is based on the
+        content version if the API provides one, so unchanged fragments can be
+        answered with a 304 without rendering them.
+        The fragment's URL has the namespace (e.g. language) of the page which
+        included it, which is activated, as the fragment's own URL may not say
+        what it is (e.g. with i18n_patterns).
+    """
+    token = request.GET.get('t', '')
+    try:
+        spec = load_editable_token(token, ESI_TOKEN_SALT)
+    except signing.BadSignature:
+        return HttpResponseBadRequest()
+    namespace = request.GET.get('ns')
+    if namespace is None:
+        return _render_fragment(request, token, spec)
+    if not _is_fragment_namespace(request, namespace):
+        return HttpResponseBadRequest()
+    with translation.override(namespace):
+        request.LANGUAGE_CODE = request.language = namespace
+        return _render_fragment(request, token, spec)
+
+
+def _is_fragment_namespace(request, namespace):
+    if namespace in dict(settings.LANGUAGES):
+        return True
+    try:
+        return namespace in api.get_api_for_context(RequestContext(request)).get_content_namespaces()
+    except AttributeError:
+        return False
+
+
+def _render_fragment(request, token, spec):
+    context = RequestContext(request)
+    etag = get_content_etag(context, token)
+    if etag and etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        html = render_editable(
+            spec['tag_name'], spec['key'], spec['editables'], spec['optionals'],
+            spec['attrs'], spec['extra'], context,
+            lambda context: spec['default_content'],
+        )
+        #Resolve any deferred pre_render now, so that the ETag is of the final HTML
+        batch = get_pre_render_batch(context)
+        if batch is not None:
+            html = batch.resolve(html)
+        etag = etag or hashlib.md5(html.encode('utf-8')).hexdigest()
+        if etag_matches(request, etag):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(html)
+    response['ETag'] = quote_etag(etag)
+    if api.in_edit_mode(context):
+        patch_cache_control(response, private=True, max_age=0)
+    else:
+        patch_cache_control(response, public=True, max_age=get_esi_max_age())
+    return response
+
+
+@require_GET
+@require_edit_mode
+def rerender_editable(request):
+    """ View which renders a single {% editable %} tag from the data-cts-token
+        which it has in edit mode, e.g. so that the JS can replace the element
+        with its new HTML (with the API's pre_render applied) after it's saved,
+        without reloading the page.  Responds with a 409 if the tag's default
+        content is needed but couldn't be put in its token.
+    """
+    try:
+        spec = load_editable_token(request.GET.get('t', ''), RERENDER_TOKEN_SALT)
+    except signing.BadSignature:
+        return HttpResponseBadRequest()
+    context = RequestContext(request)
+    if spec['default_content'] is None and not is_self_closing(spec['tag_name']):
+        data = api.get_content_data(spec['key'], context)
+        if 'content' not in spec['editables'] or data.get('content') is None:
+            return HttpResponse("Reload the page to see the changes", status=409)
+    html = render_editable(
+        spec['tag_name'], spec['key'], spec['editables'], spec['optionals'],
+        spec['attrs'], spec['extra'], context, lambda context: spec['default_content'], spec['is_nested'],
+    )
+    batch = get_pre_render_batch(context)
+    if batch is not None:
+        html = batch.resolve(html)
+    response = HttpResponse(html)
+    patch_cache_control(response, private=True, max_age=0)
+    return response
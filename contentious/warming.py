@@ -0,0 +1,61 @@
+#SYSTEM
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+import cPickle as pickle
+import time
+
+#LIBRARIES
+from django.conf import settings
+from django.db import connections
+
+#CONTENTIOUS
+from contentious.api import api as default_api
+
+
+WarmResult = namedtuple('WarmResult', ['namespace', 'items', 'size', 'seconds', 'error'])
+
+
+def get_cache_max_item_size():
+    """ The largest value (in bytes) which the cache backend will store.
+        Defaults to memcached's default limit of 1MB.
+    """
+    return getattr(settings, "CONTENTIOUS_CACHE_MAX_ITEM_SIZE", 1024 * 1024)
+
+
+def warm_caches(api=None, namespaces=None, workers=4, check_size=False, callback=None):
+    """ Rebuild the content caches of the given API (defaults to the site's API)
+        for the given namespaces (defaults to all of them), using a pool of
+        `workers` threads.
+        If `check_size` is True then the pickled size of each payload is
+        calculated so that it can be compared to get_cache_max_item_size().
+        If given, `callback` is called with each WarmResult as it finishes.
+        Returns a list of WarmResult tuples.
+    """
+    api = api or default_api
+    if namespaces is None:
+        namespaces = api.get_content_namespaces()
+
+    def warm(namespace):
+        start = time.time()
+        try:
+            payload = api.warm_cache(namespace)
+            size = len(pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)) if check_size else None
+            return WarmResult(namespace, len(payload), size, time.time() - start, None)
+        except Exception as e:
+            return WarmResult(namespace, 0, None, time.time() - start, e)
+        finally:
+            #Each thread gets its own DB connection, don't leave them lying around
+            for connection in connections.all():
+                connection.close()
+
+    pool = ThreadPool(max(1, min(workers, len(namespaces) or 1)))
+    results = []
+    try:
+        for result in pool.imap_unordered(warm, namespaces):
+            results.append(result)
+            if callback:
+                callback(result)
+    finally:
+        pool.close()
+        pool.join()
+    return results